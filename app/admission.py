@@ -0,0 +1,140 @@
+"""Admission control: shed load early instead of queueing until timeouts.
+
+Two signals describe how overloaded the process is: event-loop lag, sampled
+by `LoopLagMonitor` (a task that sleeps for a fixed interval and measures
+how late it wakes up), and the number of requests waiting for a MongoDB pool
+connection, from `app.pool.pool_metrics`.
+
+Requests are classified before routing. When either signal passes its soft
+threshold, heavy endpoints (dashboard, bootstrap, batch, creating a list
+from a template) are rejected; past the hard threshold everything except
+cheap reads is rejected, and past twice the hard threshold only the health
+check and `/metrics` are served. Rejections are `503` with `Retry-After`,
+sent before any auth or database work.
+"""
+import asyncio
+
+from fastapi.responses import JSONResponse
+from starlette.routing import compile_path
+
+from .config import settings
+from .metrics import Counter
+from .pool import pool_metrics
+
+EXEMPT = 0
+READ = 1
+WRITE = 2
+HEAVY = 3
+
+_PRIORITY_LABELS = {READ: "read", WRITE: "write", HEAVY: "heavy"}
+_EXEMPT_ROUTES = [("GET", "/"), ("GET", "/metrics")]
+_HEAVY_ROUTES = [
+    ("GET", "/me/dashboard"),
+    ("GET", "/me/bootstrap"),
+    ("POST", "/batch"),
+    ("POST", "/templates/{template_id}/create-list"),
+]
+
+
+def _compile(routes: list[tuple[str, str]]):
+    return [(method, compile_path(path)[0]) for method, path in routes]
+
+
+_exempt_patterns = _compile(_EXEMPT_ROUTES)
+_heavy_patterns = _compile(_HEAVY_ROUTES)
+
+
+REQUESTS_SHED = Counter(
+    "http_requests_shed", "Requests rejected by admission control by class.", ("class",)
+)
+
+
+def classify(method: str, path: str) -> int:
+    for patterns, priority in ((_exempt_patterns, EXEMPT), (_heavy_patterns, HEAVY)):
+        if any(method == route_method and regex.match(path) for route_method, regex in patterns):
+            return priority
+    return READ if method in ("GET", "HEAD") else WRITE
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.05, decay: float = 0.5):
+        self.interval = interval
+        self.decay = decay
+        self.lag = 0.0
+
+    def record(self, lag: float) -> None:
+        # Spikes register at once and fade over a few samples.
+        self.lag = max(lag, self.lag * self.decay)
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - started - self.interval))
+
+
+class AdmissionController:
+    def __init__(self, monitor: LoopLagMonitor, pool):
+        self.monitor = monitor
+        self.pool = pool
+        self.shed: dict[int, int] = {READ: 0, WRITE: 0, HEAVY: 0}
+
+    def pressure(self) -> float:
+        """Load relative to the hard thresholds: 1.0 means at a hard threshold."""
+        lag_ms = self.monitor.lag * 1000
+        return max(
+            lag_ms / settings.admission_lag_hard_ms,
+            self.pool.waiting / settings.admission_pool_wait_hard,
+        )
+
+    def soft_pressure(self) -> float:
+        return max(
+            self.monitor.lag * 1000 / settings.admission_lag_soft_ms,
+            self.pool.waiting / settings.admission_pool_wait_soft,
+        )
+
+    def admits(self, priority: int) -> bool:
+        if priority == EXEMPT:
+            return True
+        if priority == HEAVY:
+            admitted = self.soft_pressure() < 1
+        elif priority == WRITE:
+            admitted = self.pressure() < 1
+        else:
+            admitted = self.pressure() < 2
+        if not admitted:
+            self.shed[priority] += 1
+            REQUESTS_SHED.inc(_PRIORITY_LABELS[priority])
+        return admitted
+
+    def stats(self) -> dict:
+        return {
+            "loop_lag_ms": self.monitor.lag * 1000,
+            "shed_heavy": self.shed[HEAVY],
+            "shed_writes": self.shed[WRITE],
+            "shed_reads": self.shed[READ],
+        }
+
+
+loop_lag = LoopLagMonitor()
+admission = AdmissionController(loop_lag, pool_metrics)
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.controller.admits(
+            classify(scope["method"], scope["path"])
+        ):
+            await self.app(scope, receive, send)
+            return
+        response = JSONResponse(
+            {"detail": "Server is overloaded, retry later."},
+            status_code=503,
+            headers={"Retry-After": str(settings.admission_retry_after_seconds)},
+        )
+        await response(scope, receive, send)
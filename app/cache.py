@@ -0,0 +1,182 @@
+"""Read-through cache of rendered list-plus-items payloads.
+
+`GET /lists/{id}?include=items` is read over and over during a shopping trip,
+so its rendered bytes are cached per user, list and response media type.
+Every entry is tagged with the user's revision (see `app.revisions`) at the
+time it was loaded, and only served while that revision is still current:
+any write by the user, through any route or worker, makes older entries
+misses. Mutating list and item routes also invalidate the list's entries so
+stale bytes do not hold on to memory.
+
+Concurrent misses for the same entry share one load. Storage sits behind
+`CacheBackend`; `LocalCacheBackend` is an in-process LRU bounded by bytes,
+and a shared out-of-process store can be plugged in with `set_backend` so
+workers share entries.
+"""
+import asyncio
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from .config import settings
+from .metrics import Counter, Gauge
+from .negotiation import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE
+
+_REVISION_BYTES = 8
+
+
+class _NotShareable(Exception):
+    pass
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes) -> None: ...
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None: ...
+
+    def stats(self) -> dict:
+        """Memory figures, or `None` values when the store cannot tell."""
+        return {"entries": None, "bytes": None, "max_bytes": None}
+
+
+class LocalCacheBackend(CacheBackend):
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+
+    async def get(self, key: str) -> bytes | None:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        await self.delete(key)
+        if len(value) > self.max_bytes:
+            return
+        self._entries[key] = value
+        self.bytes += len(value)
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= len(evicted)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            value = self._entries.pop(key, None)
+            if value is not None:
+                self.bytes -= len(value)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+def _pack(revision: int, body: bytes) -> bytes:
+    return revision.to_bytes(_REVISION_BYTES, "big") + body
+
+
+def _unpack(value: bytes) -> tuple[int, bytes]:
+    return int.from_bytes(value[:_REVISION_BYTES], "big"), value[_REVISION_BYTES:]
+
+
+class ListCache:
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._loading: dict[tuple[str, int], asyncio.Future] = {}
+
+    @staticmethod
+    def key(user_id: str, list_id: str, media_type: str) -> str:
+        return f"list-with-items:{user_id}:{list_id}:{media_type}"
+
+    async def get_or_load(
+        self, user_id: str, list_id: str, media_type: str, revision: int, load
+    ) -> bytes:
+        # `revision` must be read before calling this, so a write that lands
+        # during `load` leaves an entry that is already outdated.
+        key = self.key(user_id, list_id, media_type)
+        cached = await self.backend.get(key)
+        if cached is not None:
+            cached_revision, body = _unpack(cached)
+            if cached_revision == revision:
+                self.hits += 1
+                CACHE_LOOKUPS.inc("hit")
+                return body
+
+        loading = self._loading.get((key, revision))
+        if loading is not None:
+            try:
+                body = await asyncio.shield(loading)
+            except _NotShareable:
+                return await self.get_or_load(user_id, list_id, media_type, revision, load)
+            self.coalesced += 1
+            CACHE_LOOKUPS.inc("coalesced")
+            return body
+
+        self.misses += 1
+        CACHE_LOOKUPS.inc("miss")
+        loading = asyncio.get_running_loop().create_future()
+        self._loading[(key, revision)] = loading
+        try:
+            body = await load()
+            await self.backend.set(key, _pack(revision, body))
+        except Exception as exc:
+            loading.set_exception(exc)
+            # Waiters re-raise it; mark it retrieved for when there are none.
+            loading.exception()
+            raise
+        else:
+            loading.set_result(body)
+            return body
+        finally:
+            del self._loading[(key, revision)]
+            if not loading.done():
+                # The leader was cancelled, usually because its client went
+                # away. The waiters' clients did not, so they load for
+                # themselves instead of inheriting the cancellation.
+                loading.set_exception(_NotShareable())
+                loading.exception()
+
+    async def invalidate(self, user_id: str, list_id: str) -> None:
+        await self.backend.delete(
+            *(
+                self.key(user_id, list_id, media_type)
+                for media_type in (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE)
+            )
+        )
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            **self.backend.stats(),
+        }
+
+
+list_cache = ListCache(LocalCacheBackend(settings.list_cache_max_bytes))
+
+CACHE_LOOKUPS = Counter(
+    "list_cache_lookups", "List cache lookups by result.", ("result",)
+)
+Gauge(
+    "list_cache_bytes",
+    "Bytes held by the list cache; 0 for backends that do not report it.",
+    function=lambda: list_cache.backend.stats()["bytes"] or 0,
+)
+
+
+def set_backend(backend: CacheBackend) -> None:
+    list_cache.backend = backend
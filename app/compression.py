@@ -0,0 +1,158 @@
+"""Response compression negotiated from `Accept-Encoding`.
+
+Bodies below `COMPRESSION_MIN_SIZE` go out as they are, since the framing
+overhead outweighs the savings. zstd is preferred over brotli over gzip when
+the client accepts several. Large bodies are compressed in the thread pool so
+the event loop keeps serving other requests.
+
+Responses that carry an `ETag` (see `model_response(..., etag=True)`) have
+their compressed bytes kept in a small LRU keyed by ETag and encoding, so a
+client polling completed lists does not make us recompress the same body.
+Server-Sent Events are never buffered or compressed.
+"""
+import gzip
+from collections import OrderedDict
+
+import brotli
+import zstandard
+from anyio import to_thread
+from starlette.datastructures import Headers, MutableHeaders
+
+from .config import settings
+
+ENCODINGS = ("zstd", "br", "gzip")
+THREAD_POOL_MIN_SIZE = 64 * 1024
+
+
+def _zstd(body: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=3).compress(body)
+
+
+def _brotli(body: bytes) -> bytes:
+    return brotli.compress(body, quality=4)
+
+
+def _gzip(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=6)
+
+
+_COMPRESSORS = {"zstd": _zstd, "br": _brotli, "gzip": _gzip}
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    if not accept_encoding:
+        return None
+    qualities: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, *params = (piece.strip() for piece in part.split(";"))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    wildcard = qualities.get("*", 0.0)
+    accepted = [
+        encoding for encoding in ENCODINGS if qualities.get(encoding, wildcard) > 0
+    ]
+    if not accepted:
+        return None
+    return max(accepted, key=lambda encoding: qualities.get(encoding, wildcard))
+
+
+class CompressedBodyCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+
+    def get(self, etag: str, encoding: str) -> bytes | None:
+        body = self._entries.get((etag, encoding))
+        if body is not None:
+            self._entries.move_to_end((etag, encoding))
+        return body
+
+    def put(self, etag: str, encoding: str, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[(etag, encoding)] = body
+        self._entries.move_to_end((etag, encoding))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+compressed_cache = CompressedBodyCache(settings.compression_cache_size)
+
+
+async def compress(encoding: str, body: bytes) -> bytes:
+    compressor = _COMPRESSORS[encoding]
+    if len(body) < THREAD_POOL_MIN_SIZE:
+        return compressor(body)
+    return await to_thread.run_sync(compressor, body)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int | None = None):
+        self.app = app
+        self.minimum_size = (
+            settings.compression_min_size if minimum_size is None else minimum_size
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        start: dict | None = None
+        chunks: list[bytes] = []
+        passthrough = False
+
+        async def wrapped(message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.add_vary_header("Accept-Encoding")
+                content_type = headers.get("content-type", "")
+                if (
+                    encoding is None
+                    or "content-encoding" in headers
+                    or content_type.startswith("text/event-stream")
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            headers = MutableHeaders(scope=start)
+            if len(body) >= self.minimum_size and start["status"] not in (204, 304):
+                body = await self._compress(encoding, body, headers.get("etag"))
+                headers["content-encoding"] = encoding
+                headers["content-length"] = str(len(body))
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, wrapped)
+
+    async def _compress(self, encoding: str, body: bytes, etag: str | None) -> bytes:
+        if etag is None:
+            return await compress(encoding, body)
+        cached = compressed_cache.get(etag, encoding)
+        if cached is None:
+            cached = await compress(encoding, body)
+            compressed_cache.put(etag, encoding, cached)
+        return cached
@@ -15,6 +15,142 @@ class Settings(BaseSettings):
     chopin_list_fe_url: str = Field(
         alias="CHOPIN_LIST_FE_URL",
     )
+    mongo_min_pool_size: int = Field(
+        default=10,
+        alias="MONGO_MIN_POOL_SIZE",
+    )
+    mongo_max_pool_size: int = Field(
+        default=100,
+        alias="MONGO_MAX_POOL_SIZE",
+    )
+    mongo_max_idle_time_ms: int | None = Field(
+        default=300_000,
+        alias="MONGO_MAX_IDLE_TIME_MS",
+    )
+    mongo_wait_queue_timeout_ms: int | None = Field(
+        default=None,
+        alias="MONGO_WAIT_QUEUE_TIMEOUT_MS",
+    )
+    mongo_compressors: str = Field(
+        default="zstd",
+        alias="MONGO_COMPRESSORS",
+    )
+    mongo_read_preference: str = Field(
+        default="primary",
+        alias="MONGO_READ_PREFERENCE",
+    )
+    mongo_max_staleness_seconds: int = Field(
+        default=90,
+        alias="MONGO_MAX_STALENESS_SECONDS",
+    )
+    request_deadline_seconds: float = Field(
+        default=10.0,
+        alias="REQUEST_DEADLINE_SECONDS",
+    )
+    route_deadline_seconds: dict[str, float] = Field(
+        default_factory=dict,
+        alias="ROUTE_DEADLINE_SECONDS",
+    )
+    admission_lag_soft_ms: float = Field(
+        default=100.0,
+        alias="ADMISSION_LAG_SOFT_MS",
+    )
+    admission_lag_hard_ms: float = Field(
+        default=500.0,
+        alias="ADMISSION_LAG_HARD_MS",
+    )
+    admission_pool_wait_soft: int = Field(
+        default=10,
+        alias="ADMISSION_POOL_WAIT_SOFT",
+    )
+    admission_pool_wait_hard: int = Field(
+        default=50,
+        alias="ADMISSION_POOL_WAIT_HARD",
+    )
+    admission_retry_after_seconds: int = Field(
+        default=1,
+        alias="ADMISSION_RETRY_AFTER_SECONDS",
+    )
+    rate_limit_burst: int = Field(
+        default=60,
+        alias="RATE_LIMIT_BURST",
+    )
+    rate_limit_per_second: float = Field(
+        default=10.0,
+        alias="RATE_LIMIT_PER_SECOND",
+    )
+    rate_limit_backend: str = Field(
+        default="local",
+        alias="RATE_LIMIT_BACKEND",
+    )
+    metrics_dir: str | None = Field(
+        default=None,
+        alias="METRICS_DIR",
+    )
+    metrics_flush_seconds: float = Field(
+        default=5.0,
+        alias="METRICS_FLUSH_SECONDS",
+    )
+    server_timing: bool = Field(
+        default=False,
+        alias="SERVER_TIMING",
+    )
+    deletion_batch_size: int = Field(
+        default=500,
+        alias="DELETION_BATCH_SIZE",
+    )
+    deletion_batch_pause_seconds: float = Field(
+        default=0.05,
+        alias="DELETION_BATCH_PAUSE_SECONDS",
+    )
+    deletion_poll_seconds: float = Field(
+        default=5.0,
+        alias="DELETION_POLL_SECONDS",
+    )
+    deletion_lease_seconds: float = Field(
+        default=60.0,
+        alias="DELETION_LEASE_SECONDS",
+    )
+    sync_tombstone_retention_days: int = Field(
+        default=30,
+        alias="SYNC_TOMBSTONE_RETENTION_DAYS",
+    )
+    idempotency_key_ttl_hours: int = Field(
+        default=72,
+        alias="IDEMPOTENCY_KEY_TTL_HOURS",
+    )
+    idempotency_lease_seconds: float = Field(
+        default=30.0,
+        alias="IDEMPOTENCY_LEASE_SECONDS",
+    )
+    events_queue_size: int = Field(
+        default=100,
+        alias="EVENTS_QUEUE_SIZE",
+    )
+    events_heartbeat_seconds: float = Field(
+        default=15.0,
+        alias="EVENTS_HEARTBEAT_SECONDS",
+    )
+    events_change_stream: bool = Field(
+        default=False,
+        alias="EVENTS_CHANGE_STREAM",
+    )
+    server_json_projection: bool = Field(
+        default=False,
+        alias="SERVER_JSON_PROJECTION",
+    )
+    compression_min_size: int = Field(
+        default=1024,
+        alias="COMPRESSION_MIN_SIZE",
+    )
+    compression_cache_size: int = Field(
+        default=256,
+        alias="COMPRESSION_CACHE_SIZE",
+    )
+    list_cache_max_bytes: int = Field(
+        default=32 * 1024 * 1024,
+        alias="LIST_CACHE_MAX_BYTES",
+    )
 
 
 settings = Settings()
@@ -1,20 +1,58 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from fastapi import Depends
+from pymongo import AsyncMongoClient, ReadPreference
+from pymongo.read_preferences import SecondaryPreferred
 
 from .config import settings
+from .pool import client_options, warm_pool
 
 
-_client: AsyncIOMotorClient | None = None
+_client: AsyncMongoClient | None = None
 
 
-def get_client() -> AsyncIOMotorClient:
+def get_client() -> AsyncMongoClient:
     global _client
     if _client is None:
-        _client = AsyncIOMotorClient(settings.mongo_uri)
+        _client = AsyncMongoClient(settings.mongo_uri, **client_options())
     return _client
 
 
+async def connect() -> None:
+    await warm_pool(get_client(), settings.mongo_min_pool_size)
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
 def get_db():
-    return get_client()[settings.mongo_db]
+    # Pinned to the primary whatever `MONGO_READ_PREFERENCE` says: routes
+    # using this handle must see the caller's own writes.
+    return get_client().get_database(settings.mongo_db, read_preference=ReadPreference.PRIMARY)
+
+
+def stale_read_preference(max_staleness_seconds: int | None = None) -> SecondaryPreferred:
+    return SecondaryPreferred(
+        max_staleness=max_staleness_seconds or settings.mongo_max_staleness_seconds
+    )
+
+
+def tolerate_staleness(max_staleness_seconds: int | None = None):
+    """Database dependency for routes that may read slightly stale data.
+
+    Reads go to a secondary lagging at most `max_staleness_seconds` behind
+    the primary (MongoDB's minimum is 90), falling back to the primary when
+    none qualifies. Routes that must see the caller's own writes keep using
+    `get_db`.
+    """
+    read_preference = stale_read_preference(max_staleness_seconds)
+
+    def dependency(db=Depends(get_db)):
+        return db.with_options(read_preference=read_preference)
+
+    return dependency
 
 
 async def init_db() -> None:
@@ -23,6 +61,20 @@ async def init_db() -> None:
     await db.lists.create_index([("user_id", 1), ("updated_at", -1)])
     await db.items.create_index([("user_id", 1), ("list_id", 1)])
     await db.items.create_index([("list_id", 1), ("sort_order", 1)])
+    await db.items.create_index([("user_id", 1), ("updated_at", 1)])
     await db.templates.create_index([("user_id", 1), ("updated_at", -1)])
     await db.template_items.create_index([("user_id", 1), ("template_id", 1)])
     await db.template_items.create_index([("template_id", 1), ("sort_order", 1)])
+    await db.template_items.create_index([("user_id", 1), ("updated_at", 1)])
+    await db.deletion_jobs.create_index([("status", 1), ("created_at", 1)])
+    await db.tombstones.create_index([("user_id", 1), ("deleted_at", 1)])
+    await db.tombstones.create_index(
+        "deleted_at",
+        expireAfterSeconds=settings.sync_tombstone_retention_days * 24 * 60 * 60,
+    )
+    await db.idempotency_keys.create_index([("user_id", 1), ("key", 1)], unique=True)
+    await db.idempotency_keys.create_index(
+        "created_at",
+        expireAfterSeconds=settings.idempotency_key_ttl_hours * 60 * 60,
+    )
+    await db.rate_limits.create_index("expires_at", expireAfterSeconds=0)
@@ -0,0 +1,117 @@
+"""Request deadlines and cancellation on client disconnect.
+
+Every route runs under a deadline: `REQUEST_DEADLINE_SECONDS`, or the entry
+for the route's path in `ROUTE_DEADLINE_SECONDS` (`0` disables it). The
+deadline is applied with `pymongo.timeout`, so each database call in the
+handler sends the remaining time as `maxTimeMS` and waits no longer than that
+for a pool connection. When it runs out the request fails with `504`.
+
+`DisconnectMiddleware` cancels `GET` and `HEAD` handlers as soon as the client
+goes away, so abandoned reads stop holding pool connections. Writes are left
+to finish so they are never cut off half-way.
+"""
+import asyncio
+
+import pymongo
+from fastapi import Request
+from pymongo.errors import PyMongoError
+
+from .config import settings
+from .metrics import Counter
+from .negotiation import encoded_response
+
+_CANCELLABLE_METHODS = {"GET", "HEAD"}
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.deadline_exceeded = 0
+        self.client_disconnects = 0
+
+    def stats(self) -> dict:
+        return {
+            "deadline_exceeded": self.deadline_exceeded,
+            "client_disconnects": self.client_disconnects,
+        }
+
+
+request_metrics = RequestMetrics()
+
+DEADLINE_EXCEEDED = Counter(
+    "http_deadline_exceeded", "Requests that failed because their deadline ran out."
+)
+CLIENT_DISCONNECTS = Counter(
+    "http_client_disconnects", "Read handlers cancelled because the client went away."
+)
+
+
+def route_deadline(path: str | None) -> float | None:
+    seconds = settings.route_deadline_seconds.get(path, settings.request_deadline_seconds)
+    return seconds or None
+
+
+async def apply_deadline(request: Request):
+    route = request.scope.get("route")
+    with pymongo.timeout(route_deadline(getattr(route, "path", None))):
+        yield
+
+
+async def deadline_exceeded_handler(request: Request, exc: PyMongoError):
+    if not exc.timeout:
+        raise exc
+    request_metrics.deadline_exceeded += 1
+    DEADLINE_EXCEEDED.inc()
+    return encoded_response({"detail": "Request deadline exceeded."}, status_code=504)
+
+
+class DisconnectMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in _CANCELLABLE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        # The handler reads request messages from a queue fed by a watcher,
+        # which is the only reader of the real `receive`. Once the final body
+        # is on its way, a disconnect only means the response is done: it is
+        # passed on but no longer cancels the handler, so teardown (yield
+        # dependencies, background tasks) runs to completion.
+        messages: asyncio.Queue = asyncio.Queue()
+        response_complete = False
+        disconnected = False
+
+        async def tracking_send(message):
+            nonlocal response_complete
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                # Set before sending: the server may report the disconnect
+                # while the final body is still being written.
+                response_complete = True
+            await send(message)
+
+        handler = asyncio.ensure_future(self.app(scope, messages.get, tracking_send))
+
+        async def watch():
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    if not response_complete and not handler.done():
+                        disconnected = True
+                        request_metrics.client_disconnects += 1
+                        CLIENT_DISCONNECTS.inc()
+                        handler.cancel()
+                    return
+
+        watcher = asyncio.ensure_future(watch())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            if not disconnected:
+                raise
+        finally:
+            watcher.cancel()
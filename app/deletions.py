@@ -0,0 +1,217 @@
+"""Background removal of tombstoned parents and their children.
+
+Delete routes only tombstone the parent (`deleted_at`) and enqueue a job in
+`deletion_jobs`. The worker started in `lifespan` drains jobs in `_id`-ordered
+batches, persisting its position after every batch so a restart resumes where
+it stopped instead of rescanning.
+
+Workers claim a job atomically by marking it `running` with their id and a
+lease of `DELETION_LEASE_SECONDS`, renewed after every batch, so each job is
+worked on by one worker at a time. A job whose lease runs out, because its
+worker died or stalled, is taken over by the next worker that looks; the
+stalled worker notices at its next batch and stops.
+"""
+import asyncio
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from .config import settings
+from .utils import utcnow
+
+logger = logging.getLogger(__name__)
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Children are removed first and the parent last, so a job interrupted midway
+# still has a tombstoned parent that keeps the remaining children hidden.
+_CASCADES = {
+    "list": [("items", "list_id"), ("lists", "_id")],
+    "template": [("template_items", "template_id"), ("templates", "_id")],
+    "user": [
+        ("items", "user_id"),
+        ("lists", "user_id"),
+        ("template_items", "user_id"),
+        ("templates", "user_id"),
+        ("users", "_id"),
+    ],
+}
+
+
+def _children_filter(job: dict, field: str) -> dict:
+    if job["kind"] == "user":
+        return {"user_id": job["parent_id"]}
+    return {field: job["parent_id"], "user_id": job["user_id"]}
+
+
+async def enqueue_deletion(db, kind: str, parent_id: str, user_id: str | None) -> None:
+    now = utcnow()
+    await db.deletion_jobs.insert_one(
+        {
+            "kind": kind,
+            "parent_id": parent_id,
+            "user_id": user_id,
+            "status": JOB_PENDING,
+            "step": 0,
+            "last_id": None,
+            "deleted": {},
+            "created_at": now,
+            "updated_at": now,
+        }
+    )
+
+
+async def record_tombstone(db, collection: str, doc_id: str, user_id: str) -> None:
+    """Remember a delete so `GET /sync` can report it to offline clients."""
+    await record_tombstones(db, collection, [doc_id], user_id)
+
+
+async def record_tombstones(
+    db, collection: str, doc_ids: list[str], user_id: str
+) -> None:
+    if not doc_ids:
+        return
+    now = utcnow()
+    await db.tombstones.insert_many(
+        [
+            {
+                "user_id": user_id,
+                "collection": collection,
+                "doc_id": doc_id,
+                "deleted_at": now,
+            }
+            for doc_id in doc_ids
+        ]
+    )
+
+
+async def tombstone(db, collection: str, parent_filter: dict) -> bool:
+    """Mark a parent as deleted; returns False if it was missing or already gone."""
+    parent_filter = {**parent_filter, "deleted_at": None}
+    result = await db[collection].update_one(
+        parent_filter, {"$set": {"deleted_at": utcnow()}}
+    )
+    return result.modified_count == 1
+
+
+async def _delete_batch(db, job: dict, collection: str, field: str, batch_size: int):
+    if field == "_id":
+        result = await db[collection].delete_one({"_id": ObjectId(job["parent_id"])})
+        return result.deleted_count, None, True
+
+    query = _children_filter(job, field)
+    if job.get("last_id") is not None:
+        query["_id"] = {"$gt": job["last_id"]}
+    cursor = db[collection].find(query, {"_id": 1}).sort("_id", 1).limit(batch_size)
+    ids = [doc["_id"] for doc in await cursor.to_list(length=batch_size)]
+    if not ids:
+        return 0, None, True
+    result = await db[collection].delete_many({"_id": {"$in": ids}})
+    return result.deleted_count, ids[-1], len(ids) < batch_size
+
+
+def _lease_expiry():
+    return utcnow() + timedelta(seconds=settings.deletion_lease_seconds)
+
+
+async def _claim_job(db, owner: str) -> dict | None:
+    now = utcnow()
+    return await db.deletion_jobs.find_one_and_update(
+        {
+            "$or": [
+                {"status": JOB_PENDING},
+                {"status": JOB_RUNNING, "lease_expires_at": {"$lt": now}},
+            ]
+        },
+        {
+            "$set": {
+                "status": JOB_RUNNING,
+                "owner": owner,
+                "lease_expires_at": _lease_expiry(),
+                "updated_at": now,
+            }
+        },
+        sort=[("created_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _process_job(
+    db, job: dict, owner: str, batch_size: int, pause_seconds: float
+) -> bool:
+    """Run a claimed job to completion; returns False if its lease was lost."""
+    steps = _CASCADES[job["kind"]]
+    owned = {"_id": job["_id"], "owner": owner}
+    while job["step"] < len(steps):
+        collection, field = steps[job["step"]]
+        deleted_count, last_id, step_done = await _delete_batch(
+            db, job, collection, field, batch_size
+        )
+        if step_done:
+            job["step"] += 1
+            last_id = None
+        job["last_id"] = last_id
+        result = await db.deletion_jobs.update_one(
+            owned,
+            {
+                "$set": {
+                    "step": job["step"],
+                    "last_id": last_id,
+                    "lease_expires_at": _lease_expiry(),
+                    "updated_at": utcnow(),
+                },
+                "$inc": {f"deleted.{collection}": deleted_count},
+            },
+        )
+        if result.matched_count == 0:
+            logger.warning("Lost the lease on deletion job %s; stopping.", job["_id"])
+            return False
+        if pause_seconds:
+            await asyncio.sleep(pause_seconds)
+
+    result = await db.deletion_jobs.update_one(
+        owned,
+        {
+            "$set": {"status": JOB_DONE, "updated_at": utcnow()},
+            "$unset": {"owner": "", "lease_expires_at": ""},
+        },
+    )
+    return result.matched_count == 1
+
+
+async def run_pending_deletions(
+    db,
+    batch_size: int | None = None,
+    pause_seconds: float | None = None,
+    owner: str = WORKER_ID,
+) -> int:
+    """Drain every claimable job and return how many this worker completed."""
+    batch_size = batch_size or settings.deletion_batch_size
+    if pause_seconds is None:
+        pause_seconds = settings.deletion_batch_pause_seconds
+    processed = 0
+    while True:
+        job = await _claim_job(db, owner)
+        if job is None:
+            return processed
+        if await _process_job(db, job, owner, batch_size, pause_seconds):
+            processed += 1
+
+
+async def run_deletion_worker(db) -> None:
+    while True:
+        try:
+            await run_pending_deletions(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Deletion worker failed; retrying.")
+        await asyncio.sleep(settings.deletion_poll_seconds)
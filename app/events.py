@@ -0,0 +1,172 @@
+"""In-process publish/subscribe for realtime list updates.
+
+Routers publish after each mutation and `GET /lists/{id}/events` streams the
+events of one list as Server-Sent Events. Every subscriber owns a bounded
+queue; a subscriber that falls behind is dropped instead of slowing down
+publishers, and its stream ends with a `reset` event so the client refetches.
+
+With several workers, set `EVENTS_CHANGE_STREAM=true`: routers then stop
+publishing locally and `run_change_stream_relay` feeds every worker's bus from
+MongoDB change streams (requires a replica set). The relay also wakes
+`GET /me/revision` waiters for revisions bumped on other workers.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+from fastapi.encoders import jsonable_encoder
+
+from .config import settings
+from .revisions import notifier
+from .utils import serialize_doc
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, topic: str, queue_size: int):
+        self.topic = topic
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+
+class EventBus:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscriptions: dict[str, set[Subscription]] = defaultdict(set)
+
+    def subscribe(self, topic: str) -> Subscription:
+        subscription = Subscription(topic, self.queue_size)
+        self._subscriptions[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscriptions.get(subscription.topic)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscriptions[subscription.topic]
+
+    def subscriber_count(self, topic: str) -> int:
+        return len(self._subscriptions.get(topic, ()))
+
+    def publish(self, topic: str, event: dict) -> None:
+        for subscription in list(self._subscriptions.get(topic, ())):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription) -> None:
+        # Discard the backlog so the stream can tell the client to refetch
+        # right away instead of replaying stale events first.
+        subscription.dropped = True
+        self.unsubscribe(subscription)
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait({"type": "reset"})
+
+
+bus = EventBus(queue_size=settings.events_queue_size)
+
+
+def list_topic(list_id: str) -> str:
+    return f"list:{list_id}"
+
+
+def publish_list_event(list_id: str, event_type: str, data: dict | None = None) -> None:
+    if settings.events_change_stream:
+        return
+    event = {"type": event_type, "list_id": list_id, "data": data}
+    bus.publish(list_topic(list_id), event)
+
+
+def format_sse(event: dict) -> str:
+    payload = json.dumps(jsonable_encoder(event), separators=(",", ":"))
+    return f"event: {event['type']}\ndata: {payload}\n\n"
+
+
+async def event_stream(
+    topic: str, is_disconnected, heartbeat_seconds: float, event_bus: EventBus = bus
+):
+    # Subscribing here rather than in the route means a response that never
+    # starts streaming never holds a subscription.
+    subscription = event_bus.subscribe(topic)
+    try:
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=heartbeat_seconds
+                )
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    return
+                yield ": heartbeat\n\n"
+                continue
+            yield format_sse(event)
+            if subscription.dropped and event["type"] == "reset":
+                return
+    finally:
+        event_bus.unsubscribe(subscription)
+
+
+_CHANGE_TYPES = {
+    ("items", "insert"): "item.created",
+    ("items", "update"): "item.updated",
+    ("items", "replace"): "item.updated",
+    ("items", "delete"): "item.deleted",
+    ("lists", "update"): "list.updated",
+    ("lists", "replace"): "list.updated",
+    ("lists", "delete"): "list.deleted",
+}
+
+
+def _event_from_change(change: dict) -> tuple[str, dict] | None:
+    collection = change["ns"]["coll"]
+    event_type = _CHANGE_TYPES.get((collection, change["operationType"]))
+    if event_type is None:
+        return None
+    # Deletes only carry the document if pre-images are enabled on the collection.
+    doc = change.get("fullDocument") or change.get("fullDocumentBeforeChange")
+    if collection == "lists":
+        list_id = str(change["documentKey"]["_id"])
+        if doc and doc.get("deleted_at"):
+            event_type = "list.deleted"
+    elif doc:
+        list_id = doc["list_id"]
+    else:
+        return None
+    if event_type in {"item.deleted", "list.deleted"}:
+        data = {"id": str(change["documentKey"]["_id"])}
+    else:
+        data = serialize_doc(doc) if doc else None
+    return list_id, {"type": event_type, "list_id": list_id, "data": data}
+
+
+async def run_change_stream_relay(db) -> None:
+    pipeline = [{"$match": {"ns.coll": {"$in": ["items", "lists", "revisions"]}}}]
+    while True:
+        try:
+            async with await db.watch(
+                pipeline,
+                full_document="updateLookup",
+                full_document_before_change="whenAvailable",
+            ) as stream:
+                async for change in stream:
+                    if change["ns"]["coll"] == "revisions":
+                        revision = (change.get("fullDocument") or {}).get("revision")
+                        if revision is not None:
+                            user_id = change["documentKey"]["_id"]
+                            await notifier.notify(user_id, revision)
+                        continue
+                    relayed = _event_from_change(change)
+                    if relayed is not None:
+                        list_id, event = relayed
+                        bus.publish(list_topic(list_id), event)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Change stream relay failed; reconnecting.")
+            await asyncio.sleep(1)
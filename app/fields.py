@@ -0,0 +1,112 @@
+"""Response shaping for read endpoints: `?fields=` and `?include=items`.
+
+The selected fields are validated against the route's response model, pushed
+down to Mongo as a projection and rendered without model validation, since
+a sparse document cannot satisfy the model's required fields.
+
+`?include=items` embeds each parent's items, read in the same aggregation
+through a `$lookup` with a sorted sub-pipeline.
+"""
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+
+from .negotiation import encoded_response
+from .utils import serialize_doc
+
+FIELDS_DESCRIPTION = (
+    "Comma-separated response fields to return, e.g. `id,name`. "
+    "Omit for the full response."
+)
+INCLUDE_DESCRIPTION = "Set to `items` to embed the items of each document."
+INCLUDABLE = {"items"}
+CHILD_SORT = {"sort_order": 1, "created_at": 1}
+
+
+def select_fields(fields: str | None, model: type[BaseModel]) -> list[str] | None:
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    if not requested:
+        raise HTTPException(status_code=400, detail="No fields requested.")
+    unknown = sorted(requested - set(model.model_fields))
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(unknown)}."
+        )
+    # Keep the schema's field order so responses are stable.
+    return [name for name in model.model_fields if name in requested]
+
+
+def field_projection(selected: list[str]) -> dict:
+    projection = {"_id": 1}
+    for name in selected:
+        if name != "id":
+            projection[name] = 1
+    return projection
+
+
+def _sparse_doc(model: type[BaseModel], doc: dict, selected: list[str]) -> dict:
+    sparse = {}
+    for name in selected:
+        if name in doc:
+            sparse[name] = doc[name]
+        else:
+            field = model.model_fields[name]
+            if field.is_required():
+                sparse[name] = None
+            else:
+                sparse[name] = field.get_default(call_default_factory=True)
+    return sparse
+
+
+def sparse_response(model: type[BaseModel], content, selected: list[str]) -> Response:
+    if isinstance(content, list):
+        body = [_sparse_doc(model, doc, selected) for doc in content]
+    else:
+        body = _sparse_doc(model, content, selected)
+    return encoded_response(body)
+
+
+def include_items(include: str | None, fields: str | None = None) -> bool:
+    if include is None:
+        return False
+    requested = {name.strip() for name in include.split(",") if name.strip()}
+    unknown = sorted(requested - INCLUDABLE)
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown include: {', '.join(unknown)}."
+        )
+    if requested and fields is not None:
+        raise HTTPException(
+            status_code=400, detail="`fields` cannot be combined with `include`."
+        )
+    return "items" in requested
+
+
+def with_items_pipeline(
+    match: dict, sort: dict, child_collection: str, parent_field: str, user_id: str
+) -> list[dict]:
+    # Children store the parent id as a string, so expose it as one for the
+    # equality join; the sub-pipeline then filters by owner and sorts.
+    return [
+        {"$match": match},
+        {"$sort": sort},
+        {"$addFields": {"_parent_id": {"$toString": "$_id"}}},
+        {
+            "$lookup": {
+                "from": child_collection,
+                "localField": "_parent_id",
+                "foreignField": parent_field,
+                "pipeline": [{"$match": {"user_id": user_id}}, {"$sort": CHILD_SORT}],
+                "as": "items",
+            }
+        },
+        {"$addFields": {"items_count": {"$size": "$items"}}},
+        {"$project": {"_parent_id": 0}},
+    ]
+
+
+def serialize_with_items(doc: dict) -> dict:
+    response = serialize_doc(doc)
+    response["items"] = [serialize_doc(item) for item in response["items"]]
+    return response
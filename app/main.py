@@ -1,19 +1,72 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from pymongo.errors import PyMongoError
+from starlette.exceptions import HTTPException
 
+from .admission import AdmissionMiddleware, loop_lag
+from .compression import CompressionMiddleware
 from .config import settings
-from .db import init_db
-from .routers import items, lists, templates, users
+from .deadlines import DisconnectMiddleware, apply_deadline, deadline_exceeded_handler
+from .db import close_client, connect, get_db, init_db
+from .deletions import run_deletion_worker
+from .events import run_change_stream_relay
+from .metrics import MetricsMiddleware, metrics_response, record_route, run_metrics_flusher
+from .negotiation import (
+    MsgPackMiddleware,
+    NegotiatedResponse,
+    http_exception_handler,
+    validation_exception_handler,
+)
+from .ratelimit import RateLimitHeadersMiddleware
+from .routers import batch, items, lists, sync, templates, users
+from .singleflight import SingleFlightMiddleware
+from .timing import ServerTimingMiddleware
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    await connect()
     await init_db()
+    background_tasks = [
+        asyncio.create_task(run_deletion_worker(get_db())),
+        asyncio.create_task(loop_lag.run()),
+    ]
+    if settings.events_change_stream:
+        background_tasks.append(asyncio.create_task(run_change_stream_relay(get_db())))
+    if settings.metrics_dir:
+        background_tasks.append(
+            asyncio.create_task(run_metrics_flusher(settings.metrics_dir))
+        )
     yield
+    for task in background_tasks:
+        task.cancel()
+    for task in background_tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+    await close_client()
 
 
-app = FastAPI(title="Shoplist API", version="1.0.0", lifespan=lifespan)
+app = FastAPI(
+    title="Shoplist API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=NegotiatedResponse,
+    dependencies=[Depends(record_route), Depends(apply_deadline)],
+)
+app.add_exception_handler(HTTPException, http_exception_handler)
+app.add_exception_handler(RequestValidationError, validation_exception_handler)
+app.add_exception_handler(PyMongoError, deadline_exceeded_handler)
+app.add_middleware(RateLimitHeadersMiddleware)
+app.add_middleware(SingleFlightMiddleware)
+app.add_middleware(MsgPackMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(DisconnectMiddleware)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[settings.chopin_list_fe_url],
@@ -28,7 +81,14 @@ async def root():
     return {"status": "ok"}
 
 
+@app.get("/metrics", tags=["meta"], include_in_schema=False)
+async def metrics():
+    return await metrics_response()
+
+
 app.include_router(users.router)
 app.include_router(lists.router)
 app.include_router(items.router)
 app.include_router(templates.router)
+app.include_router(sync.router)
+app.include_router(batch.router)
@@ -0,0 +1,323 @@
+"""Prometheus metrics.
+
+Metrics are plain dictionaries keyed by label values. Everything that
+records them runs on the event loop thread, so updates need no locks and
+cost a dictionary lookup and an addition. `GET /metrics` renders the
+registry in the Prometheus text format.
+
+With several uvicorn workers, set `METRICS_DIR` to a directory shared by
+them. Each worker writes a snapshot of its metrics there every
+`METRICS_FLUSH_SECONDS` and when it scrapes, and a scrape merges all
+snapshots: counters and histograms are summed across every worker that ever
+wrote one, gauges only across workers that are still alive. Snapshots are
+taken on the event loop; the file I/O and JSON work run in a thread.
+"""
+import asyncio
+import bisect
+import json
+import os
+import time
+from pathlib import Path
+
+from fastapi import Request
+from fastapi.responses import PlainTextResponse
+from pymongo import monitoring
+
+from .config import settings
+from .timing import record_db_command
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROUTE_STATE_KEY = "route_template"
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, "_Metric"] = {}
+
+    def register(self, metric: "_Metric") -> None:
+        self.metrics[metric.name] = metric
+
+    def snapshot(self) -> dict:
+        return {
+            name: {
+                "type": metric.type,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", ())),
+                "values": [
+                    # Histogram values are lists updated in place; copy them
+                    # so the snapshot can be serialized off the event loop.
+                    [list(labels), list(value) if isinstance(value, list) else value]
+                    for labels, value in metric.collect()
+                ],
+            }
+            for name, metric in self.metrics.items()
+        }
+
+
+registry = Registry()
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, object] = {}
+        registry.register(self)
+
+    def collect(self):
+        return self._values.items()
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) - amount
+
+    def collect(self):
+        if self.function is not None:
+            return [((), float(self.function()))]
+        return self._values.items()
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str) -> None:
+        # Per-bucket counts, then sum and count; cumulated when rendered.
+        values = self._values.get(labels)
+        if values is None:
+            values = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def render(snapshot: dict) -> str:
+    lines = []
+    for name, metric in snapshot.items():
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        labelnames = metric["labelnames"]
+        for labels, value in metric["values"]:
+            label_text = _format_labels(labelnames, labels)
+            if metric["type"] == "counter":
+                lines.append(f"{name}_total{label_text} {_format_value(value)}")
+            elif metric["type"] == "gauge":
+                lines.append(f"{name}{label_text} {_format_value(value)}")
+            else:
+                cumulative = 0
+                bounds = [*metric["buckets"], float("inf")]
+                for bound, count in zip(bounds, value[: len(bounds)]):
+                    cumulative += count
+                    le = (("le", _format_value(bound)),)
+                    lines.append(
+                        f"{name}_bucket{_format_labels(labelnames, labels, le)} {cumulative}"
+                    )
+                lines.append(f"{name}_sum{label_text} {_format_value(value[-2])}")
+                lines.append(f"{name}_count{label_text} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def merge(snapshots: list[tuple[dict, bool]]) -> dict:
+    """Combine `(snapshot, alive)` pairs from several workers into one."""
+    merged: dict[str, dict] = {}
+    for snapshot, alive in snapshots:
+        for name, metric in snapshot.items():
+            if metric["type"] == "gauge" and not alive:
+                continue
+            target = merged.setdefault(name, {**metric, "values": {}})
+            for labels, value in metric["values"]:
+                key = tuple(labels)
+                current = target["values"].get(key)
+                if current is None:
+                    target["values"][key] = value
+                elif metric["type"] == "histogram":
+                    target["values"][key] = [a + b for a, b in zip(current, value)]
+                else:
+                    target["values"][key] = current + value
+    for metric in merged.values():
+        metric["values"] = [[list(labels), value] for labels, value in metric["values"].items()]
+    return merged
+
+
+def _snapshot_path(directory: str, pid: int) -> Path:
+    return Path(directory) / f"metrics-{pid}.json"
+
+
+def write_snapshot(directory: str, snapshot: dict) -> None:
+    path = _snapshot_path(directory, os.getpid())
+    temporary = path.with_suffix(".tmp")
+    temporary.write_text(json.dumps(snapshot))
+    os.replace(temporary, path)
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_snapshots(directory: str) -> list[tuple[dict, bool]]:
+    snapshots = []
+    for path in Path(directory).glob("metrics-*.json"):
+        pid = int(path.stem.removeprefix("metrics-"))
+        snapshots.append((json.loads(path.read_text()), _is_alive(pid)))
+    return snapshots
+
+
+def _write_and_merge(directory: str, snapshot: dict) -> dict:
+    write_snapshot(directory, snapshot)
+    return merge(read_snapshots(directory))
+
+
+async def run_metrics_flusher(directory: str) -> None:
+    try:
+        while True:
+            await asyncio.to_thread(write_snapshot, directory, registry.snapshot())
+            await asyncio.sleep(settings.metrics_flush_seconds)
+    finally:
+        await asyncio.to_thread(write_snapshot, directory, registry.snapshot())
+
+
+async def metrics_response() -> PlainTextResponse:
+    snapshot = registry.snapshot()
+    if settings.metrics_dir:
+        snapshot = await asyncio.to_thread(_write_and_merge, settings.metrics_dir, snapshot)
+    return PlainTextResponse(render(snapshot), media_type=CONTENT_TYPE)
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status.",
+    ("method", "route", "status"),
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served.")
+MONGO_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency by collection and command.",
+    ("collection", "command"),
+)
+MONGO_COMMAND_FAILURES = Counter(
+    "mongodb_command_failures",
+    "Failed MongoDB commands by collection and command.",
+    ("collection", "command"),
+)
+AUTH_VERIFICATION_DURATION = Histogram(
+    "auth_token_verification_seconds",
+    "Google ID token verification time by result.",
+    ("result",),
+)
+
+
+async def record_route(request: Request):
+    route = request.scope.get("route")
+    if route is not None:
+        request.scope.setdefault("state", {})[ROUTE_STATE_KEY] = route.path
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        state = scope.setdefault("state", {})
+        status = 500
+
+        async def wrapped(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, wrapped)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                scope["method"],
+                state.get(ROUTE_STATE_KEY, UNMATCHED_ROUTE),
+                str(status),
+            )
+
+
+class CommandMetrics(monitoring.CommandListener):
+    def __init__(self):
+        self._collections: dict[int, str] = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        self._collections[event.request_id] = (
+            collection if isinstance(collection, str) else ""
+        )
+
+    def _collection(self, event) -> str:
+        return self._collections.pop(event.request_id, "")
+
+    def succeeded(self, event):
+        seconds = event.duration_micros / 1_000_000
+        MONGO_COMMAND_DURATION.observe(seconds, self._collection(event), event.command_name)
+        record_db_command(seconds)
+
+    def failed(self, event):
+        seconds = event.duration_micros / 1_000_000
+        collection = self._collection(event)
+        MONGO_COMMAND_DURATION.observe(seconds, collection, event.command_name)
+        MONGO_COMMAND_FAILURES.inc(collection, event.command_name)
+        record_db_command(seconds)
+
+
+command_metrics = CommandMetrics()
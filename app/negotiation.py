@@ -0,0 +1,183 @@
+"""MessagePack content negotiation.
+
+Clients opt in with `Accept: application/msgpack` and may send request bodies
+as `Content-Type: application/msgpack`; JSON stays the default. The middleware
+records the negotiated format for the request. Routers use `NegotiatedRoute`,
+which unpacks MessagePack bodies straight into the objects the body model
+validates, and the app's default response class is `NegotiatedResponse`,
+which packs what FastAPI serialized from the `response_model` for routes that
+return plain content. Responses rendered in `app.responses`, `app.fields` and
+`app.bson_json`, and errors through the exception handlers below, are encoded
+straight from their content. Nothing is transcoded from rendered JSON.
+Datetimes are sent as the same ISO-8601 strings as in JSON.
+"""
+from contextvars import ContextVar
+
+import msgpack
+import pydantic_core
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.exception_handlers import http_exception_handler as default_http_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from fastapi.utils import is_body_allowed_for_status_code
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from .timing import measure
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+_response_media_type: ContextVar[str] = ContextVar(
+    "response_media_type", default=JSON_MEDIA_TYPE
+)
+
+
+def _media_ranges(accept: str) -> dict[str, float]:
+    ranges: dict[str, float] = {}
+    for part in accept.split(","):
+        media_type, *params = (piece.strip() for piece in part.split(";"))
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges[media_type.lower()] = quality
+    return ranges
+
+
+def accepts_msgpack(accept: str | None) -> bool:
+    # Only an explicit `application/msgpack` opts in; wildcards keep JSON.
+    if not accept:
+        return False
+    ranges = _media_ranges(accept)
+    quality = ranges.get(MSGPACK_MEDIA_TYPE, 0.0)
+    return quality > 0 and quality >= ranges.get(JSON_MEDIA_TYPE, 0.0)
+
+
+def response_media_type() -> str:
+    return _response_media_type.get()
+
+
+def wants_msgpack() -> bool:
+    return _response_media_type.get() == MSGPACK_MEDIA_TYPE
+
+
+def pack(content) -> bytes:
+    return msgpack.packb(pydantic_core.to_jsonable_python(content))
+
+
+def encoded_response(
+    content, status_code: int = 200, headers: dict | None = None
+) -> Response:
+    """Render JSON-compatible content in the negotiated format."""
+    with measure("serialize"):
+        if wants_msgpack():
+            body, media_type = pack(content), MSGPACK_MEDIA_TYPE
+        else:
+            body, media_type = pydantic_core.to_json(content), JSON_MEDIA_TYPE
+    return Response(
+        content=body, status_code=status_code, media_type=media_type, headers=headers
+    )
+
+
+def _is_media_type(content_type: str | None, media_type: str) -> bool:
+    return bool(content_type) and content_type.split(";")[0].strip().lower() == media_type
+
+
+class NegotiatedResponse(JSONResponse):
+    """Default response class: renders the content FastAPI serialized from the
+    response model as JSON, or packs it when MessagePack was negotiated."""
+
+    def __init__(
+        self, content, status_code=200, headers=None, media_type=None, background=None
+    ):
+        if media_type is None and wants_msgpack():
+            media_type = MSGPACK_MEDIA_TYPE
+        super().__init__(content, status_code, headers, media_type, background)
+
+    def render(self, content) -> bytes:
+        with measure("serialize"):
+            if self.media_type == MSGPACK_MEDIA_TYPE:
+                return msgpack.packb(content)
+            return pydantic_core.to_json(content)
+
+
+class _MsgPackRequest(Request):
+    # FastAPI only hands `json()` to the body model for JSON content types, so
+    # the body is presented as one while `json()` unpacks the MessagePack.
+    def __init__(self, scope, receive):
+        super().__init__(scope, receive)
+        self._headers = MutableHeaders(raw=list(scope["headers"]))
+        self._headers["content-type"] = JSON_MEDIA_TYPE
+
+    async def json(self):
+        if not hasattr(self, "_json"):
+            try:
+                self._json = msgpack.unpackb(await self.body())
+            except (ValueError, msgpack.UnpackException) as exc:
+                raise HTTPException(
+                    status_code=400, detail="Invalid MessagePack body."
+                ) from exc
+        return self._json
+
+
+class NegotiatedRoute(APIRoute):
+    """Validates MessagePack request bodies without a JSON round trip."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            if _is_media_type(request.headers.get("content-type"), MSGPACK_MEDIA_TYPE):
+                request = _MsgPackRequest(request.scope, request.receive)
+            return await handler(request)
+
+        return route_handler
+
+
+async def http_exception_handler(request: Request, exc: StarletteHTTPException):
+    if not wants_msgpack() or not is_body_allowed_for_status_code(exc.status_code):
+        return await default_http_handler(request, exc)
+    return encoded_response(
+        {"detail": exc.detail}, exc.status_code, getattr(exc, "headers", None)
+    )
+
+
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    return encoded_response({"detail": jsonable_encoder(exc.errors())}, 422)
+
+
+class MsgPackMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        send = _vary_on_accept(send)
+        if not accepts_msgpack(Headers(scope=scope).get("accept")):
+            await self.app(scope, receive, send)
+            return
+        token = _response_media_type.set(MSGPACK_MEDIA_TYPE)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _response_media_type.reset(token)
+
+
+def _vary_on_accept(send):
+    async def wrapped(message):
+        if message["type"] == "http.response.start":
+            MutableHeaders(scope=message).add_vary_header("Accept")
+        await send(message)
+
+    return wrapped
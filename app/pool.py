@@ -0,0 +1,151 @@
+"""Connection pool profile, warm-up and metrics.
+
+`client_options` turns the `MONGO_*` pool settings into `AsyncMongoClient`
+keyword arguments. `warm_pool` runs `minPoolSize` pings at once at startup so
+the first burst of traffic after a deploy pays for fewer connection setups
+and TLS handshakes. It is best effort: the driver opens at most
+`maxConnecting` connections at a time and pings that finish early hand
+theirs back, so it can return before the pool has reached `minPoolSize`. The
+driver's background maintenance fills the rest.
+
+`PoolMetrics` is a CMAP listener registered on the app's client. It tracks
+how many connections are open, checked out and waited for, and how long
+checkouts waited for a connection; `GET /me/admin/pool` reports the figures
+and `GET /metrics` exports them.
+"""
+import asyncio
+from collections import deque
+
+from pymongo import monitoring
+
+from .config import settings
+from .metrics import Gauge, Histogram, command_metrics
+
+_RECENT_WAITS = 1024
+
+
+def client_options() -> dict:
+    options = {
+        "minPoolSize": settings.mongo_min_pool_size,
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "readPreference": settings.mongo_read_preference,
+        "event_listeners": [pool_metrics, command_metrics],
+    }
+    if settings.mongo_max_idle_time_ms is not None:
+        options["maxIdleTimeMS"] = settings.mongo_max_idle_time_ms
+    if settings.mongo_wait_queue_timeout_ms is not None:
+        options["waitQueueTimeoutMS"] = settings.mongo_wait_queue_timeout_ms
+    if settings.mongo_compressors:
+        options["compressors"] = settings.mongo_compressors
+    return options
+
+
+async def warm_pool(client, size: int) -> None:
+    # Concurrent pings make the driver open new connections rather than queue
+    # on one, but pings may reuse connections released by earlier ones, so
+    # this does not guarantee `size` open connections.
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(size)))
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    def __init__(self):
+        self.open = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._recent_waits: deque[float] = deque(maxlen=_RECENT_WAITS)
+
+    def _record_wait(self, seconds: float) -> None:
+        self.waiting = max(0, self.waiting - 1)
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        self._recent_waits.append(seconds)
+        CHECKOUT_WAIT.observe(seconds)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.open += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.open = max(0, self.open - 1)
+
+    def connection_check_out_started(self, event):
+        self.waiting += 1
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+        self._record_wait(event.duration)
+
+    def connection_checked_out(self, event):
+        self.checkouts += 1
+        self.in_use += 1
+        self._record_wait(event.duration)
+
+    def connection_checked_in(self, event):
+        self.in_use = max(0, self.in_use - 1)
+
+    def stats(self) -> dict:
+        recent = list(self._recent_waits)
+        return {
+            "open": self.open,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "max_pool_size": settings.mongo_max_pool_size,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "pool_clears": self.pool_clears,
+            "wait_ms_avg": (
+                self.wait_seconds_total / (self.checkouts + self.checkout_failures) * 1000
+                if self.checkouts + self.checkout_failures
+                else 0.0
+            ),
+            "wait_ms_p99": _percentile(recent, 0.99) * 1000,
+            "wait_ms_max": self.wait_seconds_max * 1000,
+        }
+
+
+pool_metrics = PoolMetrics()
+
+CHECKOUT_WAIT = Histogram(
+    "mongodb_pool_checkout_wait_seconds", "Time spent waiting for a pool connection."
+)
+Gauge(
+    "mongodb_pool_connections_open",
+    "Open pool connections.",
+    function=lambda: pool_metrics.open,
+)
+Gauge(
+    "mongodb_pool_connections_in_use",
+    "Pool connections checked out.",
+    function=lambda: pool_metrics.in_use,
+)
+Gauge(
+    "mongodb_pool_checkouts_waiting",
+    "Requests waiting for a pool connection.",
+    function=lambda: pool_metrics.waiting,
+)
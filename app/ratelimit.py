@@ -0,0 +1,167 @@
+"""Per-user rate limiting with token buckets.
+
+Each authenticated user has a bucket of `RATE_LIMIT_BURST` tokens refilled at
+`RATE_LIMIT_PER_SECOND`. Every request spends tokens by route: reads cost 1,
+writes 2, and the expensive reorder and create-from-template calls 10. A
+request that finds too few tokens gets `429` with `Retry-After`; every
+response of a limited route carries `RateLimit-Limit`, `RateLimit-Remaining`
+and `RateLimit-Reset` (seconds until the bucket is full again).
+
+`LocalRateLimitBackend` keeps one `(tokens, updated_at)` pair per user and
+drops buckets once they have been idle long enough to be full, since a full
+bucket and a missing one are the same. With several workers, set
+`RATE_LIMIT_BACKEND=mongo` to count in MongoDB instead: the shared backend
+allows `RATE_LIMIT_BURST` tokens per refill window, a fixed-window
+approximation of the bucket. Only requests that are let through spend from
+the window; rejected ones leave it untouched.
+"""
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from fastapi import Depends, HTTPException, Request
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from starlette.datastructures import MutableHeaders
+
+from .auth import get_current_user
+from .config import settings
+from .db import get_db
+
+RATE_LIMIT_STATE_KEY = "rate_limit"
+READ_COST = 1
+WRITE_COST = 2
+ROUTE_COSTS = {
+    ("POST", "/lists/{list_id}/items/reorder"): 10,
+    ("POST", "/templates/{template_id}/create-list"): 10,
+}
+
+
+def route_cost(method: str, path: str | None) -> int:
+    cost = ROUTE_COSTS.get((method, path))
+    if cost is not None:
+        return cost
+    return READ_COST if method in ("GET", "HEAD") else WRITE_COST
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def take(self, key: str, cost: int, burst: int, rate: float, db) -> tuple[bool, float]:
+        """Spend `cost` tokens if available; return `(allowed, tokens_left)`."""
+
+
+class LocalRateLimitBackend(RateLimitBackend):
+    def __init__(self):
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _evict_idle(self, now: float, full_after: float) -> None:
+        # Buckets are ordered by last use, so idle ones sit at the front.
+        while self._buckets:
+            key, (_, updated_at) = next(iter(self._buckets.items()))
+            if now - updated_at < full_after:
+                break
+            del self._buckets[key]
+
+    async def take(self, key: str, cost: int, burst: int, rate: float, db) -> tuple[bool, float]:
+        now = time.monotonic()
+        self._evict_idle(now, burst / rate)
+        tokens, updated_at = self._buckets.pop(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[key] = (tokens, now)
+        return allowed, tokens
+
+
+class MongoRateLimitBackend(RateLimitBackend):
+    async def take(self, key: str, cost: int, burst: int, rate: float, db) -> tuple[bool, float]:
+        window_seconds = burst / rate
+        now = datetime.now(timezone.utc)
+        window = int(now.timestamp() // window_seconds)
+        window_id = f"{key}:{window}"
+        if cost <= burst:
+            # The filter only matches while the window still has room, so a
+            # full window makes the upsert collide on `_id` instead of
+            # counting the rejected request.
+            try:
+                doc = await db.rate_limits.find_one_and_update(
+                    {"_id": window_id, "used": {"$lte": burst - cost}},
+                    {
+                        "$inc": {"used": cost},
+                        "$setOnInsert": {
+                            "expires_at": now + timedelta(seconds=window_seconds)
+                        },
+                    },
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+                return True, burst - doc["used"]
+            except DuplicateKeyError:
+                pass
+        doc = await db.rate_limits.find_one({"_id": window_id})
+        return False, max(0, burst - (doc["used"] if doc else 0))
+
+
+def _new_backend(name: str) -> RateLimitBackend:
+    return MongoRateLimitBackend() if name == "mongo" else LocalRateLimitBackend()
+
+
+backend: RateLimitBackend = _new_backend(settings.rate_limit_backend)
+
+
+def set_backend(new_backend: RateLimitBackend) -> None:
+    global backend
+    backend = new_backend
+
+
+async def enforce_rate_limit(
+    request: Request,
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    burst = settings.rate_limit_burst
+    rate = settings.rate_limit_per_second
+    route = request.scope.get("route")
+    cost = route_cost(request.method, getattr(route, "path", None))
+    allowed, tokens = await backend.take(current_user["id"], cost, burst, rate, db)
+
+    headers = {
+        "RateLimit-Limit": str(burst),
+        "RateLimit-Remaining": str(int(tokens)),
+        "RateLimit-Reset": str(math.ceil((burst - tokens) / rate)),
+    }
+    request.scope.setdefault("state", {})[RATE_LIMIT_STATE_KEY] = headers
+    if not allowed:
+        retry_after = math.ceil(max(cost - tokens, 1) / rate)
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded.",
+            headers={**headers, "Retry-After": str(retry_after)},
+        )
+
+
+class RateLimitHeadersMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        state = scope.setdefault("state", {})
+
+        async def wrapped(message):
+            if message["type"] == "http.response.start" and state.get(RATE_LIMIT_STATE_KEY):
+                headers = MutableHeaders(scope=message)
+                for name, value in state[RATE_LIMIT_STATE_KEY].items():
+                    if name not in headers:
+                        headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, wrapped)
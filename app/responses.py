@@ -0,0 +1,55 @@
+"""JSON rendering that skips FastAPI's `jsonable_encoder` pass.
+
+Routes keep `response_model` for validation docs and the OpenAPI schema, but
+hot endpoints return `model_response(...)`, which validates through a cached
+Pydantic `TypeAdapter` and dumps straight to JSON bytes in pydantic-core
+(datetimes included). FastAPI passes `Response` objects through untouched.
+Clients that negotiated MessagePack get the same validated content packed
+instead. `etag=True` adds a weak ETag derived from the rendered bytes, which
+lets the compression middleware reuse compressed bodies.
+"""
+import hashlib
+from functools import lru_cache
+from typing import Any
+
+import msgpack
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from .negotiation import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, wants_msgpack
+from .timing import measure
+
+
+@lru_cache(maxsize=None)
+def get_adapter(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+def render_model(response_type: Any, content: Any) -> bytes:
+    adapter = get_adapter(response_type)
+    return adapter.dump_json(adapter.validate_python(content))
+
+
+def render_model_msgpack(response_type: Any, content: Any) -> bytes:
+    adapter = get_adapter(response_type)
+    return msgpack.packb(adapter.dump_python(adapter.validate_python(content), mode="json"))
+
+
+def body_etag(body: bytes) -> str:
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def model_response(
+    response_type: Any, content: Any, status_code: int = 200, etag: bool = False
+) -> Response:
+    with measure("serialize"):
+        if wants_msgpack():
+            body = render_model_msgpack(response_type, content)
+            media_type = MSGPACK_MEDIA_TYPE
+        else:
+            body = render_model(response_type, content)
+            media_type = JSON_MEDIA_TYPE
+    headers = {"ETag": body_etag(body)} if etag else None
+    return Response(
+        content=body, status_code=status_code, media_type=media_type, headers=headers
+    )
@@ -0,0 +1,80 @@
+"""Per-user revision counter for "anything changed?" long polling.
+
+Every mutating route bumps the caller's revision in the `revisions` collection.
+`GET /me/revision` parks waiters on one `asyncio.Condition` per user, so idle
+clients cost a coroutine each and never poll Mongo.
+"""
+import asyncio
+
+from pymongo import ReturnDocument
+
+
+class RevisionNotifier:
+    def __init__(self):
+        self._conditions: dict[str, asyncio.Condition] = {}
+        self._waiters: dict[str, int] = {}
+        self._latest: dict[str, int] = {}
+
+    def _acquire(self, user_id: str) -> asyncio.Condition:
+        condition = self._conditions.get(user_id)
+        if condition is None:
+            condition = self._conditions[user_id] = asyncio.Condition()
+        self._waiters[user_id] = self._waiters.get(user_id, 0) + 1
+        return condition
+
+    def _release(self, user_id: str) -> None:
+        self._waiters[user_id] -= 1
+        if not self._waiters[user_id]:
+            del self._waiters[user_id]
+            del self._conditions[user_id]
+            self._latest.pop(user_id, None)
+
+    def waiter_count(self, user_id: str) -> int:
+        return self._waiters.get(user_id, 0)
+
+    async def notify(self, user_id: str, revision: int) -> None:
+        condition = self._conditions.get(user_id)
+        if condition is None:
+            return
+        async with condition:
+            self._latest[user_id] = max(self._latest.get(user_id, 0), revision)
+            condition.notify_all()
+
+    async def wait(self, user_id: str, after: int, timeout: float, load_current) -> int:
+        # Register before reading the stored revision so a bump that lands in
+        # between is not missed.
+        condition = self._acquire(user_id)
+        try:
+            current = await load_current()
+            async with condition:
+                self._latest[user_id] = max(self._latest.get(user_id, 0), current)
+                if self._latest[user_id] <= after and timeout > 0:
+                    try:
+                        await asyncio.wait_for(
+                            condition.wait_for(lambda: self._latest[user_id] > after),
+                            timeout=timeout,
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                return self._latest[user_id]
+        finally:
+            self._release(user_id)
+
+
+notifier = RevisionNotifier()
+
+
+async def get_revision(db, user_id: str) -> int:
+    doc = await db.revisions.find_one({"_id": user_id})
+    return doc["revision"] if doc else 0
+
+
+async def bump_revision(db, user_id: str) -> int:
+    doc = await db.revisions.find_one_and_update(
+        {"_id": user_id},
+        {"$inc": {"revision": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    await notifier.notify(user_id, doc["revision"])
+    return doc["revision"]
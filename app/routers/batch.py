@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import time
+from urllib.parse import urlsplit
+
+import msgpack
+import pydantic_core
+from fastapi import APIRouter, Depends, Request
+from starlette.datastructures import Headers
+
+from ..auth import BATCH_USER_STATE_KEY, get_current_user
+from ..metrics import REQUEST_DURATION, ROUTE_STATE_KEY, UNMATCHED_ROUTE
+from ..negotiation import MSGPACK_MEDIA_TYPE, NegotiatedRoute
+from ..ratelimit import enforce_rate_limit
+from ..schemas import BatchOut, BatchRequest, BatchSubRequest
+
+router = APIRouter(
+    prefix="/batch",
+    tags=["batch"],
+    dependencies=[Depends(enforce_rate_limit)],
+    route_class=NegotiatedRoute,
+)
+logger = logging.getLogger(__name__)
+READ_METHODS = {"GET"}
+
+
+class _StreamingNotSupported(Exception):
+    pass
+
+
+def _decode_body(content_type: str | None, body: bytes):
+    if not body:
+        return None
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.unpackb(body)
+    if media_type == "application/json":
+        return pydantic_core.from_json(body)
+    return body.decode("utf-8", errors="replace")
+
+
+async def _dispatch(request: Request, current_user: dict, sub_request: BatchSubRequest) -> dict:
+    url = urlsplit(sub_request.path)
+    if url.path == router.prefix or url.path.startswith(f"{router.prefix}/"):
+        return {"status": 400, "body": {"detail": "Batch requests cannot be nested."}}
+
+    body = b"" if sub_request.body is None else pydantic_core.to_json(sub_request.body)
+    headers = [(b"accept", b"application/json")]
+    if body:
+        headers += [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+    # Reuse the batch's connection-level scope so dependency overrides and
+    # exception handlers apply; routing state is rebuilt by the router.
+    state = {**request.scope.get("state", {}), BATCH_USER_STATE_KEY: current_user}
+    state.pop(ROUTE_STATE_KEY, None)
+    scope = {
+        key: value
+        for key, value in request.scope.items()
+        if key not in {"route", "endpoint", "path_params", "router"}
+    }
+    scope.update(
+        {
+            "method": sub_request.method,
+            "path": url.path,
+            "raw_path": url.path.encode(),
+            "query_string": url.query.encode(),
+            "headers": headers,
+            "state": state,
+        }
+    )
+
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if body_sent:
+            return {"type": "http.disconnect"}
+        body_sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    response: dict = {"status": 500, "content_type": None, "chunks": []}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get("content-type")
+            if content_type and content_type.startswith("text/event-stream"):
+                raise _StreamingNotSupported()
+            response["status"] = message["status"]
+            response["content_type"] = content_type
+        elif message["type"] == "http.response.body":
+            response["chunks"].append(message.get("body", b""))
+
+    started = time.perf_counter()
+    try:
+        await request.app.router(scope, receive, send)
+    except _StreamingNotSupported:
+        response["status"] = 400
+        return {"status": 400, "body": {"detail": "Streaming endpoints cannot be batched."}}
+    except Exception:
+        logger.exception("Batch sub-request %s %s failed.", sub_request.method, url.path)
+        response["status"] = 500
+        return {"status": 500, "body": {"detail": "Internal Server Error"}}
+    finally:
+        # Sub-requests skip the middleware stack, so record them here.
+        REQUEST_DURATION.observe(
+            time.perf_counter() - started,
+            sub_request.method,
+            state.get(ROUTE_STATE_KEY, UNMATCHED_ROUTE),
+            str(response["status"]),
+        )
+    return {
+        "status": response["status"],
+        "body": _decode_body(response["content_type"], b"".join(response["chunks"])),
+    }
+
+
+@router.post("", response_model=BatchOut)
+async def run_batch(
+    payload: BatchRequest,
+    request: Request,
+    current_user=Depends(get_current_user),
+):
+    # Consecutive reads run concurrently; each write waits for everything
+    # before it and blocks everything after it, so order is preserved.
+    responses: list[dict] = []
+    reads: list = []
+    for sub_request in payload.requests:
+        if sub_request.method in READ_METHODS:
+            reads.append(_dispatch(request, current_user, sub_request))
+            continue
+        if reads:
+            responses.extend(await asyncio.gather(*reads))
+            reads = []
+        responses.append(await _dispatch(request, current_user, sub_request))
+    if reads:
+        responses.extend(await asyncio.gather(*reads))
+    return {"responses": responses}
@@ -1,40 +1,63 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from pymongo import ReturnDocument
 
 from ..auth import get_current_user
+from ..cache import list_cache
 from ..db import get_db
+from ..deletions import record_tombstone
+from ..events import publish_list_event
+from ..negotiation import NegotiatedRoute
+from ..ratelimit import enforce_rate_limit
+from ..revisions import bump_revision
 from ..schemas import ItemOut, ItemUpdate
+from ..unit_of_work import UnitOfWork, get_unit_of_work
 from ..utils import serialize_doc, to_object_id, utcnow
 
-router = APIRouter(prefix="/items", tags=["items"])
+router = APIRouter(
+    prefix="/items",
+    tags=["items"],
+    dependencies=[Depends(enforce_rate_limit)],
+    route_class=NegotiatedRoute,
+)
 LIST_COMPLETED_MUTATION_MESSAGE = (
     "Completed lists are read-only. Activate the list to edit items."
 )
 
 
-async def _get_item_or_404(db, item_id: str, user_id: str) -> dict:
-    item_doc = await db.items.find_one(
-        {"_id": to_object_id(item_id, "item_id"), "user_id": user_id}
-    )
+def _item_filter(item_id: str, user_id: str) -> dict:
+    # Items of a deleted list stay in the collection until the deletion worker
+    # reaches them; `list_deleted` hides them from the moment the list is gone.
+    return {
+        "_id": to_object_id(item_id, "item_id"),
+        "user_id": user_id,
+        "list_deleted": {"$ne": True},
+    }
+
+
+def _active_item_filter(item_id: str, user_id: str) -> dict:
+    # `list_completed` is denormalized from the parent list, so guarding on it
+    # lets a mutation skip reading the list. Items written before the field
+    # existed have no value and are treated as belonging to an active list.
+    item_filter = _item_filter(item_id, user_id)
+    item_filter["list_completed"] = {"$ne": True}
+    return item_filter
+
+
+async def _get_item_or_404(uow: UnitOfWork, item_id: str, user_id: str) -> dict:
+    item_doc = await uow.find_one("items", _item_filter(item_id, user_id))
     if not item_doc:
         raise HTTPException(status_code=404, detail="Item not found.")
     return item_doc
 
 
-async def _get_list_or_404(db, list_id: str, user_id: str) -> dict:
-    list_doc = await db.lists.find_one(
-        {"_id": to_object_id(list_id, "list_id"), "user_id": user_id}
+async def _raise_mutation_miss(uow: UnitOfWork, item_id: str, user_id: str) -> None:
+    # A guarded write matched nothing: either the item does not exist or its
+    # list is completed. Only this slow path pays for the extra read.
+    await _get_item_or_404(uow, item_id, user_id)
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=LIST_COMPLETED_MUTATION_MESSAGE,
     )
-    if not list_doc:
-        raise HTTPException(status_code=404, detail="List not found.")
-    return list_doc
-
-
-def _ensure_list_is_active(list_doc: dict) -> None:
-    if list_doc.get("completed", False):
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=LIST_COMPLETED_MUTATION_MESSAGE,
-        )
 
 
 @router.patch("/{item_id}", response_model=ItemOut)
@@ -43,10 +66,8 @@ async def update_item(
     payload: ItemUpdate,
     current_user=Depends(get_current_user),
     db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    item_doc = await _get_item_or_404(db, item_id, current_user["id"])
-    list_doc = await _get_list_or_404(db, item_doc["list_id"], current_user["id"])
-    _ensure_list_is_active(list_doc)
     updates: dict = {}
     fields = payload.model_fields_set
     if "name" in fields:
@@ -60,46 +81,71 @@ async def update_item(
         updates["purchased_at"] = utcnow() if payload.purchased else None
 
     if not updates:
-        return serialize_doc(item_doc)
-
-    updates["updated_at"] = utcnow()
-    await db.items.update_one(
-        {"_id": to_object_id(item_id, "item_id"), "user_id": current_user["id"]},
-        {"$set": updates},
-    )
-    item_doc = await _get_item_or_404(db, item_id, current_user["id"])
-    return serialize_doc(item_doc)
+        item_doc = await db.items.find_one(
+            _active_item_filter(item_id, current_user["id"])
+        )
+    else:
+        updates["updated_at"] = utcnow()
+        item_doc = await db.items.find_one_and_update(
+            _active_item_filter(item_id, current_user["id"]),
+            {"$set": updates},
+            return_document=ReturnDocument.AFTER,
+        )
+    if not item_doc:
+        await _raise_mutation_miss(uow, item_id, current_user["id"])
+    response = serialize_doc(item_doc)
+    if updates:
+        await bump_revision(db, current_user["id"])
+        await list_cache.invalidate(current_user["id"], response["list_id"])
+        publish_list_event(response["list_id"], "item.updated", response)
+    return response
 
 
 @router.post("/{item_id}/toggle", response_model=ItemOut)
 async def toggle_item(
-    item_id: str, current_user=Depends(get_current_user), db=Depends(get_db)
+    item_id: str,
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    item_doc = await _get_item_or_404(db, item_id, current_user["id"])
-    list_doc = await _get_list_or_404(db, item_doc["list_id"], current_user["id"])
-    _ensure_list_is_active(list_doc)
-    new_state = not item_doc.get("purchased", False)
-    updates = {
-        "purchased": new_state,
-        "purchased_at": utcnow() if new_state else None,
-        "updated_at": utcnow(),
-    }
-    await db.items.update_one(
-        {"_id": to_object_id(item_id, "item_id"), "user_id": current_user["id"]},
-        {"$set": updates},
+    now = utcnow()
+    item_doc = await db.items.find_one_and_update(
+        _active_item_filter(item_id, current_user["id"]),
+        [
+            {
+                "$set": {
+                    "purchased": {"$not": {"$ifNull": ["$purchased", False]}},
+                    "updated_at": now,
+                }
+            },
+            {"$set": {"purchased_at": {"$cond": ["$purchased", now, None]}}},
+        ],
+        return_document=ReturnDocument.AFTER,
     )
-    item_doc = await _get_item_or_404(db, item_id, current_user["id"])
-    return serialize_doc(item_doc)
+    if not item_doc:
+        await _raise_mutation_miss(uow, item_id, current_user["id"])
+    response = serialize_doc(item_doc)
+    await bump_revision(db, current_user["id"])
+    await list_cache.invalidate(current_user["id"], response["list_id"])
+    publish_list_event(response["list_id"], "item.updated", response)
+    return response
 
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_item(
-    item_id: str, current_user=Depends(get_current_user), db=Depends(get_db)
+    item_id: str,
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    item_doc = await _get_item_or_404(db, item_id, current_user["id"])
-    list_doc = await _get_list_or_404(db, item_doc["list_id"], current_user["id"])
-    _ensure_list_is_active(list_doc)
-    await db.items.delete_one(
-        {"_id": to_object_id(item_id, "item_id"), "user_id": current_user["id"]}
+    item_doc = await db.items.find_one_and_delete(
+        _active_item_filter(item_id, current_user["id"]),
+        projection={"list_id": 1},
     )
+    if not item_doc:
+        await _raise_mutation_miss(uow, item_id, current_user["id"])
+    await record_tombstone(db, "items", item_id, current_user["id"])
+    await bump_revision(db, current_user["id"])
+    await list_cache.invalidate(current_user["id"], item_doc["list_id"])
+    publish_list_event(item_doc["list_id"], "item.deleted", {"id": item_id})
     return None
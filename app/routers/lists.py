@@ -1,27 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pymongo import UpdateOne
 
 from ..auth import get_current_user
-from ..db import get_db
+from ..bson_json import find_json_ready, json_response
+from ..cache import list_cache
+from ..config import settings
+from ..db import get_db, tolerate_staleness
+from ..deletions import enqueue_deletion, record_tombstone, tombstone
+from ..events import event_stream, list_topic, publish_list_event
+from ..fields import (
+    FIELDS_DESCRIPTION,
+    INCLUDE_DESCRIPTION,
+    field_projection,
+    include_items,
+    select_fields,
+    serialize_with_items,
+    sparse_response,
+    with_items_pipeline,
+)
+from ..negotiation import NegotiatedRoute, response_media_type
+from ..ratelimit import enforce_rate_limit
+from ..responses import model_response
+from ..revisions import bump_revision, get_revision
 from ..schemas import (
     ItemCreate,
     ItemOut,
     ListCreate,
+    ListDetailOut,
     ListOut,
     ListUpdate,
     ReorderListItems,
 )
+from ..unit_of_work import UnitOfWork, get_unit_of_work
 from ..utils import serialize_doc, to_object_id, utcnow
 
-router = APIRouter(prefix="/lists", tags=["lists"])
+router = APIRouter(
+    prefix="/lists",
+    tags=["lists"],
+    dependencies=[Depends(enforce_rate_limit)],
+    route_class=NegotiatedRoute,
+)
 LIST_COMPLETED_MUTATION_MESSAGE = (
     "Completed lists are read-only. Activate the list to edit items."
 )
 
 
-async def _get_list_or_404(db, list_id: str, user_id: str) -> dict:
-    list_doc = await db.lists.find_one(
-        {"_id": to_object_id(list_id, "list_id"), "user_id": user_id}
+async def _get_list_or_404(
+    uow: UnitOfWork, list_id: str, user_id: str, projection: dict | None = None
+) -> dict:
+    list_doc = await uow.find_one(
+        "lists",
+        {
+            "_id": to_object_id(list_id, "list_id"),
+            "user_id": user_id,
+            "deleted_at": None,
+        },
+        projection,
     )
     if not list_doc:
         raise HTTPException(status_code=404, detail="List not found.")
@@ -35,7 +70,8 @@ async def _get_items_count_by_list_ids(db, list_ids: list[str], user_id: str) ->
         {"$match": {"user_id": user_id, "list_id": {"$in": list_ids}}},
         {"$group": {"_id": "$list_id", "count": {"$sum": 1}}},
     ]
-    grouped = await db.items.aggregate(pipeline).to_list(length=None)
+    cursor = await db.items.aggregate(pipeline)
+    grouped = await cursor.to_list(length=None)
     return {row["_id"]: row["count"] for row in grouped}
 
 
@@ -47,6 +83,25 @@ def _ensure_list_is_active(list_doc: dict) -> None:
         )
 
 
+async def _sparse_lists(db, query: dict, selected: list[str], user_id: str) -> Response:
+    cursor = db.lists.find(query, field_projection(selected)).sort("updated_at", -1)
+    response = [serialize_doc(doc) for doc in await cursor.to_list(length=None)]
+    if "items_count" in selected:
+        items_count_by_list_id = await _get_items_count_by_list_ids(
+            db, [doc["id"] for doc in response], user_id
+        )
+        for doc in response:
+            doc["items_count"] = items_count_by_list_id.get(doc["id"], 0)
+    return sparse_response(ListOut, response, selected)
+
+
+async def _find_lists_with_items(db, query: dict, user_id: str) -> list[dict]:
+    pipeline = with_items_pipeline(query, {"updated_at": -1}, "items", "list_id", user_id)
+    cursor = await db.lists.aggregate(pipeline)
+    docs = await cursor.to_list(length=None)
+    return [serialize_with_items(doc) for doc in docs]
+
+
 async def _serialize_list_with_items_count(db, list_doc: dict, user_id: str) -> dict:
     response = serialize_doc(list_doc)
     response["completed"] = response.get("completed", False)
@@ -56,28 +111,49 @@ async def _serialize_list_with_items_count(db, list_doc: dict, user_id: str) ->
     return response
 
 
-@router.get("", response_model=list[ListOut])
-async def list_lists(current_user=Depends(get_current_user), db=Depends(get_db)):
-    cursor = db.lists.find(
-        {"user_id": current_user["id"], "completed": {"$ne": True}}
-    ).sort("updated_at", -1)
-    docs = await cursor.to_list(length=None)
-    response = [serialize_doc(doc) for doc in docs]
-    for doc in response:
-        doc["completed"] = doc.get("completed", False)
+@router.get("", response_model=list[ListOut | ListDetailOut])
+async def list_lists(
+    fields: str | None = Query(default=None, description=FIELDS_DESCRIPTION),
+    include: str | None = Query(default=None, description=INCLUDE_DESCRIPTION),
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    with_items = include_items(include, fields)
+    selected = select_fields(fields, ListOut)
+    query = {"user_id": current_user["id"], "completed": {"$ne": True}, "deleted_at": None}
+    if with_items:
+        docs = await _find_lists_with_items(db, query, current_user["id"])
+        return model_response(list[ListDetailOut], docs)
+    if selected is not None:
+        return await _sparse_lists(db, query, selected, current_user["id"])
+    if settings.server_json_projection:
+        response = await find_json_ready(db.lists, query, [("updated_at", -1)], ListOut)
+    else:
+        cursor = db.lists.find(query).sort("updated_at", -1)
+        response = [serialize_doc(doc) for doc in await cursor.to_list(length=None)]
+        for doc in response:
+            doc["completed"] = doc.get("completed", False)
     items_count_by_list_id = await _get_items_count_by_list_ids(
         db, [doc["id"] for doc in response], current_user["id"]
     )
     for doc in response:
         doc["items_count"] = items_count_by_list_id.get(doc["id"], 0)
-    return response
+    if settings.server_json_projection:
+        return json_response(response)
+    return model_response(list[ListOut], response)
 
 
 @router.get("/completed", response_model=list[ListOut])
-async def list_completed_lists(current_user=Depends(get_current_user), db=Depends(get_db)):
-    cursor = db.lists.find({"user_id": current_user["id"], "completed": True}).sort(
-        "updated_at", -1
-    )
+async def list_completed_lists(
+    fields: str | None = Query(default=None, description=FIELDS_DESCRIPTION),
+    current_user=Depends(get_current_user),
+    db=Depends(tolerate_staleness()),
+):
+    selected = select_fields(fields, ListOut)
+    query = {"user_id": current_user["id"], "completed": True, "deleted_at": None}
+    if selected is not None:
+        return await _sparse_lists(db, query, selected, current_user["id"])
+    cursor = db.lists.find(query).sort("updated_at", -1)
     docs = await cursor.to_list(length=None)
     response = [serialize_doc(doc) for doc in docs]
     for doc in response:
@@ -87,7 +163,7 @@ async def list_completed_lists(current_user=Depends(get_current_user), db=Depend
     )
     for doc in response:
         doc["items_count"] = items_count_by_list_id.get(doc["id"], 0)
-    return response
+    return model_response(list[ListOut], response, etag=True)
 
 
 @router.post("", response_model=ListOut, status_code=status.HTTP_201_CREATED)
@@ -107,44 +183,114 @@ async def create_list(
     }
     result = await db.lists.insert_one(doc)
     doc["_id"] = result.inserted_id
+    await bump_revision(db, current_user["id"])
     response = serialize_doc(doc)
     response["completed"] = False
     response["items_count"] = 0
     return response
 
 
-@router.get("/{list_id}", response_model=ListOut)
+@router.get("/{list_id}", response_model=ListOut | ListDetailOut)
 async def get_list(
-    list_id: str, current_user=Depends(get_current_user), db=Depends(get_db)
+    list_id: str,
+    fields: str | None = Query(default=None, description=FIELDS_DESCRIPTION),
+    include: str | None = Query(default=None, description=INCLUDE_DESCRIPTION),
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    list_doc = await _get_list_or_404(db, list_id, current_user["id"])
+    with_items = include_items(include, fields)
+    selected = select_fields(fields, ListOut)
+    if with_items:
+        query = {
+            "_id": to_object_id(list_id, "list_id"),
+            "user_id": current_user["id"],
+            "deleted_at": None,
+        }
+
+        async def load() -> bytes:
+            docs = await _find_lists_with_items(db, query, current_user["id"])
+            if not docs:
+                raise HTTPException(status_code=404, detail="List not found.")
+            return model_response(ListDetailOut, docs[0]).body
+
+        media_type = response_media_type()
+        body = await list_cache.get_or_load(
+            current_user["id"],
+            list_id,
+            media_type,
+            await get_revision(db, current_user["id"]),
+            load,
+        )
+        return Response(content=body, media_type=media_type)
+    if selected is not None:
+        list_doc = await _get_list_or_404(
+            uow, list_id, current_user["id"], field_projection(selected)
+        )
+        response = serialize_doc(list_doc)
+        if "items_count" in selected:
+            response["items_count"] = await db.items.count_documents(
+                {"list_id": list_id, "user_id": current_user["id"]}
+            )
+        return sparse_response(ListOut, response, selected)
+    list_doc = await _get_list_or_404(uow, list_id, current_user["id"])
     return await _serialize_list_with_items_count(db, list_doc, current_user["id"])
 
 
 @router.post("/{list_id}/complete", response_model=ListOut)
 async def complete_list(
-    list_id: str, current_user=Depends(get_current_user), db=Depends(get_db)
+    list_id: str,
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    await _get_list_or_404(db, list_id, current_user["id"])
-    await db.lists.update_one(
-        {"_id": to_object_id(list_id, "list_id"), "user_id": current_user["id"]},
-        {"$set": {"completed": True, "updated_at": utcnow()}},
+    list_filter = {
+        "_id": to_object_id(list_id, "list_id"),
+        "user_id": current_user["id"],
+        "deleted_at": None,
+    }
+    list_doc = await uow.update_one(
+        "lists", list_filter, {"$set": {"completed": True, "updated_at": utcnow()}}
     )
-    list_doc = await _get_list_or_404(db, list_id, current_user["id"])
-    return await _serialize_list_with_items_count(db, list_doc, current_user["id"])
+    if not list_doc:
+        raise HTTPException(status_code=404, detail="List not found.")
+    await db.items.update_many(
+        {"list_id": list_id, "user_id": current_user["id"]},
+        {"$set": {"list_completed": True}},
+    )
+    response = await _serialize_list_with_items_count(db, list_doc, current_user["id"])
+    await bump_revision(db, current_user["id"])
+    await list_cache.invalidate(current_user["id"], list_id)
+    publish_list_event(list_id, "list.updated", response)
+    return response
 
 
 @router.post("/{list_id}/activate", response_model=ListOut)
 async def activate_list(
-    list_id: str, current_user=Depends(get_current_user), db=Depends(get_db)
+    list_id: str,
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    await _get_list_or_404(db, list_id, current_user["id"])
-    await db.lists.update_one(
-        {"_id": to_object_id(list_id, "list_id"), "user_id": current_user["id"]},
-        {"$set": {"completed": False, "updated_at": utcnow()}},
+    list_filter = {
+        "_id": to_object_id(list_id, "list_id"),
+        "user_id": current_user["id"],
+        "deleted_at": None,
+    }
+    list_doc = await uow.update_one(
+        "lists", list_filter, {"$set": {"completed": False, "updated_at": utcnow()}}
     )
-    list_doc = await _get_list_or_404(db, list_id, current_user["id"])
-    return await _serialize_list_with_items_count(db, list_doc, current_user["id"])
+    if not list_doc:
+        raise HTTPException(status_code=404, detail="List not found.")
+    await db.items.update_many(
+        {"list_id": list_id, "user_id": current_user["id"]},
+        {"$set": {"list_completed": False}},
+    )
+    response = await _serialize_list_with_items_count(db, list_doc, current_user["id"])
+    await bump_revision(db, current_user["id"])
+    await list_cache.invalidate(current_user["id"], list_id)
+    publish_list_event(list_id, "list.updated", response)
+    return response
 
 
 @router.patch("/{list_id}", response_model=ListOut)
@@ -153,45 +299,93 @@ async def update_list(
     payload: ListUpdate,
     current_user=Depends(get_current_user),
     db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    await _get_list_or_404(db, list_id, current_user["id"])
+    list_doc = await _get_list_or_404(uow, list_id, current_user["id"])
     updates = {}
     if payload.name is not None:
         updates["name"] = payload.name
     if not updates:
-        list_doc = await _get_list_or_404(db, list_id, current_user["id"])
         return await _serialize_list_with_items_count(db, list_doc, current_user["id"])
     updates["updated_at"] = utcnow()
-    await db.lists.update_one(
-        {"_id": to_object_id(list_id, "list_id"), "user_id": current_user["id"]},
+    list_doc = await uow.update_one(
+        "lists",
+        {"_id": list_doc["_id"], "user_id": current_user["id"], "deleted_at": None},
         {"$set": updates},
     )
-    list_doc = await _get_list_or_404(db, list_id, current_user["id"])
-    return await _serialize_list_with_items_count(db, list_doc, current_user["id"])
+    if not list_doc:
+        raise HTTPException(status_code=404, detail="List not found.")
+    response = await _serialize_list_with_items_count(db, list_doc, current_user["id"])
+    await bump_revision(db, current_user["id"])
+    await list_cache.invalidate(current_user["id"], list_id)
+    publish_list_event(list_id, "list.updated", response)
+    return response
 
 
 @router.delete("/{list_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_list(
     list_id: str, current_user=Depends(get_current_user), db=Depends(get_db)
 ):
-    await _get_list_or_404(db, list_id, current_user["id"])
-    await db.lists.delete_one(
-        {"_id": to_object_id(list_id, "list_id"), "user_id": current_user["id"]}
+    deleted = await tombstone(
+        db,
+        "lists",
+        {"_id": to_object_id(list_id, "list_id"), "user_id": current_user["id"]},
     )
-    await db.items.delete_many({"list_id": list_id, "user_id": current_user["id"]})
+    if not deleted:
+        raise HTTPException(status_code=404, detail="List not found.")
+    await db.items.update_many(
+        {"list_id": list_id, "user_id": current_user["id"]},
+        {"$set": {"list_deleted": True}},
+    )
+    await enqueue_deletion(db, "list", list_id, current_user["id"])
+    await record_tombstone(db, "lists", list_id, current_user["id"])
+    await bump_revision(db, current_user["id"])
+    await list_cache.invalidate(current_user["id"], list_id)
+    publish_list_event(list_id, "list.deleted", {"id": list_id})
     return None
 
 
+@router.get("/{list_id}/events", response_class=StreamingResponse)
+async def list_events(
+    list_id: str,
+    request: Request,
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
+):
+    await _get_list_or_404(uow, list_id, current_user["id"])
+    return StreamingResponse(
+        event_stream(
+            list_topic(list_id),
+            request.is_disconnected,
+            settings.events_heartbeat_seconds,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{list_id}/items", response_model=list[ItemOut])
 async def list_items(
-    list_id: str, current_user=Depends(get_current_user), db=Depends(get_db)
+    list_id: str,
+    fields: str | None = Query(default=None, description=FIELDS_DESCRIPTION),
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    await _get_list_or_404(db, list_id, current_user["id"])
-    cursor = db.items.find({"list_id": list_id, "user_id": current_user["id"]}).sort(
-        [("sort_order", 1), ("created_at", 1)]
-    )
-    docs = await cursor.to_list(length=None)
-    return [serialize_doc(doc) for doc in docs]
+    selected = select_fields(fields, ItemOut)
+    await _get_list_or_404(uow, list_id, current_user["id"], {"_id": 1})
+    query = {"list_id": list_id, "user_id": current_user["id"]}
+    sort = [("sort_order", 1), ("created_at", 1)]
+    if selected is not None:
+        cursor = db.items.find(query, field_projection(selected)).sort(sort)
+        docs = await cursor.to_list(length=None)
+        return sparse_response(ItemOut, [serialize_doc(doc) for doc in docs], selected)
+    if settings.server_json_projection:
+        return json_response(await find_json_ready(db.items, query, sort, ItemOut))
+
+    docs = await db.items.find(query).sort(sort).to_list(length=None)
+    return model_response(list[ItemOut], [serialize_doc(doc) for doc in docs])
 
 
 @router.post("/{list_id}/items", response_model=ItemOut, status_code=201)
@@ -200,8 +394,9 @@ async def create_item(
     payload: ItemCreate,
     current_user=Depends(get_current_user),
     db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    list_doc = await _get_list_or_404(db, list_id, current_user["id"])
+    list_doc = await _get_list_or_404(uow, list_id, current_user["id"])
     _ensure_list_is_active(list_doc)
     now = utcnow()
     doc = {
@@ -212,12 +407,17 @@ async def create_item(
         "purchased": False,
         "purchased_at": None,
         "sort_order": payload.sort_order,
+        "list_completed": False,
         "created_at": now,
         "updated_at": now,
     }
     result = await db.items.insert_one(doc)
     doc["_id"] = result.inserted_id
-    return serialize_doc(doc)
+    response = serialize_doc(doc)
+    await bump_revision(db, current_user["id"])
+    await list_cache.invalidate(current_user["id"], list_id)
+    publish_list_event(list_id, "item.created", response)
+    return response
 
 
 @router.post("/{list_id}/items/reorder", response_model=list[ItemOut])
@@ -226,8 +426,9 @@ async def reorder_items(
     payload: ReorderListItems,
     current_user=Depends(get_current_user),
     db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    list_doc = await _get_list_or_404(db, list_id, current_user["id"])
+    list_doc = await _get_list_or_404(uow, list_id, current_user["id"])
     _ensure_list_is_active(list_doc)
     item_ids = payload.item_ids
     if len(item_ids) != len(set(item_ids)):
@@ -260,13 +461,19 @@ async def reorder_items(
         )
     if operations:
         await db.items.bulk_write(operations)
-    await db.lists.update_one(
-        {"_id": to_object_id(list_id, "list_id"), "user_id": current_user["id"]},
+    await uow.update_one(
+        "lists",
+        {"_id": list_doc["_id"], "user_id": current_user["id"]},
         {"$set": {"updated_at": now}},
     )
 
+    # Read back rather than answering from `existing_items`: a toggle or
+    # delete that lands between the read above and the write must show up.
     cursor = db.items.find({"list_id": list_id, "user_id": current_user["id"]}).sort(
         [("sort_order", 1), ("created_at", 1)]
     )
-    docs = await cursor.to_list(length=None)
-    return [serialize_doc(doc) for doc in docs]
+    response = [serialize_doc(doc) for doc in await cursor.to_list(length=None)]
+    await bump_revision(db, current_user["id"])
+    await list_cache.invalidate(current_user["id"], list_id)
+    publish_list_event(list_id, "items.reordered", {"item_ids": item_ids})
+    return model_response(list[ItemOut], response)
@@ -0,0 +1,488 @@
+from datetime import timedelta
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from ..auth import get_current_user
+from ..config import settings
+from ..db import get_db
+from ..deletions import record_tombstones
+from ..events import publish_list_event
+from ..negotiation import NegotiatedRoute
+from ..ratelimit import enforce_rate_limit
+from ..responses import model_response
+from ..revisions import bump_revision
+from ..schemas import (
+    ItemUpdate,
+    SyncOperation,
+    SyncOperationsOut,
+    SyncOperationsRequest,
+    SyncOut,
+)
+from ..utils import (
+    decode_sync_token,
+    encode_sync_token,
+    serialize_doc,
+    to_object_id,
+    utcnow,
+)
+
+router = APIRouter(
+    prefix="/sync",
+    tags=["sync"],
+    dependencies=[Depends(enforce_rate_limit)],
+    route_class=NegotiatedRoute,
+)
+LIST_COMPLETED_MUTATION_MESSAGE = (
+    "Completed lists are read-only. Activate the list to edit items."
+)
+DUPLICATE_KEY_ERROR = 11000
+
+# Writes stamp `updated_at` before they commit, so a change can land slightly
+# behind a token issued concurrently. Re-sending that window is harmless since
+# clients upsert by id.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+async def _count_children(
+    db, collection: str, field: str, parent_ids: list[str], user_id: str
+) -> dict[str, int]:
+    if not parent_ids:
+        return {}
+    pipeline = [
+        {"$match": {"user_id": user_id, field: {"$in": parent_ids}}},
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+    ]
+    cursor = await db[collection].aggregate(pipeline)
+    grouped = await cursor.to_list(length=None)
+    return {row["_id"]: row["count"] for row in grouped}
+
+
+async def _find_changed(db, collection: str, query: dict) -> list[dict]:
+    docs = await db[collection].find(query).sort("updated_at", 1).to_list(length=None)
+    return [serialize_doc(doc) for doc in docs]
+
+
+async def _tombstoned_ids(db, collection: str, user_id: str) -> set[str]:
+    cursor = db[collection].find(
+        {"user_id": user_id, "deleted_at": {"$ne": None}}, {"_id": 1}
+    )
+    return {str(doc["_id"]) for doc in await cursor.to_list(length=None)}
+
+
+@router.get("", response_model=SyncOut)
+async def sync_changes(
+    since: str | None = Query(default=None),
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    user_id = current_user["id"]
+    now = utcnow()
+    since_at = decode_sync_token(since) if since else None
+    retention = timedelta(days=settings.sync_tombstone_retention_days)
+    # Without a token, or with one older than the tombstones we keep, the client
+    # cannot be brought up to date incrementally and gets a full snapshot.
+    reset = since_at is None or since_at < now - retention
+
+    query: dict = {"user_id": user_id}
+    if not reset:
+        query["updated_at"] = {"$gt": since_at - SYNC_OVERLAP}
+
+    lists = await _find_changed(db, "lists", {**query, "deleted_at": None})
+    templates = await _find_changed(db, "templates", {**query, "deleted_at": None})
+    items = await _find_changed(db, "items", query)
+    template_items = await _find_changed(db, "template_items", query)
+
+    # Children of a parent awaiting background deletion are still on disk.
+    deleted_list_ids = await _tombstoned_ids(db, "lists", user_id)
+    deleted_template_ids = await _tombstoned_ids(db, "templates", user_id)
+    items = [doc for doc in items if doc["list_id"] not in deleted_list_ids]
+    template_items = [
+        doc for doc in template_items if doc["template_id"] not in deleted_template_ids
+    ]
+
+    list_counts = await _count_children(
+        db, "items", "list_id", [doc["id"] for doc in lists], user_id
+    )
+    for doc in lists:
+        doc["completed"] = doc.get("completed", False)
+        doc["items_count"] = list_counts.get(doc["id"], 0)
+    template_counts = await _count_children(
+        db, "template_items", "template_id", [doc["id"] for doc in templates], user_id
+    )
+    for doc in templates:
+        doc["items_count"] = template_counts.get(doc["id"], 0)
+
+    deleted = []
+    if not reset:
+        cursor = db.tombstones.find(
+            {"user_id": user_id, "deleted_at": {"$gt": since_at - SYNC_OVERLAP}}
+        ).sort("deleted_at", 1)
+        deleted = [
+            {
+                "collection": doc["collection"],
+                "id": doc["doc_id"],
+                "deleted_at": doc["deleted_at"],
+            }
+            for doc in await cursor.to_list(length=None)
+        ]
+
+    return model_response(
+        SyncOut,
+        {
+            "token": encode_sync_token(now),
+            "reset": reset,
+            "lists": lists,
+            "items": items,
+            "templates": templates,
+            "template_items": template_items,
+            "deleted": deleted,
+        },
+    )
+
+
+def _object_ids(values) -> list[ObjectId]:
+    object_ids = []
+    for value in values:
+        try:
+            object_ids.append(ObjectId(value))
+        except (InvalidId, TypeError):
+            continue
+    return object_ids
+
+
+async def _claim_idempotency_keys(
+    db, user_id: str, keys: list[str]
+) -> dict[int, dict | None]:
+    """Lease every key that is new, or still pending after its lease ran out.
+
+    Returns the claimed indexes, each mapped to the plan an earlier attempt
+    stored for its key, or `None` when there is none.
+    """
+    now = utcnow()
+    lease_expires_at = now + timedelta(seconds=settings.idempotency_lease_seconds)
+    docs = [
+        {
+            "user_id": user_id,
+            "key": key,
+            "created_at": now,
+            "lease_expires_at": lease_expires_at,
+        }
+        for key in keys
+    ]
+    duplicates: set[int] = set()
+    try:
+        await db.idempotency_keys.insert_many(docs, ordered=False)
+    except BulkWriteError as exc:
+        errors = exc.details.get("writeErrors", [])
+        if any(error["code"] != DUPLICATE_KEY_ERROR for error in errors):
+            raise
+        duplicates = {error["index"] for error in errors}
+
+    claimed: dict[int, dict | None] = {
+        index: None for index in range(len(keys)) if index not in duplicates
+    }
+    for index in sorted(duplicates):
+        # A key without a result whose lease ran out belongs to an attempt
+        # that died; take it over and finish what that attempt planned.
+        doc = await db.idempotency_keys.find_one_and_update(
+            {
+                "user_id": user_id,
+                "key": keys[index],
+                "result": None,
+                "lease_expires_at": {"$lt": now},
+            },
+            {"$set": {"lease_expires_at": lease_expires_at}},
+        )
+        if doc is not None:
+            claimed[index] = doc.get("plan")
+    return claimed
+
+
+async def _load_state(db, operations: list[SyncOperation], user_id: str):
+    item_ids = {op.item_id for op in operations if op.item_id}
+    items = {}
+    if item_ids:
+        cursor = db.items.find(
+            {"_id": {"$in": _object_ids(item_ids)}, "user_id": user_id}
+        )
+        items = {str(doc["_id"]): doc for doc in await cursor.to_list(length=None)}
+
+    reorder_list_ids = [
+        op.list_id for op in operations if op.op == "reorder" and op.list_id
+    ]
+    if reorder_list_ids:
+        cursor = db.items.find(
+            {"list_id": {"$in": reorder_list_ids}, "user_id": user_id}
+        )
+        for doc in await cursor.to_list(length=None):
+            items.setdefault(str(doc["_id"]), doc)
+
+    list_ids = {op.list_id for op in operations if op.list_id}
+    list_ids |= {doc["list_id"] for doc in items.values()}
+    lists = {}
+    if list_ids:
+        cursor = db.lists.find(
+            {
+                "_id": {"$in": _object_ids(list_ids)},
+                "user_id": user_id,
+                "deleted_at": None,
+            }
+        )
+        lists = {str(doc["_id"]): doc for doc in await cursor.to_list(length=None)}
+    return lists, items
+
+
+def _get_active_list(lists: dict, list_id: str | None) -> dict:
+    to_object_id(list_id or "", "list_id")
+    list_doc = lists.get(list_id)
+    if not list_doc:
+        raise HTTPException(status_code=404, detail="List not found.")
+    if list_doc.get("completed", False):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=LIST_COMPLETED_MUTATION_MESSAGE,
+        )
+    return list_doc
+
+
+def _get_mutable_item(lists: dict, items: dict, item_id: str | None) -> dict:
+    to_object_id(item_id or "", "item_id")
+    item_doc = items.get(item_id)
+    if not item_doc:
+        raise HTTPException(status_code=404, detail="Item not found.")
+    _get_active_list(lists, item_doc["list_id"])
+    return item_doc
+
+
+def _apply_operation(
+    op: SyncOperation,
+    lists: dict,
+    items: dict,
+    writes: dict,
+    user_id: str,
+    now,
+    retried: bool = False,
+) -> tuple[str | None, SyncOperation]:
+    """Validate one operation against the batch state and queue its writes.
+
+    Returns the resulting id and the operation in a form that can be applied
+    again without changing the outcome: creates carry their item id and
+    toggles become updates to the purchased state they set. `retried` marks
+    such a planned operation from an attempt that may have written already.
+
+    Raises HTTPException with the status the equivalent REST call would return.
+    """
+    if op.op == "create":
+        _get_active_list(lists, op.list_id)
+        if op.item is None:
+            raise HTTPException(status_code=400, detail="Create requires item.")
+        item_oid = to_object_id(op.item_id, "item_id") if op.item_id else ObjectId()
+        if items.get(str(item_oid)):
+            if retried:
+                return str(item_oid), op
+            raise HTTPException(status_code=409, detail="Item already exists.")
+        doc = {
+            "_id": item_oid,
+            "user_id": user_id,
+            "list_id": op.list_id,
+            "name": op.item.name,
+            "qty": op.item.qty,
+            "purchased": False,
+            "purchased_at": None,
+            "sort_order": op.item.sort_order,
+            "list_completed": False,
+            "created_at": now,
+            "updated_at": now,
+        }
+        items[str(item_oid)] = doc
+        writes["items"].append(InsertOne(doc))
+        writes["events"].append((op.list_id, "item.created", serialize_doc(doc)))
+        return str(item_oid), op.model_copy(update={"item_id": str(item_oid)})
+
+    if op.op == "reorder":
+        _get_active_list(lists, op.list_id)
+        item_ids = op.item_ids or []
+        if len(item_ids) != len(set(item_ids)):
+            raise HTTPException(
+                status_code=400, detail="Item ids must not contain duplicates."
+            )
+        existing_item_ids = {
+            item_id
+            for item_id, doc in items.items()
+            if doc and doc["list_id"] == op.list_id
+        }
+        if set(item_ids) != existing_item_ids:
+            raise HTTPException(
+                status_code=400,
+                detail="Item ids must include every item in the list exactly once.",
+            )
+        for sort_order, item_id in enumerate(item_ids):
+            items[item_id].update({"sort_order": sort_order, "updated_at": now})
+            writes["items"].append(
+                UpdateOne(
+                    {"_id": ObjectId(item_id), "user_id": user_id},
+                    {"$set": {"sort_order": sort_order, "updated_at": now}},
+                )
+            )
+        writes["lists"].add(op.list_id)
+        writes["events"].append((op.list_id, "items.reordered", {"item_ids": item_ids}))
+        return op.list_id, op
+
+    if op.op == "delete" and retried and not items.get(op.item_id):
+        # The earlier attempt deleted it, but may have stopped before
+        # recording the tombstone.
+        writes["deleted_items"].append(op.item_id)
+        return op.item_id, op
+    item_doc = _get_mutable_item(lists, items, op.item_id)
+    if op.op == "delete":
+        items[op.item_id] = None
+        writes["items"].append(DeleteOne({"_id": item_doc["_id"], "user_id": user_id}))
+        writes["deleted_items"].append(op.item_id)
+        writes["events"].append((item_doc["list_id"], "item.deleted", {"id": op.item_id}))
+        return op.item_id, op
+
+    if op.op == "toggle":
+        purchased = not item_doc.get("purchased", False)
+        op = op.model_copy(
+            update={"op": "update", "changes": ItemUpdate(purchased=purchased)}
+        )
+    updates: dict = {}
+    if op.changes is not None:
+        fields = op.changes.model_fields_set
+        for field in ("name", "qty", "sort_order"):
+            if field in fields:
+                updates[field] = getattr(op.changes, field)
+        if "purchased" in fields:
+            updates["purchased"] = op.changes.purchased
+            updates["purchased_at"] = now if op.changes.purchased else None
+    if updates:
+        updates["updated_at"] = now
+        item_doc.update(updates)
+        writes["items"].append(
+            UpdateOne({"_id": item_doc["_id"], "user_id": user_id}, {"$set": updates})
+        )
+        writes["events"].append(
+            (item_doc["list_id"], "item.updated", serialize_doc(item_doc))
+        )
+    return op.item_id, op
+
+
+@router.post("/ops", response_model=SyncOperationsOut)
+async def apply_operations(
+    payload: SyncOperationsRequest,
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    user_id = current_user["id"]
+    operations = payload.operations
+    keys = [op.idempotency_key for op in operations]
+    claimed = await _claim_idempotency_keys(db, user_id, keys)
+
+    now = utcnow()
+    results: dict[int, dict] = {}
+    result_by_key: dict[str, dict] = {}
+    plans: dict[str, dict] = {}
+    writes = {"items": [], "lists": set(), "deleted_items": [], "events": []}
+    pending: dict[int, tuple[SyncOperation, bool]] = {}
+    for index, plan in claimed.items():
+        if plan is None:
+            pending[index] = (operations[index], False)
+        elif "op" in plan:
+            pending[index] = (SyncOperation.model_validate(plan["op"]), True)
+        else:
+            results[index] = result_by_key[keys[index]] = plan["result"]
+    lists, items = await _load_state(db, [op for op, _ in pending.values()], user_id)
+    for index in sorted(pending):
+        op, retried = pending[index]
+        try:
+            doc_id, planned = _apply_operation(
+                op, lists, items, writes, user_id, now, retried
+            )
+            result = {"status": status.HTTP_200_OK, "id": doc_id}
+            plan = {"op": planned.model_dump(mode="json", exclude_unset=True)}
+        except HTTPException as exc:
+            result = {"status": exc.status_code, "detail": exc.detail}
+            plan = {"result": result}
+        results[index] = result
+        result_by_key[op.idempotency_key] = result
+        plans[op.idempotency_key] = plan
+
+    # Plans are stored before anything is written, so an attempt that dies
+    # part-way leaves every key with operations that are safe to apply again.
+    if plans:
+        await db.idempotency_keys.bulk_write(
+            [
+                UpdateOne({"user_id": user_id, "key": key}, {"$set": {"plan": plan}})
+                for key, plan in plans.items()
+            ]
+        )
+    try:
+        if writes["items"]:
+            await db.items.bulk_write(writes["items"], ordered=True)
+        if writes["lists"]:
+            await db.lists.bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": ObjectId(list_id), "user_id": user_id},
+                        {"$set": {"updated_at": now}},
+                    )
+                    for list_id in writes["lists"]
+                ]
+            )
+        await record_tombstones(db, "items", writes["deleted_items"], user_id)
+    except Exception:
+        # Some writes may have gone through. End the leases so a retry takes
+        # the keys over at once and applies their plans again.
+        await db.idempotency_keys.update_many(
+            {"user_id": user_id, "key": {"$in": list(plans)}},
+            {"$set": {"lease_expires_at": now}},
+        )
+        raise
+    if writes["items"]:
+        await bump_revision(db, user_id)
+    for list_id, event_type, data in writes["events"]:
+        publish_list_event(list_id, event_type, data)
+
+    if result_by_key:
+        await db.idempotency_keys.bulk_write(
+            [
+                UpdateOne(
+                    {"user_id": user_id, "key": key},
+                    {
+                        "$set": {"result": result},
+                        "$unset": {"plan": "", "lease_expires_at": ""},
+                    },
+                )
+                for key, result in result_by_key.items()
+            ]
+        )
+
+    replayed_keys = [
+        keys[index]
+        for index in range(len(keys))
+        if index not in claimed and keys[index] not in result_by_key
+    ]
+    if replayed_keys:
+        cursor = db.idempotency_keys.find(
+            {"user_id": user_id, "key": {"$in": replayed_keys}}
+        )
+        for doc in await cursor.to_list(length=None):
+            result_by_key[doc["key"]] = doc.get("result") or {
+                "status": status.HTTP_409_CONFLICT,
+                "detail": "Operation is still being applied.",
+            }
+
+    response = []
+    for index, key in enumerate(keys):
+        result = results.get(index) or result_by_key.get(key) or {
+            "status": status.HTTP_409_CONFLICT,
+            "detail": "Operation is still being applied.",
+        }
+        response.append(
+            {**result, "idempotency_key": key, "replayed": index not in claimed}
+        )
+    return {"results": response}
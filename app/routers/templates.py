@@ -1,7 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from ..auth import get_current_user
+from ..bson_json import find_json_ready, json_response
+from ..config import settings
 from ..db import get_db
+from ..deletions import enqueue_deletion, record_tombstone, tombstone
+from ..fields import (
+    FIELDS_DESCRIPTION,
+    INCLUDE_DESCRIPTION,
+    field_projection,
+    include_items,
+    select_fields,
+    serialize_with_items,
+    sparse_response,
+    with_items_pipeline,
+)
+from ..negotiation import NegotiatedRoute
+from ..ratelimit import enforce_rate_limit
+from ..responses import model_response
+from ..revisions import bump_revision
 from ..schemas import (
     CreateListFromTemplate,
     ListOut,
@@ -13,14 +30,28 @@ from ..schemas import (
     TemplateOut,
     TemplateUpdate,
 )
+from ..unit_of_work import UnitOfWork, get_unit_of_work
 from ..utils import serialize_doc, to_object_id, utcnow
 
-router = APIRouter(prefix="/templates", tags=["templates"])
+router = APIRouter(
+    prefix="/templates",
+    tags=["templates"],
+    dependencies=[Depends(enforce_rate_limit)],
+    route_class=NegotiatedRoute,
+)
 
 
-async def _get_template_or_404(db, template_id: str, user_id: str) -> dict:
-    template_doc = await db.templates.find_one(
-        {"_id": to_object_id(template_id, "template_id"), "user_id": user_id}
+async def _get_template_or_404(
+    uow: UnitOfWork, template_id: str, user_id: str, projection: dict | None = None
+) -> dict:
+    template_doc = await uow.find_one(
+        "templates",
+        {
+            "_id": to_object_id(template_id, "template_id"),
+            "user_id": user_id,
+            "deleted_at": None,
+        },
+        projection,
     )
     if not template_doc:
         raise HTTPException(status_code=404, detail="Template not found.")
@@ -36,7 +67,8 @@ async def _get_items_count_by_template_ids(
         {"$match": {"user_id": user_id, "template_id": {"$in": template_ids}}},
         {"$group": {"_id": "$template_id", "count": {"$sum": 1}}},
     ]
-    grouped = await db.template_items.aggregate(pipeline).to_list(length=None)
+    cursor = await db.template_items.aggregate(pipeline)
+    grouped = await cursor.to_list(length=None)
     return {row["_id"]: row["count"] for row in grouped}
 
 
@@ -48,15 +80,19 @@ async def _serialize_template_with_items_count(db, template_doc: dict, user_id:
     return response
 
 
+def _template_item_filter(template_id: str, item_id: str, user_id: str) -> dict:
+    return {
+        "_id": to_object_id(item_id, "template_item_id"),
+        "template_id": template_id,
+        "user_id": user_id,
+    }
+
+
 async def _get_template_item_or_404(
-    db, template_id: str, item_id: str, user_id: str
+    uow: UnitOfWork, template_id: str, item_id: str, user_id: str
 ) -> dict:
-    item_doc = await db.template_items.find_one(
-        {
-            "_id": to_object_id(item_id, "template_item_id"),
-            "template_id": template_id,
-            "user_id": user_id,
-        }
+    item_doc = await uow.find_one(
+        "template_items", _template_item_filter(template_id, item_id, user_id)
     )
     if not item_doc:
         raise HTTPException(status_code=404, detail="Template item not found.")
@@ -64,16 +100,50 @@ async def _get_template_item_or_404(
 
 
 @router.get("", response_model=list[TemplateOut])
-async def list_templates(current_user=Depends(get_current_user), db=Depends(get_db)):
-    cursor = db.templates.find({"user_id": current_user["id"]}).sort("updated_at", -1)
-    docs = await cursor.to_list(length=None)
-    response = [serialize_doc(doc) for doc in docs]
+async def list_templates(
+    fields: str | None = Query(default=None, description=FIELDS_DESCRIPTION),
+    include: str | None = Query(default=None, description=INCLUDE_DESCRIPTION),
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    with_items = include_items(include, fields)
+    selected = select_fields(fields, TemplateOut)
+    query = {"user_id": current_user["id"], "deleted_at": None}
+    if with_items:
+        pipeline = with_items_pipeline(
+            query, {"updated_at": -1}, "template_items", "template_id", current_user["id"]
+        )
+        cursor = await db.templates.aggregate(pipeline)
+        docs = await cursor.to_list(length=None)
+        return model_response(
+            list[TemplateDetailOut], [serialize_with_items(doc) for doc in docs]
+        )
+    if selected is not None:
+        cursor = db.templates.find(query, field_projection(selected))
+        docs = await cursor.sort("updated_at", -1).to_list(length=None)
+        response = [serialize_doc(doc) for doc in docs]
+        if "items_count" in selected:
+            items_count_by_template_id = await _get_items_count_by_template_ids(
+                db, [doc["id"] for doc in response], current_user["id"]
+            )
+            for doc in response:
+                doc["items_count"] = items_count_by_template_id.get(doc["id"], 0)
+        return sparse_response(TemplateOut, response, selected)
+    if settings.server_json_projection:
+        response = await find_json_ready(
+            db.templates, query, [("updated_at", -1)], TemplateOut
+        )
+    else:
+        cursor = db.templates.find(query).sort("updated_at", -1)
+        response = [serialize_doc(doc) for doc in await cursor.to_list(length=None)]
     items_count_by_template_id = await _get_items_count_by_template_ids(
         db, [doc["id"] for doc in response], current_user["id"]
     )
     for doc in response:
         doc["items_count"] = items_count_by_template_id.get(doc["id"], 0)
-    return response
+    if settings.server_json_projection:
+        return json_response(response)
+    return model_response(list[TemplateOut], response)
 
 
 @router.post("", response_model=TemplateDetailOut, status_code=status.HTTP_201_CREATED)
@@ -108,6 +178,7 @@ async def create_template(
         )
     if item_docs:
         await db.template_items.insert_many(item_docs)
+    await bump_revision(db, current_user["id"])
 
     items_cursor = db.template_items.find(
         {"template_id": template_id, "user_id": current_user["id"]}
@@ -121,9 +192,31 @@ async def create_template(
 
 @router.get("/{template_id}", response_model=TemplateDetailOut)
 async def get_template(
-    template_id: str, current_user=Depends(get_current_user), db=Depends(get_db)
+    template_id: str,
+    fields: str | None = Query(default=None, description=FIELDS_DESCRIPTION),
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    template_doc = await _get_template_or_404(db, template_id, current_user["id"])
+    selected = select_fields(fields, TemplateDetailOut)
+    if selected is not None:
+        template_doc = await _get_template_or_404(
+            uow, template_id, current_user["id"], field_projection(selected)
+        )
+        response = serialize_doc(template_doc)
+        item_query = {"template_id": template_id, "user_id": current_user["id"]}
+        if "items" in selected:
+            items_cursor = db.template_items.find(item_query).sort(
+                [("sort_order", 1), ("created_at", 1)]
+            )
+            response["items"] = [
+                serialize_doc(doc) for doc in await items_cursor.to_list(length=None)
+            ]
+            response["items_count"] = len(response["items"])
+        elif "items_count" in selected:
+            response["items_count"] = await db.template_items.count_documents(item_query)
+        return sparse_response(TemplateDetailOut, response, selected)
+    template_doc = await _get_template_or_404(uow, template_id, current_user["id"])
     items_cursor = db.template_items.find(
         {"template_id": template_id, "user_id": current_user["id"]}
     ).sort([("sort_order", 1), ("created_at", 1)])
@@ -131,7 +224,7 @@ async def get_template(
     response = serialize_doc(template_doc)
     response["items_count"] = len(items)
     response["items"] = items
-    return response
+    return model_response(TemplateDetailOut, response, etag=True)
 
 
 @router.patch("/{template_id}", response_model=TemplateOut)
@@ -140,22 +233,25 @@ async def update_template(
     payload: TemplateUpdate,
     current_user=Depends(get_current_user),
     db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    await _get_template_or_404(db, template_id, current_user["id"])
+    template_doc = await _get_template_or_404(uow, template_id, current_user["id"])
     updates = {}
     if "name" in payload.model_fields_set:
         updates["name"] = payload.name
     if not updates:
-        template_doc = await _get_template_or_404(db, template_id, current_user["id"])
         return await _serialize_template_with_items_count(
             db, template_doc, current_user["id"]
         )
     updates["updated_at"] = utcnow()
-    await db.templates.update_one(
-        {"_id": to_object_id(template_id, "template_id"), "user_id": current_user["id"]},
+    template_doc = await uow.update_one(
+        "templates",
+        {"_id": template_doc["_id"], "user_id": current_user["id"], "deleted_at": None},
         {"$set": updates},
     )
-    template_doc = await _get_template_or_404(db, template_id, current_user["id"])
+    if not template_doc:
+        raise HTTPException(status_code=404, detail="Template not found.")
+    await bump_revision(db, current_user["id"])
     return await _serialize_template_with_items_count(
         db, template_doc, current_user["id"]
     )
@@ -165,26 +261,40 @@ async def update_template(
 async def delete_template(
     template_id: str, current_user=Depends(get_current_user), db=Depends(get_db)
 ):
-    await _get_template_or_404(db, template_id, current_user["id"])
-    await db.templates.delete_one(
-        {"_id": to_object_id(template_id, "template_id"), "user_id": current_user["id"]}
-    )
-    await db.template_items.delete_many(
-        {"template_id": template_id, "user_id": current_user["id"]}
+    deleted = await tombstone(
+        db,
+        "templates",
+        {"_id": to_object_id(template_id, "template_id"), "user_id": current_user["id"]},
     )
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Template not found.")
+    await enqueue_deletion(db, "template", template_id, current_user["id"])
+    await record_tombstone(db, "templates", template_id, current_user["id"])
+    await bump_revision(db, current_user["id"])
     return None
 
 
 @router.get("/{template_id}/items", response_model=list[TemplateItemOut])
 async def list_template_items(
-    template_id: str, current_user=Depends(get_current_user), db=Depends(get_db)
+    template_id: str,
+    fields: str | None = Query(default=None, description=FIELDS_DESCRIPTION),
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    await _get_template_or_404(db, template_id, current_user["id"])
-    cursor = db.template_items.find(
-        {"template_id": template_id, "user_id": current_user["id"]}
-    ).sort([("sort_order", 1), ("created_at", 1)])
+    selected = select_fields(fields, TemplateItemOut)
+    await _get_template_or_404(uow, template_id, current_user["id"], {"_id": 1})
+    query = {"template_id": template_id, "user_id": current_user["id"]}
+    sort = [("sort_order", 1), ("created_at", 1)]
+    if selected is not None:
+        cursor = db.template_items.find(query, field_projection(selected)).sort(sort)
+        docs = await cursor.to_list(length=None)
+        return sparse_response(
+            TemplateItemOut, [serialize_doc(doc) for doc in docs], selected
+        )
+    cursor = db.template_items.find(query).sort(sort)
     docs = await cursor.to_list(length=None)
-    return [serialize_doc(doc) for doc in docs]
+    return model_response(list[TemplateItemOut], [serialize_doc(doc) for doc in docs])
 
 
 @router.post(
@@ -197,8 +307,9 @@ async def create_template_item(
     payload: TemplateItemCreate,
     current_user=Depends(get_current_user),
     db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    await _get_template_or_404(db, template_id, current_user["id"])
+    await _get_template_or_404(uow, template_id, current_user["id"])
     now = utcnow()
     doc = {
         "user_id": current_user["id"],
@@ -211,6 +322,7 @@ async def create_template_item(
     }
     result = await db.template_items.insert_one(doc)
     doc["_id"] = result.inserted_id
+    await bump_revision(db, current_user["id"])
     return serialize_doc(doc)
 
 
@@ -221,9 +333,12 @@ async def update_template_item(
     payload: TemplateItemUpdate,
     current_user=Depends(get_current_user),
     db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    await _get_template_or_404(db, template_id, current_user["id"])
-    await _get_template_item_or_404(db, template_id, item_id, current_user["id"])
+    await _get_template_or_404(uow, template_id, current_user["id"])
+    item_doc = await _get_template_item_or_404(
+        uow, template_id, item_id, current_user["id"]
+    )
     updates: dict = {}
     fields = payload.model_fields_set
     if "name" in fields:
@@ -233,22 +348,16 @@ async def update_template_item(
     if "sort_order" in fields:
         updates["sort_order"] = payload.sort_order
     if not updates:
-        item_doc = await _get_template_item_or_404(
-            db, template_id, item_id, current_user["id"]
-        )
         return serialize_doc(item_doc)
     updates["updated_at"] = utcnow()
-    await db.template_items.update_one(
-        {
-            "_id": to_object_id(item_id, "template_item_id"),
-            "template_id": template_id,
-            "user_id": current_user["id"],
-        },
+    item_doc = await uow.update_one(
+        "template_items",
+        _template_item_filter(template_id, item_id, current_user["id"]),
         {"$set": updates},
     )
-    item_doc = await _get_template_item_or_404(
-        db, template_id, item_id, current_user["id"]
-    )
+    if not item_doc:
+        raise HTTPException(status_code=404, detail="Template item not found.")
+    await bump_revision(db, current_user["id"])
     return serialize_doc(item_doc)
 
 
@@ -258,16 +367,16 @@ async def delete_template_item(
     item_id: str,
     current_user=Depends(get_current_user),
     db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    await _get_template_or_404(db, template_id, current_user["id"])
-    await _get_template_item_or_404(db, template_id, item_id, current_user["id"])
-    await db.template_items.delete_one(
-        {
-            "_id": to_object_id(item_id, "template_item_id"),
-            "template_id": template_id,
-            "user_id": current_user["id"],
-        }
+    await _get_template_or_404(uow, template_id, current_user["id"])
+    deleted = await uow.delete_one(
+        "template_items", _template_item_filter(template_id, item_id, current_user["id"])
     )
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Template item not found.")
+    await record_tombstone(db, "template_items", item_id, current_user["id"])
+    await bump_revision(db, current_user["id"])
     return None
 
 
@@ -281,8 +390,9 @@ async def create_list_from_template(
     payload: CreateListFromTemplate,
     current_user=Depends(get_current_user),
     db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
-    template_doc = await _get_template_or_404(db, template_id, current_user["id"])
+    template_doc = await _get_template_or_404(uow, template_id, current_user["id"])
     template_items = await db.template_items.find(
         {"template_id": template_id, "user_id": current_user["id"]}
     ).to_list(length=None)
@@ -312,11 +422,13 @@ async def create_list_from_template(
                     "sort_order": item.get("sort_order", 0),
                     "purchased": False,
                     "purchased_at": None,
+                    "list_completed": False,
                     "created_at": now,
                     "updated_at": now,
                 }
             )
         await db.items.insert_many(item_docs)
+    await bump_revision(db, current_user["id"])
 
     response = serialize_doc(list_doc)
     response["completed"] = False
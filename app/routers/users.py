@@ -1,14 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from bson import ObjectId
 from bson.errors import InvalidId
 from pymongo import ReturnDocument
 
+from ..admission import admission
 from ..auth import get_current_user
-from ..db import get_db
-from ..schemas import ConfirmedUserOut, DashboardSummary, PendingUserOut, UserOut
+from ..cache import list_cache
+from ..db import get_db, tolerate_staleness
+from ..deadlines import request_metrics
+from ..deletions import enqueue_deletion, tombstone
+from ..negotiation import NegotiatedRoute
+from ..pool import pool_metrics
+from ..ratelimit import enforce_rate_limit
+from ..responses import model_response
+from ..revisions import get_revision, notifier
+from ..schemas import (
+    BootstrapOut,
+    CacheStatsOut,
+    ConfirmedUserOut,
+    DashboardSummary,
+    DeletionJobOut,
+    PendingUserOut,
+    PoolStatsOut,
+    RequestStatsOut,
+    RevisionOut,
+    UserOut,
+)
+from ..unit_of_work import UnitOfWork, get_unit_of_work
 from ..utils import serialize_doc
 
-router = APIRouter(prefix="/me", tags=["users"])
+router = APIRouter(
+    prefix="/me",
+    tags=["users"],
+    dependencies=[Depends(enforce_rate_limit)],
+    route_class=NegotiatedRoute,
+)
+REVISION_MAX_WAIT_SECONDS = 60
 
 
 def require_admin(current_user: dict):
@@ -23,8 +52,10 @@ def to_user_object_id(user_id: str) -> ObjectId:
         raise HTTPException(status_code=404, detail="User not found.") from exc
 
 
-async def get_user_or_404(db, user_id: str) -> dict:
-    user_doc = await db.users.find_one({"_id": to_user_object_id(user_id)})
+async def get_user_or_404(uow: UnitOfWork, user_id: str) -> dict:
+    user_doc = await uow.find_one(
+        "users", {"_id": to_user_object_id(user_id), "deleted_at": None}
+    )
     if not user_doc:
         raise HTTPException(status_code=404, detail="User not found.")
     return user_doc
@@ -35,60 +66,109 @@ async def read_me(current_user=Depends(get_current_user)):
     return current_user
 
 
-@router.get("/dashboard", response_model=DashboardSummary)
-async def read_dashboard_summary(current_user=Depends(get_current_user), db=Depends(get_db)):
+@router.get("/revision", response_model=RevisionOut)
+async def read_revision(
+    after: int = Query(default=0, ge=0),
+    wait: float = Query(default=30, ge=0, le=REVISION_MAX_WAIT_SECONDS),
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+):
     user_id = current_user["id"]
-
-    active_list_count = await db.lists.count_documents(
-        {"user_id": user_id, "completed": {"$ne": True}}
-    )
-    completed_list_count = await db.lists.count_documents(
-        {"user_id": user_id, "completed": True}
-    )
-    templates_count = await db.templates.count_documents({"user_id": user_id})
-
-    list_cursor = (
-        db.lists.find({"user_id": user_id, "completed": {"$ne": True}})
-        .sort("created_at", -1)
-        .limit(5)
+    revision = await notifier.wait(
+        user_id, after, wait, lambda: get_revision(db, user_id)
     )
-    last_created_lists = [serialize_doc(doc) for doc in await list_cursor.to_list(length=5)]
-    for doc in last_created_lists:
-        doc["completed"] = doc.get("completed", False)
-    last_list_ids = [doc["id"] for doc in last_created_lists]
-    list_items_counts: dict[str, int] = {}
-    if last_list_ids:
-        list_items_cursor = db.items.aggregate(
-            [
-                {"$match": {"user_id": user_id, "list_id": {"$in": last_list_ids}}},
-                {"$group": {"_id": "$list_id", "count": {"$sum": 1}}},
-            ]
-        )
-        for row in await list_items_cursor.to_list(length=None):
-            list_items_counts[row["_id"]] = row["count"]
-    for doc in last_created_lists:
-        doc["items_count"] = list_items_counts.get(doc["id"], 0)
-
-    cursor = db.templates.find({"user_id": user_id}).sort("created_at", -1).limit(5)
-    last_created_templates = [serialize_doc(doc) for doc in await cursor.to_list(length=5)]
-    last_template_ids = [doc["id"] for doc in last_created_templates]
-    template_items_counts: dict[str, int] = {}
-    if last_template_ids:
-        template_items_cursor = db.template_items.aggregate(
+    return {"revision": revision, "changed": revision > after}
+
+
+async def _find_with_items_count(
+    db,
+    collection: str,
+    query: dict,
+    sort: list[tuple[str, int]],
+    child_collection: str,
+    parent_field: str,
+    user_id: str,
+    limit: int = 0,
+) -> list[dict]:
+    cursor = db[collection].find(query).sort(sort).limit(limit)
+    docs = [serialize_doc(doc) for doc in await cursor.to_list(length=limit or None)]
+    counts: dict[str, int] = {}
+    if docs:
+        counts_cursor = await db[child_collection].aggregate(
             [
                 {
                     "$match": {
                         "user_id": user_id,
-                        "template_id": {"$in": last_template_ids},
+                        parent_field: {"$in": [doc["id"] for doc in docs]},
                     }
                 },
-                {"$group": {"_id": "$template_id", "count": {"$sum": 1}}},
+                {"$group": {"_id": f"${parent_field}", "count": {"$sum": 1}}},
             ]
         )
-        for row in await template_items_cursor.to_list(length=None):
-            template_items_counts[row["_id"]] = row["count"]
-    for doc in last_created_templates:
-        doc["items_count"] = template_items_counts.get(doc["id"], 0)
+        for row in await counts_cursor.to_list(length=None):
+            counts[row["_id"]] = row["count"]
+    for doc in docs:
+        doc["items_count"] = counts.get(doc["id"], 0)
+    return docs
+
+
+def _find_lists(db, user_id: str, sort, limit: int = 0):
+    return _find_with_items_count(
+        db,
+        "lists",
+        {"user_id": user_id, "completed": {"$ne": True}, "deleted_at": None},
+        sort,
+        "items",
+        "list_id",
+        user_id,
+        limit,
+    )
+
+
+def _find_templates(db, user_id: str, sort, limit: int = 0):
+    return _find_with_items_count(
+        db,
+        "templates",
+        {"user_id": user_id, "deleted_at": None},
+        sort,
+        "template_items",
+        "template_id",
+        user_id,
+        limit,
+    )
+
+
+async def _dashboard_summary(db, current_user: dict, counts_db=None) -> dict:
+    # Counts may come from `counts_db`, a stale handle; the recently created
+    # lists and templates are read from `db` so the caller's own show up.
+    counts_db = db if counts_db is None else counts_db
+    user_id = current_user["id"]
+    queries = [
+        counts_db.lists.count_documents(
+            {"user_id": user_id, "completed": {"$ne": True}, "deleted_at": None}
+        ),
+        counts_db.lists.count_documents(
+            {"user_id": user_id, "completed": True, "deleted_at": None}
+        ),
+        counts_db.templates.count_documents({"user_id": user_id, "deleted_at": None}),
+        _find_lists(db, user_id, [("created_at", -1)], limit=5),
+        _find_templates(db, user_id, [("created_at", -1)], limit=5),
+    ]
+    if current_user.get("admin", False):
+        queries.append(
+            counts_db.users.count_documents({"approved": True, "deleted_at": None})
+        )
+        queries.append(
+            counts_db.users.count_documents({"approved": {"$ne": True}, "deleted_at": None})
+        )
+    (
+        active_list_count,
+        completed_list_count,
+        templates_count,
+        last_created_lists,
+        last_created_templates,
+        *admin_counts,
+    ) = await asyncio.gather(*queries)
 
     summary = {
         "active_list_count": active_list_count,
@@ -97,23 +177,50 @@ async def read_dashboard_summary(current_user=Depends(get_current_user), db=Depe
         "last_created_lists": last_created_lists,
         "last_created_templates": last_created_templates,
     }
+    if admin_counts:
+        summary["confirmed_users_count"], summary["pending_users_count"] = admin_counts
+    return summary
 
-    if current_user.get("admin", False):
-        summary["confirmed_users_count"] = await db.users.count_documents(
-            {"approved": True}
-        )
-        summary["pending_users_count"] = await db.users.count_documents(
-            {"approved": {"$ne": True}}
-        )
 
-    return summary
+@router.get("/dashboard", response_model=DashboardSummary)
+async def read_dashboard_summary(
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+    stale_db=Depends(tolerate_staleness()),
+):
+    return await _dashboard_summary(db, current_user, counts_db=stale_db)
+
+
+@router.get("/bootstrap", response_model=BootstrapOut)
+async def read_bootstrap(current_user=Depends(get_current_user), db=Depends(get_db)):
+    # Everything the home screen needs in one round trip; the queries run
+    # concurrently instead of as four sequential requests.
+    user_id = current_user["id"]
+    dashboard, lists, templates = await asyncio.gather(
+        _dashboard_summary(db, current_user),
+        _find_lists(db, user_id, [("updated_at", -1)]),
+        _find_templates(db, user_id, [("updated_at", -1)]),
+    )
+    return model_response(
+        BootstrapOut,
+        {
+            "user": current_user,
+            "dashboard": dashboard,
+            "lists": lists,
+            "templates": templates,
+        },
+    )
 
 
 @router.get("/admin/pending-users", response_model=list[PendingUserOut])
-async def list_pending_users(current_user=Depends(get_current_user), db=Depends(get_db)):
+async def list_pending_users(
+    current_user=Depends(get_current_user), db=Depends(tolerate_staleness())
+):
     require_admin(current_user)
 
-    cursor = db.users.find({"approved": {"$ne": True}}).sort("created_at", -1)
+    cursor = db.users.find({"approved": {"$ne": True}, "deleted_at": None}).sort(
+        "created_at", -1
+    )
     users = [serialize_doc(doc) for doc in await cursor.to_list(length=None)]
 
     for user in users:
@@ -127,7 +234,7 @@ async def approve_user(user_id: str, current_user=Depends(get_current_user), db=
     require_admin(current_user)
 
     result = await db.users.find_one_and_update(
-        {"_id": to_user_object_id(user_id)},
+        {"_id": to_user_object_id(user_id), "deleted_at": None},
         {"$set": {"approved": True}},
         return_document=ReturnDocument.AFTER,
     )
@@ -140,10 +247,14 @@ async def approve_user(user_id: str, current_user=Depends(get_current_user), db=
 
 
 @router.get("/admin/confirmed-users", response_model=list[ConfirmedUserOut])
-async def list_confirmed_users(current_user=Depends(get_current_user), db=Depends(get_db)):
+async def list_confirmed_users(
+    current_user=Depends(get_current_user), db=Depends(tolerate_staleness())
+):
     require_admin(current_user)
 
-    cursor = db.users.find({"approved": True}).sort("created_at", -1)
+    cursor = db.users.find({"approved": True, "deleted_at": None}).sort(
+        "created_at", -1
+    )
     users = [serialize_doc(doc) for doc in await cursor.to_list(length=None)]
     for user in users:
         user["approved"] = bool(user.get("approved", False))
@@ -155,7 +266,7 @@ async def unconfirm_user(user_id: str, current_user=Depends(get_current_user), d
     require_admin(current_user)
 
     result = await db.users.find_one_and_update(
-        {"_id": to_user_object_id(user_id)},
+        {"_id": to_user_object_id(user_id), "deleted_at": None},
         {"$set": {"approved": False}},
         return_document=ReturnDocument.AFTER,
     )
@@ -169,23 +280,52 @@ async def unconfirm_user(user_id: str, current_user=Depends(get_current_user), d
 
 @router.delete("/admin/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_pending_user(
-    user_id: str, current_user=Depends(get_current_user), db=Depends(get_db)
+    user_id: str,
+    current_user=Depends(get_current_user),
+    db=Depends(get_db),
+    uow=Depends(get_unit_of_work),
 ):
     require_admin(current_user)
 
-    user_doc = await get_user_or_404(db, user_id)
+    user_doc = await get_user_or_404(uow, user_id)
     if user_doc.get("approved", False):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Confirmed users cannot be deleted from pending users.",
         )
 
-    serialized_user = serialize_doc(user_doc)
-    deleted_user_id = serialized_user["id"]
-
-    await db.users.delete_one({"_id": to_user_object_id(user_id)})
-    await db.items.delete_many({"user_id": deleted_user_id})
-    await db.lists.delete_many({"user_id": deleted_user_id})
-    await db.template_items.delete_many({"user_id": deleted_user_id})
-    await db.templates.delete_many({"user_id": deleted_user_id})
+    deleted = await tombstone(
+        db,
+        "users",
+        {"_id": user_doc["_id"], "approved": {"$ne": True}},
+    )
+    if not deleted:
+        raise HTTPException(status_code=404, detail="User not found.")
+    await enqueue_deletion(db, "user", str(user_doc["_id"]), None)
     return None
+
+
+@router.get("/admin/deletions", response_model=list[DeletionJobOut])
+async def list_deletion_jobs(current_user=Depends(get_current_user), db=Depends(get_db)):
+    require_admin(current_user)
+
+    cursor = db.deletion_jobs.find({}).sort("created_at", -1).limit(100)
+    return [serialize_doc(doc) for doc in await cursor.to_list(length=100)]
+
+
+@router.get("/admin/cache", response_model=CacheStatsOut)
+async def read_cache_stats(current_user=Depends(get_current_user)):
+    require_admin(current_user)
+    return list_cache.stats()
+
+
+@router.get("/admin/pool", response_model=PoolStatsOut)
+async def read_pool_stats(current_user=Depends(get_current_user)):
+    require_admin(current_user)
+    return pool_metrics.stats()
+
+
+@router.get("/admin/requests", response_model=RequestStatsOut)
+async def read_request_stats(current_user=Depends(get_current_user)):
+    require_admin(current_user)
+    return {**request_metrics.stats(), **admission.stats()}
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Any, Literal, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -88,6 +88,10 @@ class ItemOut(BaseSchema):
     updated_at: datetime
 
 
+class ListDetailOut(ListOut):
+    items: list[ItemOut] = Field(default_factory=list)
+
+
 class ReorderListItems(BaseSchema):
     model_config = ConfigDict(extra="forbid")
     item_ids: list[str]
@@ -160,6 +164,125 @@ class DashboardSummary(BaseSchema):
     last_created_templates: list[DashboardTemplateOut] = Field(default_factory=list)
 
 
+class CacheStatsOut(BaseSchema):
+    hits: int
+    misses: int
+    coalesced: int
+    hit_ratio: float
+    entries: Optional[int] = None
+    bytes: Optional[int] = None
+    max_bytes: Optional[int] = None
+
+
+class PoolStatsOut(BaseSchema):
+    open: int
+    in_use: int
+    waiting: int
+    max_pool_size: int
+    checkouts: int
+    checkout_failures: int
+    pool_clears: int
+    wait_ms_avg: float
+    wait_ms_p99: float
+    wait_ms_max: float
+
+
+class RequestStatsOut(BaseSchema):
+    deadline_exceeded: int
+    client_disconnects: int
+    loop_lag_ms: float
+    shed_heavy: int
+    shed_writes: int
+    shed_reads: int
+
+
+class BootstrapOut(BaseSchema):
+    user: UserOut
+    dashboard: DashboardSummary
+    lists: list[ListOut] = Field(default_factory=list)
+    templates: list[TemplateOut] = Field(default_factory=list)
+
+
+class DeletionJobOut(BaseSchema):
+    id: str
+    kind: str
+    parent_id: str
+    status: str
+    deleted: dict[str, int] = Field(default_factory=dict)
+    created_at: datetime
+    updated_at: datetime
+
+
+class TombstoneOut(BaseSchema):
+    collection: str
+    id: str
+    deleted_at: datetime
+
+
+class SyncOut(BaseSchema):
+    token: str
+    reset: bool = False
+    lists: list[ListOut] = Field(default_factory=list)
+    items: list[ItemOut] = Field(default_factory=list)
+    templates: list[TemplateOut] = Field(default_factory=list)
+    template_items: list[TemplateItemOut] = Field(default_factory=list)
+    deleted: list[TombstoneOut] = Field(default_factory=list)
+
+
+class SyncOperation(BaseSchema):
+    model_config = ConfigDict(extra="forbid")
+    idempotency_key: str = Field(min_length=1, max_length=200)
+    op: Literal["create", "update", "toggle", "delete", "reorder"]
+    list_id: Optional[str] = None
+    item_id: Optional[str] = None
+    item: Optional[ItemCreate] = None
+    changes: Optional[ItemUpdate] = None
+    item_ids: Optional[list[str]] = None
+
+
+class SyncOperationsRequest(BaseSchema):
+    model_config = ConfigDict(extra="forbid")
+    operations: list[SyncOperation] = Field(min_length=1, max_length=500)
+
+
+class SyncOperationResult(BaseSchema):
+    idempotency_key: str
+    status: int
+    id: Optional[str] = None
+    detail: Optional[str] = None
+    replayed: bool = False
+
+
+class SyncOperationsOut(BaseSchema):
+    results: list[SyncOperationResult] = Field(default_factory=list)
+
+
+class BatchSubRequest(BaseSchema):
+    model_config = ConfigDict(extra="forbid")
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"]
+    path: str = Field(min_length=1, max_length=2000, pattern=r"^/")
+    body: Any = None
+
+
+class BatchRequest(BaseSchema):
+    model_config = ConfigDict(extra="forbid")
+    requests: list[BatchSubRequest] = Field(min_length=1, max_length=20)
+
+
+class BatchSubResponse(BaseSchema):
+    status: int
+    body: Any = None
+
+
+class BatchOut(BaseSchema):
+    responses: list[BatchSubResponse] = Field(default_factory=list)
+
+
+class RevisionOut(BaseSchema):
+    revision: int
+    changed: bool
+
+
 class CreateListFromTemplate(BaseSchema):
     model_config = ConfigDict(extra="forbid")
     name: Optional[str] = Field(default=None, min_length=1, max_length=200)
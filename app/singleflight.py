@@ -0,0 +1,104 @@
+"""Single-flight coalescing of identical concurrent `GET`s.
+
+When a request arrives while an identical one is still running, it waits for
+that request's response instead of running the handler again. Requests are
+identical when they come from the same principal and carry the same path,
+query string and `Accept` header. The principal is the Google subject of a
+token `get_current_user` has already verified, so a user's phone and laptop
+share runs; a token not verified yet stands for itself until it has been,
+which keeps every shared response inside one principal. Requests without
+credentials are never coalesced.
+
+The middleware sits inside content negotiation and compression, so the shared
+body is the route's own output. Streaming responses are not shared: waiters
+on one run their own handler. Waiters are reported under the leader's route
+template in the request metrics.
+"""
+import asyncio
+
+from starlette.datastructures import Headers
+
+from .auth import bearer_token, verified_principals
+from .metrics import ROUTE_STATE_KEY, Counter
+
+COALESCED_REQUESTS = Counter(
+    "http_requests_coalesced", "GET requests answered with another request's response."
+)
+
+
+class _NotShareable(Exception):
+    pass
+
+
+class SingleFlightMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.coalesced = 0
+        self._flights: dict[tuple, asyncio.Future] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        authorization = headers.get("authorization")
+        if not authorization:
+            await self.app(scope, receive, send)
+            return
+        sub = verified_principals.get(bearer_token(authorization) or "")
+        key = (
+            ("sub", sub) if sub is not None else ("authorization", authorization),
+            scope["path"],
+            scope.get("query_string", b""),
+            headers.get("accept", ""),
+        )
+
+        flight = self._flights.get(key)
+        if flight is not None:
+            try:
+                start, body, route = await asyncio.shield(flight)
+            except Exception:
+                await self.app(scope, receive, send)
+                return
+            self.coalesced += 1
+            COALESCED_REQUESTS.inc()
+            if route is not None:
+                scope.setdefault("state", {})[ROUTE_STATE_KEY] = route
+            await send({**start, "headers": list(start["headers"])})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            await self.app(scope, receive, self._recording_send(scope, send, flight))
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            if not flight.done():
+                flight.set_exception(_NotShareable())
+                flight.exception()
+
+    def _recording_send(self, scope, send, flight: asyncio.Future):
+        start: dict | None = None
+        chunks: list[bytes] = []
+
+        async def wrapped(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                content_type = Headers(raw=message["headers"]).get("content-type", "")
+                if content_type.startswith("text/event-stream"):
+                    flight.set_exception(_NotShareable())
+                    flight.exception()
+                else:
+                    # Outer middleware edits the start message in place, so
+                    # keep an untouched copy for the waiters.
+                    start = {**message, "headers": list(message["headers"])}
+            elif message["type"] == "http.response.body" and not flight.done():
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    route = scope.get("state", {}).get(ROUTE_STATE_KEY)
+                    flight.set_result((start, b"".join(chunks), route))
+            await send(message)
+
+        return wrapped
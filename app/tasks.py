@@ -1,8 +1,7 @@
 import asyncio
 
 import typer
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import ReturnDocument
+from pymongo import AsyncMongoClient, ReturnDocument
 
 from .config import settings
 
@@ -44,22 +43,43 @@ async def set_user_admin_by_email(db, email: str, is_admin: bool) -> bool | None
     return bool(user.get("admin", False))
 
 
+async def sync_items_list_completed(db) -> int:
+    modified = 0
+    cursor = db.lists.find({}, {"user_id": 1, "completed": 1})
+    async for list_doc in cursor:
+        result = await db.items.update_many(
+            {"list_id": str(list_doc["_id"]), "user_id": list_doc["user_id"]},
+            {"$set": {"list_completed": bool(list_doc.get("completed", False))}},
+        )
+        modified += result.modified_count
+    return modified
+
+
 async def _toggle_user_approved(email: str) -> bool | None:
-    client = AsyncIOMotorClient(settings.mongo_uri)
+    client = AsyncMongoClient(settings.mongo_uri)
     try:
         db = client[settings.mongo_db]
         return await toggle_user_approved_by_email(db=db, email=email)
     finally:
-        client.close()
+        await client.close()
 
 
 async def _set_user_admin(email: str, is_admin: bool) -> bool | None:
-    client = AsyncIOMotorClient(settings.mongo_uri)
+    client = AsyncMongoClient(settings.mongo_uri)
     try:
         db = client[settings.mongo_db]
         return await set_user_admin_by_email(db=db, email=email, is_admin=is_admin)
     finally:
-        client.close()
+        await client.close()
+
+
+async def _sync_items_list_completed() -> int:
+    client = AsyncMongoClient(settings.mongo_uri)
+    try:
+        db = client[settings.mongo_db]
+        return await sync_items_list_completed(db=db)
+    finally:
+        await client.close()
 
 
 @app.command("toggle-user-approved")
@@ -98,5 +118,11 @@ def unset_user_admin(
     typer.echo(f"Set admin={admin} for email: {email}")
 
 
+@app.command("sync-items-list-completed")
+def sync_items_list_completed_command():
+    modified = asyncio.run(_sync_items_list_completed())
+    typer.echo(f"Updated list_completed on {modified} items")
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,114 @@
+"""`Server-Timing` breakdown of each request.
+
+`ServerTimingMiddleware` puts a fresh `RequestTimings` in a context variable
+for every request. Code below it adds to whichever one is current: token
+verification in `get_current_user` (`auth`), every MongoDB command via the
+command listener in `app.metrics` (`db`, with the command count), and
+response rendering in `app.responses` and `app.negotiation` (`serialize`).
+`handler` is what is left of the time to the first response byte, and
+`total` is that time itself. Tasks started for a request inherit its
+context, so their work is counted for that request and concurrent requests
+never mix.
+
+The header is sent on every response when `SERVER_TIMING` is on, and
+otherwise to admins who ask for it with `X-Server-Timing: 1`. The `db` total
+sums commands that may have run concurrently, so it can exceed `total`.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from .config import settings
+
+REQUEST_HEADER = "x-server-timing"
+
+_current: ContextVar["RequestTimings | None"] = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    __slots__ = ("durations", "db_commands", "admin")
+
+    def __init__(self):
+        self.durations: dict[str, float] = {}
+        self.db_commands = 0
+        self.admin = False
+
+    def add(self, segment: str, seconds: float) -> None:
+        self.durations[segment] = self.durations.get(segment, 0.0) + seconds
+
+    def header(self, total: float) -> str:
+        auth = self.durations.get("auth", 0.0)
+        db = self.durations.get("db", 0.0)
+        serialize = self.durations.get("serialize", 0.0)
+        handler = max(0.0, total - auth - db - serialize)
+        return ", ".join(
+            [
+                f"auth;dur={auth * 1000:.2f}",
+                f'db;dur={db * 1000:.2f};desc="{self.db_commands} commands"',
+                f"handler;dur={handler * 1000:.2f}",
+                f"serialize;dur={serialize * 1000:.2f}",
+                f"total;dur={total * 1000:.2f}",
+            ]
+        )
+
+
+def record(segment: str, seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add(segment, seconds)
+
+
+def record_db_command(seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add("db", seconds)
+        timings.db_commands += 1
+
+
+def mark_admin() -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.admin = True
+
+
+@contextmanager
+def measure(segment: str):
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(segment, time.perf_counter() - started)
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = Headers(scope=scope).get(REQUEST_HEADER) == "1"
+        timings = RequestTimings()
+        started = time.perf_counter()
+
+        async def wrapped(message):
+            if message["type"] == "http.response.start" and (
+                settings.server_timing or (requested and timings.admin)
+            ):
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timings.header(time.perf_counter() - started))
+                headers["Timing-Allow-Origin"] = settings.chopin_list_fe_url
+            await send(message)
+
+        token = _current.set(timings)
+        try:
+            await self.app(scope, receive, wrapped)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,79 @@
+"""Request-scoped identity map for documents the routers load by id.
+
+`get_unit_of_work` is a FastAPI dependency; FastAPI resolves it once per
+request, so every `_get_*_or_404` helper in a request shares one instance.
+Documents are cached by `(collection, _id)`. A repeated lookup whose filter
+the cached document still satisfies is answered from memory. Writes made
+through the unit of work refresh the cached document from the write result
+(`find_one_and_update` returning the new version) or evict it.
+
+Only plain equality filters are checked against cached documents; a filter
+with query operators always goes to Mongo.
+"""
+from typing import Any
+
+from fastapi import Depends
+from pymongo import ReturnDocument
+
+from .db import get_db
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    # Missing fields compare as None, like Mongo's `{field: null}`.
+    return all(doc.get(field) == value for field, value in query.items())
+
+
+def _is_equality_filter(query: dict) -> bool:
+    return "_id" in query and not any(
+        field.startswith("$") or isinstance(value, dict) for field, value in query.items()
+    )
+
+
+class UnitOfWork:
+    def __init__(self, db):
+        self.db = db
+        self._documents: dict[tuple[str, Any], dict] = {}
+
+    def remember(self, collection: str, doc: dict) -> dict:
+        self._documents[(collection, doc["_id"])] = doc
+        return doc
+
+    def forget(self, collection: str, doc_id) -> None:
+        self._documents.pop((collection, doc_id), None)
+
+    def cached(self, collection: str, doc_id) -> dict | None:
+        return self._documents.get((collection, doc_id))
+
+    async def find_one(
+        self, collection: str, query: dict, projection: dict | None = None
+    ) -> dict | None:
+        if not _is_equality_filter(query):
+            return await self.db[collection].find_one(query, projection)
+        doc = self.cached(collection, query["_id"])
+        if doc is not None:
+            return doc if _matches(doc, query) else None
+        if projection is not None:
+            # A partial document would answer later full lookups wrongly.
+            return await self.db[collection].find_one(query, projection)
+        doc = await self.db[collection].find_one(query)
+        return self.remember(collection, doc) if doc else None
+
+    async def update_one(self, collection: str, query: dict, update) -> dict | None:
+        doc = await self.db[collection].find_one_and_update(
+            query, update, return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            if "_id" in query:
+                self.forget(collection, query["_id"])
+            return None
+        return self.remember(collection, doc)
+
+    async def delete_one(self, collection: str, query: dict) -> bool:
+        result = await self.db[collection].delete_one(query)
+        if "_id" in query:
+            self.forget(collection, query["_id"])
+        return result.deleted_count > 0
+
+
+def get_unit_of_work(db=Depends(get_db)) -> UnitOfWork:
+    return UnitOfWork(db)
@@ -16,6 +16,17 @@ def to_object_id(value: str, name: str) -> ObjectId:
         raise HTTPException(status_code=400, detail=f"Invalid {name}.") from exc
 
 
+def encode_sync_token(value: datetime) -> str:
+    return str(int(value.timestamp() * 1000))
+
+
+def decode_sync_token(token: str) -> datetime:
+    try:
+        return datetime.fromtimestamp(int(token) / 1000, tz=timezone.utc)
+    except (ValueError, OverflowError, OSError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid sync token.") from exc
+
+
 def serialize_doc(doc: dict) -> dict:
     if not doc:
         return {}
@@ -0,0 +1,99 @@
+"""Goodput under overload with and without admission control.
+
+Run with `python -m benchmarks.bench_admission`. Needs no database: a stand-in
+ASGI app blocks the event loop for a fixed time per request (2 ms for cheap
+reads, 20 ms for a heavy dashboard), which is how CPU-bound rendering loads
+the single uvicorn loop. Requests arrive open-loop at about twice the app's
+capacity; goodput counts the responses per second that succeed within the
+latency objective, measured from each request's scheduled arrival.
+"""
+import asyncio
+import os
+import random
+import time
+
+os.environ.setdefault("GOOGLE_CLIENT_ID", "bench")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB", "bench")
+os.environ.setdefault("CHOPIN_LIST_FE_URL", "http://localhost")
+
+from app.admission import AdmissionController, AdmissionMiddleware, LoopLagMonitor  # noqa: E402
+
+DURATION_SECONDS = 3.0
+ARRIVALS_PER_SECOND = 350
+HEAVY_SHARE = 0.2
+READ_WORK_SECONDS = 0.002
+HEAVY_WORK_SECONDS = 0.020
+LATENCY_OBJECTIVE_SECONDS = 0.5
+
+
+class _Pool:
+    waiting = 0
+
+
+async def stand_in_app(scope, receive, send):
+    work = HEAVY_WORK_SECONDS if scope["path"] == "/me/dashboard" else READ_WORK_SECONDS
+    time.sleep(work)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def call(app, path: str) -> int:
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app({"type": "http", "method": "GET", "path": path, "headers": []}, receive, send)
+    return status
+
+
+async def run(name: str, app, monitor: LoopLagMonitor | None) -> None:
+    rng = random.Random(7)
+    monitor_task = asyncio.create_task(monitor.run()) if monitor else None
+    results: list[tuple[str, int, float]] = []
+    tasks = []
+
+    async def request(path: str, scheduled: float) -> None:
+        status = await call(app, path)
+        results.append((path, status, time.perf_counter() - scheduled))
+
+    started = time.perf_counter()
+    total = int(DURATION_SECONDS * ARRIVALS_PER_SECOND)
+    for index in range(total):
+        scheduled = started + index / ARRIVALS_PER_SECOND
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        path = "/me/dashboard" if rng.random() < HEAVY_SHARE else "/lists/abc"
+        tasks.append(asyncio.create_task(request(path, scheduled)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+    if monitor_task:
+        monitor_task.cancel()
+
+    good = [r for r in results if r[1] == 200 and r[2] <= LATENCY_OBJECTIVE_SECONDS]
+    good_reads = sum(1 for path, _, _ in good if path == "/lists/abc")
+    shed = sum(1 for r in results if r[1] == 503)
+    late = sum(1 for r in results if r[1] == 200 and r[2] > LATENCY_OBJECTIVE_SECONDS)
+    print(
+        f"{name:18s} goodput {len(good) / elapsed:6.1f} req/s"
+        f"  (reads {good_reads / elapsed:6.1f})  late {late:4d}  shed {shed:4d}"
+        f"  of {total}"
+    )
+
+
+async def main() -> None:
+    await run("no admission", stand_in_app, None)
+    monitor = LoopLagMonitor(interval=0.01)
+    controller = AdmissionController(monitor, _Pool())
+    await run("admission control", AdmissionMiddleware(stand_in_app, controller), monitor)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
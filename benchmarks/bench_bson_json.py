@@ -0,0 +1,69 @@
+"""Compare decoding paths for a 1k-item `GET /lists/{id}/items` response.
+
+Run with `python -m benchmarks.bench_bson_json`. The BSON batches are encoded
+locally: one as stored in `items`, one as shaped by the `SERVER_JSON_PROJECTION`
+`$project` (string ids, ISO datetimes), so no database is needed.
+"""
+import os
+import timeit
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("GOOGLE_CLIENT_ID", "bench")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB", "bench")
+os.environ.setdefault("CHOPIN_LIST_FE_URL", "http://localhost")
+
+import bson  # noqa: E402
+import pydantic_core  # noqa: E402
+
+from app.bson_json import FALLBACK_FIELD, _render_fallbacks  # noqa: E402
+from app.responses import render_model  # noqa: E402
+from app.schemas import ItemOut  # noqa: E402
+from app.utils import serialize_doc  # noqa: E402
+from benchmarks.bench_serialization import build_docs  # noqa: E402
+
+ITEM_COUNT = 1000
+ROUNDS = 100
+
+
+def shape(doc: dict) -> dict:
+    shaped = {"id": str(doc["_id"])}
+    for name in ItemOut.model_fields:
+        if name == "id":
+            continue
+        value = doc.get(name)
+        if isinstance(value, datetime):
+            millis = value.microsecond // 1000
+            value = value.strftime("%Y-%m-%dT%H:%M:%S") + (f".{millis:03d}000" if millis else "")
+        shaped[name] = value
+    shaped[FALLBACK_FIELD] = None
+    return shaped
+
+
+def main() -> None:
+    docs = build_docs(ITEM_COUNT)
+    stored = [bson.encode(doc) for doc in docs]
+    projected = [bson.encode(shape(doc)) for doc in docs]
+
+    def default_path() -> bytes:
+        decoded = [bson.decode(raw) for raw in stored]
+        return render_model(list[ItemOut], [serialize_doc(doc) for doc in decoded])
+
+    def projected_path() -> bytes:
+        decoded = [bson.decode(raw) for raw in projected]
+        _render_fallbacks(ItemOut, decoded)
+        return pydantic_core.to_json(decoded)
+
+    for name, render in (
+        ("decode + serialize_doc + model", default_path),
+        ("projected decode + to_json", projected_path),
+    ):
+        seconds = min(timeit.repeat(render, number=ROUNDS, repeat=3))
+        print(
+            f"{name:32s} {seconds / ROUNDS * 1000:8.3f} ms/response"
+            f"  {len(render())} bytes"
+        )
+
+
+if __name__ == "__main__":
+    main()
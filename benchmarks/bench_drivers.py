@@ -0,0 +1,116 @@
+"""Compare Motor and PyMongo's native async client under concurrent load.
+
+Run with `python -m benchmarks.bench_drivers` against a local mongod (set
+`MONGO_URI`, default `mongodb://localhost:27017`). Motor is no longer an app
+dependency; `pip install motor` to include it, otherwise only PyMongo runs.
+
+Each simulated request does what `GET /lists/{id}/items` does: load the list
+by id, then read its items sorted by `sort_order`. For 50, 200 and 1000
+concurrent requests it prints throughput and p50/p99 latency.
+"""
+import asyncio
+import os
+import statistics
+import time
+
+from bson import ObjectId
+from pymongo import AsyncMongoClient
+
+MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017")
+DB_NAME = "shoplist_bench_drivers"
+LIST_COUNT = 100
+ITEMS_PER_LIST = 30
+REQUESTS_PER_LEVEL = 5000
+CONCURRENCY_LEVELS = (50, 200, 1000)
+
+
+async def seed(db) -> list[ObjectId]:
+    await db.lists.drop()
+    await db.items.drop()
+    await db.items.create_index([("list_id", 1), ("sort_order", 1)])
+    list_ids = [ObjectId() for _ in range(LIST_COUNT)]
+    await db.lists.insert_many(
+        [{"_id": list_id, "user_id": "bench", "name": "List"} for list_id in list_ids]
+    )
+    await db.items.insert_many(
+        [
+            {
+                "user_id": "bench",
+                "list_id": str(list_id),
+                "name": f"Item {index}",
+                "sort_order": index,
+            }
+            for list_id in list_ids
+            for index in range(ITEMS_PER_LIST)
+        ]
+    )
+    return list_ids
+
+
+async def one_request(db, list_id: ObjectId, find_list_id, to_list) -> float:
+    started = time.perf_counter()
+    await db.lists.find_one({"_id": list_id, "user_id": "bench"})
+    cursor = db.items.find({"list_id": find_list_id, "user_id": "bench"}).sort(
+        "sort_order", 1
+    )
+    await to_list(cursor)
+    return time.perf_counter() - started
+
+
+async def run_level(db, list_ids: list[ObjectId], concurrency: int, to_list):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(index: int) -> float:
+        list_id = list_ids[index % len(list_ids)]
+        async with semaphore:
+            return await one_request(db, list_id, str(list_id), to_list)
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(limited(i) for i in range(REQUESTS_PER_LEVEL)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return (
+        REQUESTS_PER_LEVEL / elapsed,
+        statistics.median(latencies) * 1000,
+        latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    )
+
+
+async def bench(name: str, client, to_list, list_ids=None) -> list[ObjectId]:
+    db = client[DB_NAME]
+    if list_ids is None:
+        list_ids = await seed(db)
+    await run_level(db, list_ids, 50, to_list)  # warm the pool
+    for concurrency in CONCURRENCY_LEVELS:
+        throughput, p50, p99 = await run_level(db, list_ids, concurrency, to_list)
+        print(
+            f"{name:8s} c={concurrency:<5d} {throughput:9.0f} req/s"
+            f"  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms"
+        )
+    return list_ids
+
+
+async def main() -> None:
+    client = AsyncMongoClient(MONGO_URI, maxPoolSize=100)
+    try:
+        list_ids = await bench("pymongo", client, lambda cursor: cursor.to_list(None))
+    finally:
+        await client.close()
+
+    try:
+        from motor.motor_asyncio import AsyncIOMotorClient
+    except ImportError:
+        print("motor not installed; skipping")
+        return
+    motor_client = AsyncIOMotorClient(MONGO_URI, maxPoolSize=100)
+    try:
+        await bench(
+            "motor", motor_client, lambda cursor: cursor.to_list(length=None), list_ids
+        )
+        await motor_client[DB_NAME].command("dropDatabase")
+    finally:
+        motor_client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""Compare JSON and MessagePack size and encode/decode time on a 1k-item list.
+
+Run with `python -m benchmarks.bench_msgpack`. Needs no database; the payload
+is the `GET /lists/{id}/items` response used by `bench_serialization`.
+"""
+import json
+import os
+import timeit
+
+os.environ.setdefault("GOOGLE_CLIENT_ID", "bench")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB", "bench")
+os.environ.setdefault("CHOPIN_LIST_FE_URL", "http://localhost")
+
+import msgpack  # noqa: E402
+
+from app.responses import render_model, render_model_msgpack  # noqa: E402
+from app.schemas import ItemOut  # noqa: E402
+from app.utils import serialize_doc  # noqa: E402
+from benchmarks.bench_serialization import ITEM_COUNT, ROUNDS, build_docs  # noqa: E402
+
+
+def _ms(statement) -> float:
+    return min(timeit.repeat(statement, number=ROUNDS, repeat=3)) / ROUNDS * 1000
+
+
+def main() -> None:
+    content = [serialize_doc(doc) for doc in build_docs(ITEM_COUNT)]
+    as_json = render_model(list[ItemOut], content)
+    as_msgpack = render_model_msgpack(list[ItemOut], content)
+    assert json.loads(as_json) == msgpack.unpackb(as_msgpack)
+
+    for name, body, encode, decode in (
+        (
+            "json",
+            as_json,
+            lambda: render_model(list[ItemOut], content),
+            lambda: json.loads(as_json),
+        ),
+        (
+            "msgpack",
+            as_msgpack,
+            lambda: render_model_msgpack(list[ItemOut], content),
+            lambda: msgpack.unpackb(as_msgpack),
+        ),
+    ):
+        print(
+            f"{name:8s} {len(body):7d} bytes  encode {_ms(encode):7.3f} ms"
+            f"  decode {_ms(decode):7.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare response rendering paths on a 1k-item list.
+
+Run with `python -m benchmarks.bench_serialization`. Needs no database; the
+payload mirrors what `GET /lists/{id}/items` builds from Mongo documents.
+"""
+import json
+import os
+import timeit
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("GOOGLE_CLIENT_ID", "bench")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB", "bench")
+os.environ.setdefault("CHOPIN_LIST_FE_URL", "http://localhost")
+
+from bson import ObjectId  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.responses import get_adapter, render_model  # noqa: E402
+from app.schemas import ItemOut  # noqa: E402
+from app.utils import serialize_doc  # noqa: E402
+
+ITEM_COUNT = 1000
+ROUNDS = 200
+
+
+def build_docs(count: int) -> list[dict]:
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    list_id = str(ObjectId())
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": "user-1",
+            "list_id": list_id,
+            "name": f"Item {index}",
+            "qty": float(index % 5) or None,
+            "purchased": index % 3 == 0,
+            "purchased_at": now if index % 3 == 0 else None,
+            "sort_order": index,
+            "list_completed": False,
+            "created_at": now + timedelta(seconds=index),
+            "updated_at": now + timedelta(seconds=index),
+        }
+        for index in range(count)
+    ]
+
+
+def jsonable_encoder_path(content: list[dict]) -> bytes:
+    # Validate against the response model, encode to JSON-safe Python objects,
+    # then serialize with the stdlib, as FastAPI does for plain dict returns.
+    models = get_adapter(list[ItemOut]).validate_python(content)
+    return json.dumps(
+        jsonable_encoder(models), ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def model_response_path(content: list[dict]) -> bytes:
+    return render_model(list[ItemOut], content)
+
+
+def main() -> None:
+    content = [serialize_doc(doc) for doc in build_docs(ITEM_COUNT)]
+    assert json.loads(jsonable_encoder_path(content)) == json.loads(
+        model_response_path(content)
+    )
+    for name, render in (
+        ("jsonable_encoder + json.dumps", jsonable_encoder_path),
+        ("TypeAdapter.dump_json", model_response_path),
+    ):
+        seconds = min(timeit.repeat(lambda: render(content), number=ROUNDS, repeat=3))
+        size = len(render(content))
+        print(
+            f"{name:32s} {seconds / ROUNDS * 1000:8.3f} ms/response  {size} bytes"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,19 @@ from datetime import datetime, timezone
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 
 
 TEST_DB_NAME = os.environ.get("TEST_DB_NAME") or f"shoplist_test_{uuid.uuid4().hex}"
 os.environ.setdefault("GOOGLE_CLIENT_ID", "test-client-id")
 os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
 os.environ.setdefault("MONGO_DB", TEST_DB_NAME)
+os.environ.setdefault("RATE_LIMIT_BURST", "10000")
 
 from app.auth import get_current_user  # noqa: E402
 from app.db import get_db  # noqa: E402
 from app.main import app as fastapi_app  # noqa: E402
+from app.ratelimit import LocalRateLimitBackend, set_backend  # noqa: E402
 
 TEST_USER = {
     "id": "user-123",
@@ -34,9 +36,9 @@ def current_user():
 
 @pytest_asyncio.fixture
 async def mongo_client():
-    client = AsyncIOMotorClient(os.environ["MONGO_URI"])
+    client = AsyncMongoClient(os.environ["MONGO_URI"])
     yield client
-    client.close()
+    await client.close()
 
 
 @pytest_asyncio.fixture(scope="session")
@@ -62,6 +64,7 @@ async def app(db):
 
     fastapi_app.dependency_overrides[get_db] = override_get_db
     fastapi_app.dependency_overrides[get_current_user] = override_get_current_user
+    set_backend(LocalRateLimitBackend())
     yield fastapi_app
     fastapi_app.dependency_overrides.clear()
 
@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import pytest
+
+from app.admission import (
+    EXEMPT,
+    HEAVY,
+    READ,
+    REQUESTS_SHED,
+    WRITE,
+    AdmissionController,
+    LoopLagMonitor,
+    classify,
+    loop_lag,
+)
+
+
+class _Pool:
+    waiting = 0
+
+
+def test_classify_routes():
+    assert classify("GET", "/") == EXEMPT
+    assert classify("GET", "/me/dashboard") == HEAVY
+    assert classify("POST", "/templates/abc/create-list") == HEAVY
+    assert classify("GET", "/lists/abc") == READ
+    assert classify("POST", "/lists") == WRITE
+
+
+def test_heavy_requests_are_shed_first_and_reads_last():
+    shed = {label: REQUESTS_SHED._values.get((label,), 0) for label in ("heavy", "write", "read")}
+    monitor = LoopLagMonitor()
+    pool = _Pool()
+    controller = AdmissionController(monitor, pool)
+
+    monitor.lag = 0.2
+    assert not controller.admits(HEAVY)
+    assert controller.admits(WRITE)
+
+    monitor.lag = 0.0
+    pool.waiting = 60
+    assert not controller.admits(WRITE)
+    assert controller.admits(READ)
+
+    pool.waiting = 120
+    assert not controller.admits(READ)
+    assert controller.admits(EXEMPT)
+    assert controller.stats()["shed_heavy"] == 1
+    assert controller.stats()["shed_writes"] == 1
+    assert controller.stats()["shed_reads"] == 1
+    assert all(REQUESTS_SHED._values[(label,)] == count + 1 for label, count in shed.items())
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_sees_blocked_loop():
+    monitor = LoopLagMonitor(interval=0.01)
+    task = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.02)
+    time.sleep(0.1)
+    await asyncio.sleep(0.001)
+    task.cancel()
+    assert monitor.lag >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_overloaded_app_sheds_heavy_routes_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(loop_lag, "lag", 0.2)
+
+    shed = await client.get("/me/dashboard")
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "1"
+
+    assert (await client.get("/")).status_code == 200
+    assert (await client.get("/lists")).status_code == 200
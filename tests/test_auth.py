@@ -1,3 +1,5 @@
+import time
+
 import pytest
 from fastapi import HTTPException
 
@@ -25,9 +27,11 @@ async def test_invalid_token_returns_401(db, monkeypatch):
 
     monkeypatch.setattr(auth.id_token, "verify_oauth2_token", raise_error)
 
+    invalid = auth.AUTH_VERIFICATION_DURATION._values.get(("invalid",), [0])[-1]
     with pytest.raises(HTTPException) as exc:
         await auth.get_current_user(authorization="Bearer invalid", db=db)
     assert exc.value.status_code == 401
+    assert auth.AUTH_VERIFICATION_DURATION._values[("invalid",)][-1] == invalid + 1
 
 
 @pytest.mark.asyncio
@@ -182,3 +186,20 @@ async def test_get_current_user_ignores_admin_flag_from_google_payload(db, monke
     stored = await db.users.find_one({"google_sub": "sub123"})
     assert stored is not None
     assert stored["admin"] is False
+
+
+@pytest.mark.asyncio
+async def test_verified_tokens_map_to_their_subject_until_they_expire(db, monkeypatch):
+    expires_at = time.time() + 3600
+
+    def fake_verify(*args, **kwargs):
+        return {"sub": "sub123", "iss": "accounts.google.com", "exp": expires_at}
+
+    monkeypatch.setattr(auth.id_token, "verify_oauth2_token", fake_verify)
+    await db.users.insert_one({"google_sub": "sub123", "approved": True})
+
+    await auth.get_current_user(authorization="Bearer device-token", db=db)
+    assert auth.verified_principals.get("device-token") == "sub123"
+
+    monkeypatch.setattr(auth.time, "time", lambda: expires_at)
+    assert auth.verified_principals.get("device-token") is None
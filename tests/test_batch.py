@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import pytest
+
+from app import auth
+from app.auth import get_current_user
+from app.metrics import REQUEST_DURATION
+
+
+@pytest.mark.asyncio
+async def test_batch_dispatches_in_order_with_per_request_status(client):
+    created = (await client.post("/lists", json={"name": "Weekly"})).json()
+
+    response = await client.post(
+        "/batch",
+        json={
+            "requests": [
+                {"method": "GET", "path": f"/lists/{created['id']}"},
+                {
+                    "method": "POST",
+                    "path": f"/lists/{created['id']}/items",
+                    "body": {"name": "Milk"},
+                },
+                {"method": "GET", "path": f"/lists/{created['id']}/items"},
+                {"method": "GET", "path": "/lists?fields=id,items_count"},
+                {"method": "GET", "path": "/lists/0123456789abcdef01234567"},
+                {"method": "POST", "path": "/lists", "body": {"name": ""}},
+                {"method": "DELETE", "path": "/templates/0123456789abcdef01234567"},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    results = response.json()["responses"]
+    assert [result["status"] for result in results] == [200, 201, 200, 200, 404, 422, 404]
+    assert results[0]["body"]["items_count"] == 0
+    assert results[1]["body"]["name"] == "Milk"
+    assert [item["name"] for item in results[2]["body"]] == ["Milk"]
+    assert results[3]["body"] == [{"id": created["id"], "items_count": 1}]
+    assert results[4]["body"] == {"detail": "List not found."}
+
+
+@pytest.mark.asyncio
+async def test_batch_sub_requests_are_recorded_by_route_template(client):
+    created = (await client.post("/lists", json={"name": "Weekly"})).json()
+    found = ("GET", "/lists/{list_id}", "200")
+    missing = ("GET", "/lists/{list_id}", "404")
+    before = {key: REQUEST_DURATION._values.get(key, [0])[-1] for key in (found, missing)}
+
+    await client.post(
+        "/batch",
+        json={
+            "requests": [
+                {"method": "GET", "path": f"/lists/{created['id']}"},
+                {"method": "GET", "path": "/lists/0123456789abcdef01234567"},
+            ]
+        },
+    )
+
+    assert REQUEST_DURATION._values[found][-1] == before[found] + 1
+    assert REQUEST_DURATION._values[missing][-1] == before[missing] + 1
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_nesting_streams_and_oversized_batches(client):
+    created = (await client.post("/lists", json={"name": "Weekly"})).json()
+    response = await client.post(
+        "/batch",
+        json={
+            "requests": [
+                {"method": "POST", "path": "/batch", "body": {"requests": []}},
+                {"method": "GET", "path": f"/lists/{created['id']}/events"},
+                {"method": "DELETE", "path": f"/lists/{created['id']}"},
+            ]
+        },
+    )
+    results = response.json()["responses"]
+    assert [result["status"] for result in results] == [400, 400, 204]
+    assert results[2]["body"] is None
+
+    response = await client.post(
+        "/batch", json={"requests": [{"method": "GET", "path": "/me"}] * 21}
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_batch_verifies_the_token_once(client, app, db, monkeypatch):
+    calls = []
+
+    def fake_verify(*args, **kwargs):
+        calls.append(args[0])
+        return {"sub": "sub-batch", "iss": "accounts.google.com", "email": "b@example.com"}
+
+    monkeypatch.setattr(auth.id_token, "verify_oauth2_token", fake_verify)
+    del app.dependency_overrides[get_current_user]
+    await db.users.insert_one(
+        {"google_sub": "sub-batch", "approved": True, "created_at": datetime(2026, 1, 1)}
+    )
+
+    response = await client.post(
+        "/batch",
+        json={"requests": [{"method": "GET", "path": "/me"}] * 3},
+        headers={"Authorization": "Bearer token"},
+    )
+    assert response.status_code == 200
+    results = response.json()["responses"]
+    assert [result["body"]["email"] for result in results] == ["b@example.com"] * 3
+    assert calls == ["token"]
@@ -0,0 +1,207 @@
+from datetime import datetime, timezone
+
+from bson import Int64, ObjectId
+import pytest
+from pydantic import ValidationError
+
+from app.bson_json import FALLBACK_FIELD, json_projection
+from app.config import settings
+from app.schemas import ItemOut, ListOut, TemplateOut
+
+PROJECTED_MODELS = (ListOut, ItemOut, TemplateOut)
+
+
+def test_json_projection_maps_id_datetimes_and_defaults():
+    projection = json_projection(ItemOut)
+
+    assert projection["_id"] == 0
+    assert projection["id"]["$cond"][1] == {"$toString": "$_id"}
+    assert projection["name"]["$cond"][1] == "$name"
+    assert projection["purchased"]["$cond"][1] == {"$ifNull": ["$purchased", False]}
+    assert projection["qty"]["$cond"][1] == {"$ifNull": [{"$multiply": ["$qty", 1.0]}, None]}
+    assert projection["qty"]["$cond"][0] == {
+        "$in": [{"$type": "$qty"}, ["double", "int", "long", "null", "missing"]]
+    }
+    assert "list_completed" not in projection
+
+
+def test_json_projection_covers_every_field_of_the_projected_models():
+    # Every response model served from the projection must build one; a
+    # field type it has no mapping for fails here instead of drifting.
+    for model in PROJECTED_MODELS:
+        projection = json_projection(model)
+        assert set(projection) == {"_id", FALLBACK_FIELD, *model.model_fields}
+
+    class WithTags(ItemOut):
+        tags: list[str] = []
+
+    with pytest.raises(TypeError, match="tags"):
+        json_projection(WithTags)
+
+
+@pytest.mark.asyncio
+async def test_server_json_projection_matches_default_responses(
+    client, db, current_user, monkeypatch
+):
+    now = datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
+    later = datetime(2026, 1, 1, 10, 0, 0, 7000, tzinfo=timezone.utc)
+    list_id = ObjectId()
+    await db.lists.insert_one(
+        {
+            "_id": list_id,
+            "user_id": current_user["id"],
+            "name": "Groceries",
+            "template_id": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+    )
+    await db.items.insert_one(
+        {
+            "_id": ObjectId(),
+            "user_id": current_user["id"],
+            "list_id": str(list_id),
+            "name": "Milk",
+            "qty": 2,
+            "sort_order": 0,
+            "created_at": now,
+            "updated_at": later,
+        }
+    )
+    await db.templates.insert_one(
+        {
+            "user_id": current_user["id"],
+            "name": "Weekly",
+            "created_at": now,
+            "updated_at": now,
+        }
+    )
+    paths = ["/lists", f"/lists/{list_id}/items", "/templates"]
+
+    expected = [(await client.get(path)).content for path in paths]
+    monkeypatch.setattr(settings, "server_json_projection", True)
+    actual = [(await client.get(path)).content for path in paths]
+
+    assert actual == expected
+    assert b'"qty":2.0' in actual[1]
+    assert b'"updated_at":"2026-01-01T10:00:00.007000"' in actual[1]
+
+
+@pytest.mark.asyncio
+async def test_server_json_projection_rejects_documents_missing_required_fields(
+    client, db, current_user, monkeypatch
+):
+    list_id = ObjectId()
+    await db.lists.insert_one(
+        {
+            "_id": list_id,
+            "user_id": current_user["id"],
+            "name": "Groceries",
+            "created_at": datetime(2026, 1, 1, tzinfo=timezone.utc),
+            "updated_at": datetime(2026, 1, 1, tzinfo=timezone.utc),
+        }
+    )
+    await db.items.insert_one(
+        {"user_id": current_user["id"], "list_id": str(list_id), "name": "Milk"}
+    )
+
+    for server_json_projection in (False, True):
+        monkeypatch.setattr(settings, "server_json_projection", server_json_projection)
+        with pytest.raises(ValidationError, match="created_at"):
+            await client.get(f"/lists/{list_id}/items")
+
+
+@pytest.mark.asyncio
+async def test_server_json_projection_renders_every_field_type_like_the_models(
+    client, db, current_user, monkeypatch
+):
+    # Golden documents: one setting every field of the projected models with
+    # each BSON type the projection maps, and one with values pydantic
+    # coerces, which must take the model path and render the same.
+    now = datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
+    later = datetime(2026, 1, 1, 10, 0, 0, 120000, tzinfo=timezone.utc)
+    list_id = ObjectId()
+    await db.lists.insert_many(
+        [
+            {
+                "_id": list_id,
+                "user_id": current_user["id"],
+                "name": "Groceries",
+                "completed": False,
+                "template_id": "template-1",
+                "items_count": Int64(3),
+                "created_at": now,
+                "updated_at": later,
+            },
+            {
+                "user_id": current_user["id"],
+                "name": "Coerced",
+                "completed": 0,
+                "template_id": None,
+                "created_at": "2026-01-01T09:00:00",
+                "updated_at": now,
+            },
+        ]
+    )
+    await db.items.insert_many(
+        [
+            {
+                "user_id": current_user["id"],
+                "list_id": str(list_id),
+                "name": "Milk",
+                "qty": 1.5,
+                "purchased": True,
+                "purchased_at": later,
+                "sort_order": Int64(0),
+                "created_at": now,
+                "updated_at": later,
+            },
+            {
+                "user_id": current_user["id"],
+                "list_id": str(list_id),
+                "name": "Eggs",
+                "qty": Int64(12),
+                "purchased_at": None,
+                "sort_order": 1,
+                "created_at": now,
+                "updated_at": now,
+            },
+            {
+                "user_id": current_user["id"],
+                "list_id": str(list_id),
+                "name": "Flour",
+                "qty": "2",
+                "purchased": 1,
+                "sort_order": 2.0,
+                "created_at": now,
+                "updated_at": now,
+            },
+        ]
+    )
+    await db.templates.insert_many(
+        [
+            {
+                "user_id": current_user["id"],
+                "name": "Weekly",
+                "items_count": 2,
+                "created_at": now,
+                "updated_at": later,
+            },
+            {
+                "user_id": current_user["id"],
+                "name": "Party",
+                "items_count": "4",
+                "created_at": now,
+                "updated_at": now,
+            },
+        ]
+    )
+    paths = ["/lists", f"/lists/{list_id}/items", "/templates"]
+
+    expected = [(await client.get(path)).content for path in paths]
+    monkeypatch.setattr(settings, "server_json_projection", True)
+    actual = [(await client.get(path)).content for path in paths]
+
+    assert actual == expected
+    assert b'"qty":2.0' in actual[1]
+    assert b'"purchased_at":"2026-01-01T10:00:00.120000"' in actual[1]
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from app.cache import ListCache, LocalCacheBackend, list_cache, set_backend
+from app.revisions import bump_revision
+
+
+@pytest.mark.asyncio
+async def test_local_backend_evicts_least_recently_used_by_bytes():
+    backend = LocalCacheBackend(max_bytes=10)
+    await backend.set("a", b"1234")
+    await backend.set("b", b"1234")
+    await backend.get("a")
+    await backend.set("c", b"1234")
+    await backend.set("too-big", b"x" * 11)
+
+    assert await backend.get("b") is None
+    assert await backend.get("a") == b"1234"
+    assert await backend.get("too-big") is None
+    assert backend.stats() == {"entries": 2, "bytes": 8, "max_bytes": 10}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load_and_revisions_gate_hits():
+    cache = ListCache(LocalCacheBackend(max_bytes=1024))
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return f"body-{len(loads)}".encode()
+
+    bodies = await asyncio.gather(
+        *(cache.get_or_load("u", "l", "application/json", 1, load) for _ in range(3))
+    )
+    assert bodies == [b"body-1"] * 3
+    assert await cache.get_or_load("u", "l", "application/json", 1, load) == b"body-1"
+    assert await cache.get_or_load("u", "l", "application/json", 2, load) == b"body-2"
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["coalesced"] == 2
+    assert cache.stats()["hits"] == 1
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        cache.get_or_load("u", "other", "application/json", 1, fail),
+        cache.get_or_load("u", "other", "application/json", 1, fail),
+        return_exceptions=True,
+    )
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+
+
+@pytest.mark.asyncio
+async def test_waiters_load_themselves_when_the_leader_is_cancelled():
+    cache = ListCache(LocalCacheBackend(max_bytes=1024))
+    release = asyncio.Event()
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await release.wait()
+        return b"body"
+
+    leader = asyncio.create_task(cache.get_or_load("u", "l", "application/json", 1, load))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.get_or_load("u", "l", "application/json", 1, load))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await waiter == b"body"
+    assert leader.cancelled()
+    assert len(loads) == 2
+
+
+@pytest.mark.asyncio
+async def test_list_with_items_reads_are_cached_and_invalidated(client, db, current_user):
+    set_backend(LocalCacheBackend(max_bytes=1024 * 1024))
+    created = (await client.post("/lists", json={"name": "Weekly"})).json()
+    item = (
+        await client.post(f"/lists/{created['id']}/items", json={"name": "Milk"})
+    ).json()
+    path = f"/lists/{created['id']}"
+
+    first = await client.get(path, params={"include": "items"})
+    hits = list_cache.hits
+    second = await client.get(path, params={"include": "items"})
+    assert second.json() == first.json()
+    assert list_cache.hits == hits + 1
+
+    await client.post(f"/items/{item['id']}/toggle")
+    assert list_cache.backend.stats()["entries"] == 0
+    toggled = (await client.get(path, params={"include": "items"})).json()
+    assert toggled["items"][0]["purchased"] is True
+
+    # Writes that skip invalidation still bump the revision, which retires
+    # the cached entry.
+    await db.items.update_one({"_id": ObjectId(item["id"])}, {"$set": {"name": "Oat"}})
+    await bump_revision(db, current_user["id"])
+    renamed = (await client.get(path, params={"include": "items"})).json()
+    assert renamed["items"][0]["name"] == "Oat"
+
+    missing = await client.get(f"/lists/{ObjectId()}", params={"include": "items"})
+    assert missing.status_code == 404
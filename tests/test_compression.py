@@ -0,0 +1,56 @@
+import gzip
+
+import brotli
+import pytest
+import zstandard
+
+from app.compression import choose_encoding, compressed_cache
+
+
+def test_choose_encoding_prefers_zstd_then_brotli_then_gzip():
+    assert choose_encoding(None) is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip, br, zstd") == "zstd"
+    assert choose_encoding("gzip, br") == "br"
+    assert choose_encoding("gzip;q=1, br;q=0.5") == "gzip"
+    assert choose_encoding("*, zstd;q=0") == "br"
+
+
+async def _create_completed_lists(client, count):
+    for index in range(count):
+        created = (await client.post("/lists", json={"name": f"Week {index}"})).json()
+        await client.post(f"/lists/{created['id']}/complete")
+
+
+@pytest.mark.asyncio
+async def test_large_responses_are_compressed_and_small_ones_are_not(client):
+    response = await client.get("/lists/completed", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["vary"]
+
+    await _create_completed_lists(client, 20)
+    for encoding, decompress in (
+        ("gzip", gzip.decompress),
+        ("br", brotli.decompress),
+        ("zstd", zstandard.ZstdDecompressor().decompress),
+    ):
+        async with client.stream(
+            "GET", "/lists/completed", headers={"Accept-Encoding": encoding}
+        ) as response:
+            raw = b"".join([chunk async for chunk in response.aiter_raw()])
+        assert response.headers["content-encoding"] == encoding
+        assert int(response.headers["content-length"]) == len(raw)
+        assert len(decompress(raw)) > len(raw)
+
+
+@pytest.mark.asyncio
+async def test_etag_responses_reuse_compressed_bytes(client):
+    compressed_cache.clear()
+    await _create_completed_lists(client, 20)
+
+    first = await client.get("/lists/completed", headers={"Accept-Encoding": "gzip"})
+    second = await client.get("/lists/completed", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["etag"] == second.headers["etag"]
+    assert first.json() == second.json()
+    assert len(compressed_cache) == 1
+    assert compressed_cache.get(first.headers["etag"], "gzip") is not None
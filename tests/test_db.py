@@ -0,0 +1,74 @@
+import os
+
+import pytest
+from pymongo import AsyncMongoClient, ReadPreference, monitoring
+from pymongo.read_preferences import SecondaryPreferred
+
+from app import db as db_module
+from app.config import settings
+from app.db import get_db, stale_read_preference, tolerate_staleness
+
+
+class _CommandRecorder(monitoring.CommandListener):
+    def __init__(self):
+        self.commands = []
+
+    def started(self, event):
+        self.commands.append(event.command)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def test_stale_read_preference_defaults_to_configured_staleness():
+    assert stale_read_preference() == SecondaryPreferred(max_staleness=90)
+    assert stale_read_preference(120).max_staleness == 120
+
+
+@pytest.mark.asyncio
+async def test_stale_reads_fall_back_to_the_primary(db):
+    # On a single-node replica set there is no secondary, so stale reads are
+    # served by the primary and see everything written through `db`.
+    await db.lists.insert_one({"user_id": "user-123", "name": "Weekly"})
+    stale_db = tolerate_staleness()(db=db)
+    assert stale_db.name == db.name
+    assert await stale_db.lists.count_documents({"user_id": "user-123"}) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_db_reads_from_the_primary_whatever_the_client_default(monkeypatch):
+    client = AsyncMongoClient(os.environ["MONGO_URI"], readPreference="secondaryPreferred")
+    monkeypatch.setattr(db_module, "_client", client)
+    try:
+        assert get_db().read_preference == ReadPreference.PRIMARY
+        assert get_db().lists.read_preference == ReadPreference.PRIMARY
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_stale_reads_send_max_staleness_to_the_server(db):
+    stale_db = tolerate_staleness(120)(db=db)
+    assert stale_db.lists.read_preference.document == {
+        "mode": "secondaryPreferred",
+        "maxStalenessSeconds": 120,
+    }
+
+    recorder = _CommandRecorder()
+    client = AsyncMongoClient(os.environ["MONGO_URI"], event_listeners=[recorder])
+    try:
+        if "setName" not in await client.admin.command("hello"):
+            pytest.skip("read preferences are only sent to replica set members")
+        stale_db = tolerate_staleness(120)(db=client[settings.mongo_db])
+        await stale_db.lists.count_documents({"user_id": "user-123"})
+    finally:
+        await client.close()
+
+    (command,) = [command for command in recorder.commands if "aggregate" in command]
+    assert command["$readPreference"] == {
+        "mode": "secondaryPreferred",
+        "maxStalenessSeconds": 120,
+    }
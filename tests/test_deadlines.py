@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from pymongo import _csot
+from pymongo.errors import ExecutionTimeout
+
+from app.config import settings
+from app.db import get_db
+from app.deadlines import DisconnectMiddleware, apply_deadline, request_metrics
+
+
+@pytest.mark.asyncio
+async def test_route_deadlines_reach_the_driver(monkeypatch):
+    monkeypatch.setattr(settings, "request_deadline_seconds", 7.0)
+    monkeypatch.setattr(settings, "route_deadline_seconds", {"/slow": 30.0, "/open": 0})
+    deadline_app = FastAPI(dependencies=[Depends(apply_deadline)])
+
+    @deadline_app.get("/fast")
+    @deadline_app.get("/slow")
+    @deadline_app.get("/open")
+    async def read_timeout():
+        return {"timeout": _csot.get_timeout()}
+
+    transport = ASGITransport(app=deadline_app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        assert (await client.get("/fast")).json() == {"timeout": 7.0}
+        assert (await client.get("/slow")).json() == {"timeout": 30.0}
+        assert (await client.get("/open")).json() == {"timeout": None}
+
+
+class _TimedOutDb:
+    def __getattr__(self, name):
+        return self
+
+    def __getitem__(self, name):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        raise ExecutionTimeout("operation exceeded time limit", 50)
+
+
+@pytest.mark.asyncio
+async def test_deadline_exceeded_returns_504_and_is_counted(app, client):
+    app.dependency_overrides[get_db] = lambda: _TimedOutDb()
+    exceeded = request_metrics.deadline_exceeded
+
+    response = await client.get("/lists")
+
+    assert response.status_code == 504
+    assert response.json() == {"detail": "Request deadline exceeded."}
+    assert request_metrics.deadline_exceeded == exceeded + 1
+
+
+async def _run_until_disconnect(method: str):
+    started = asyncio.Event()
+    outcome = {}
+
+    async def slow_app(scope, receive, send):
+        started.set()
+        try:
+            await asyncio.sleep(0.05)
+            outcome["finished"] = True
+        except asyncio.CancelledError:
+            outcome["cancelled"] = True
+            raise
+
+    async def receive():
+        if not started.is_set():
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await started.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "method": method, "path": "/", "headers": []}
+    await DisconnectMiddleware(slow_app)(scope, receive, send)
+    return outcome
+
+
+@pytest.mark.asyncio
+async def test_reads_are_cancelled_when_the_client_disconnects():
+    disconnects = request_metrics.client_disconnects
+
+    assert await _run_until_disconnect("GET") == {"cancelled": True}
+    assert request_metrics.client_disconnects == disconnects + 1
+
+    assert await _run_until_disconnect("POST") == {"finished": True}
+    assert request_metrics.client_disconnects == disconnects + 1
+
+
+@pytest.mark.asyncio
+async def test_teardown_after_the_response_is_not_cancelled():
+    disconnects = request_metrics.client_disconnects
+    torn_down = asyncio.Event()
+    response_sent = asyncio.Event()
+    teardown_app = FastAPI()
+
+    async def resource():
+        yield "resource"
+        await response_sent.wait()
+        await asyncio.sleep(0.01)
+        torn_down.set()
+
+    @teardown_app.get("/")
+    async def read(value=Depends(resource)):
+        return {"value": value}
+
+    async def receive():
+        # Like uvicorn: the request body first, then `http.disconnect` as
+        # soon as the response has been sent.
+        if not hasattr(receive, "sent"):
+            receive.sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_sent.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and not message.get("more_body"):
+            response_sent.set()
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "raw_path": b"/",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+    }
+    await DisconnectMiddleware(teardown_app)(scope, receive, send)
+
+    assert torn_down.is_set()
+    assert request_metrics.client_disconnects == disconnects
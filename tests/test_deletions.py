@@ -0,0 +1,130 @@
+import asyncio
+from datetime import timedelta
+
+from bson import ObjectId
+import pytest
+
+from app import deletions
+from app.deletions import enqueue_deletion, run_pending_deletions, tombstone
+from app.utils import utcnow
+
+
+@pytest.mark.asyncio
+async def test_tombstone_only_marks_live_parent_once(db):
+    list_id = ObjectId()
+    await db.lists.insert_one({"_id": list_id, "user_id": "user-1"})
+
+    assert await tombstone(db, "lists", {"_id": list_id}) is True
+    assert await tombstone(db, "lists", {"_id": list_id}) is False
+    assert await tombstone(db, "lists", {"_id": ObjectId()}) is False
+
+
+@pytest.mark.asyncio
+async def test_deletion_job_removes_children_in_batches_and_resumes(db):
+    list_id = ObjectId()
+    await db.lists.insert_one({"_id": list_id, "user_id": "user-1"})
+    item_ids = [ObjectId() for _ in range(5)]
+    await db.items.insert_many(
+        [
+            {"_id": item_id, "user_id": "user-1", "list_id": str(list_id)}
+            for item_id in item_ids
+        ]
+    )
+    await db.items.insert_one({"user_id": "user-1", "list_id": "other-list"})
+    await enqueue_deletion(db, "list", str(list_id), "user-1")
+
+    # Simulate a worker that stopped after the first batch of two items.
+    await db.items.delete_many({"_id": {"$in": item_ids[:2]}})
+    await db.deletion_jobs.update_one(
+        {}, {"$set": {"last_id": item_ids[1], "deleted": {"items": 2}}}
+    )
+
+    assert await run_pending_deletions(db, batch_size=2, pause_seconds=0) == 1
+
+    job = await db.deletion_jobs.find_one({})
+    assert job["status"] == "done"
+    assert job["deleted"] == {"items": 5, "lists": 1}
+    assert await db.lists.count_documents({}) == 0
+    assert await db.items.count_documents({"list_id": str(list_id)}) == 0
+    assert await db.items.count_documents({"list_id": "other-list"}) == 1
+
+
+async def _list_with_items(db, count: int) -> ObjectId:
+    list_id = ObjectId()
+    await db.lists.insert_one({"_id": list_id, "user_id": "user-1"})
+    await db.items.insert_many(
+        [{"user_id": "user-1", "list_id": str(list_id)} for _ in range(count)]
+    )
+    return list_id
+
+
+@pytest.mark.asyncio
+async def test_concurrent_workers_claim_each_job_once(db):
+    list_id = await _list_with_items(db, 5)
+    await enqueue_deletion(db, "list", str(list_id), "user-1")
+
+    processed = await asyncio.gather(
+        run_pending_deletions(db, batch_size=2, pause_seconds=0, owner="worker-a"),
+        run_pending_deletions(db, batch_size=2, pause_seconds=0, owner="worker-b"),
+    )
+
+    assert sorted(processed) == [0, 1]
+    job = await db.deletion_jobs.find_one({})
+    assert job["status"] == "done"
+    assert job["deleted"] == {"items": 5, "lists": 1}
+
+
+@pytest.mark.asyncio
+async def test_running_jobs_are_retaken_only_once_their_lease_expires(db):
+    expired_list_id = await _list_with_items(db, 1)
+    leased_list_id = await _list_with_items(db, 1)
+    await enqueue_deletion(db, "list", str(expired_list_id), "user-1")
+    await enqueue_deletion(db, "list", str(leased_list_id), "user-1")
+    now = utcnow()
+    for list_id, lease_expires_at in (
+        (expired_list_id, now - timedelta(seconds=1)),
+        (leased_list_id, now + timedelta(minutes=1)),
+    ):
+        await db.deletion_jobs.update_one(
+            {"parent_id": str(list_id)},
+            {
+                "$set": {
+                    "status": "running",
+                    "owner": "stalled-worker",
+                    "lease_expires_at": lease_expires_at,
+                }
+            },
+        )
+
+    assert await run_pending_deletions(db, pause_seconds=0, owner="worker-a") == 1
+
+    expired = await db.deletion_jobs.find_one({"parent_id": str(expired_list_id)})
+    leased = await db.deletion_jobs.find_one({"parent_id": str(leased_list_id)})
+    assert expired["status"] == "done"
+    assert leased["status"] == "running"
+    assert leased["owner"] == "stalled-worker"
+
+
+@pytest.mark.asyncio
+async def test_worker_stops_when_its_job_is_taken_over(db, monkeypatch):
+    list_id = await _list_with_items(db, 4)
+    await enqueue_deletion(db, "list", str(list_id), "user-1")
+    delete_batch = deletions._delete_batch
+    batches = []
+
+    async def delete_batch_then_lose_lease(*args):
+        batches.append(args)
+        await db.deletion_jobs.update_one({}, {"$set": {"owner": "worker-b"}})
+        return await delete_batch(*args)
+
+    monkeypatch.setattr(deletions, "_delete_batch", delete_batch_then_lose_lease)
+
+    processed = await run_pending_deletions(
+        db, batch_size=2, pause_seconds=0, owner="worker-a"
+    )
+    assert processed == 0
+    assert len(batches) == 1
+    job = await db.deletion_jobs.find_one({})
+    assert job["status"] == "running"
+    assert job["owner"] == "worker-b"
+    assert job["deleted"] == {}
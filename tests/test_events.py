@@ -0,0 +1,113 @@
+import json
+
+from bson import ObjectId
+import pytest
+
+from app.events import EventBus, _event_from_change, bus, event_stream, list_topic
+
+
+async def create_list(client, name="List"):
+    response = await client.post("/lists", json={"name": name})
+    assert response.status_code == 201
+    return response.json()
+
+
+async def never_disconnected():
+    return False
+
+
+def test_bus_delivers_to_topic_subscribers_only():
+    event_bus = EventBus(queue_size=10)
+    first = event_bus.subscribe("list:a")
+    other = event_bus.subscribe("list:b")
+
+    event_bus.publish("list:a", {"type": "item.updated"})
+
+    assert first.queue.get_nowait() == {"type": "item.updated"}
+    assert other.queue.empty()
+
+
+def test_bus_drops_slow_subscriber_and_queues_reset():
+    event_bus = EventBus(queue_size=2)
+    slow = event_bus.subscribe("list:a")
+    fast = event_bus.subscribe("list:a")
+
+    for index in range(2):
+        event_bus.publish("list:a", {"type": "item.updated", "index": index})
+        fast.queue.get_nowait()
+    event_bus.publish("list:a", {"type": "item.updated", "index": 2})
+
+    assert slow.dropped is True
+    assert slow.queue.get_nowait() == {"type": "reset"}
+    assert slow.queue.empty()
+    assert fast.dropped is False
+    assert event_bus.subscriber_count("list:a") == 1
+
+
+@pytest.mark.asyncio
+async def test_event_stream_sends_heartbeats_and_events():
+    event_bus = EventBus(queue_size=10)
+    stream = event_stream("list:a", never_disconnected, 0.01, event_bus)
+    assert event_bus.subscriber_count("list:a") == 0
+
+    assert await anext(stream) == ": heartbeat\n\n"
+
+    event_bus.publish("list:a", {"type": "item.created", "data": {"id": "1"}})
+    chunk = await anext(stream)
+    assert chunk.startswith("event: item.created\ndata: ")
+    assert json.loads(chunk.split("data: ", 1)[1]) == {
+        "type": "item.created",
+        "data": {"id": "1"},
+    }
+    await stream.aclose()
+    assert event_bus.subscriber_count("list:a") == 0
+
+
+@pytest.mark.asyncio
+async def test_item_mutations_publish_list_events(client):
+    created_list = await create_list(client)
+    subscription = bus.subscribe(list_topic(created_list["id"]))
+    try:
+        response = await client.post(
+            f"/lists/{created_list['id']}/items", json={"name": "Milk"}
+        )
+        item = response.json()
+        await client.post(f"/items/{item['id']}/toggle")
+        await client.delete(f"/items/{item['id']}")
+
+        events = [subscription.queue.get_nowait() for _ in range(3)]
+    finally:
+        bus.unsubscribe(subscription)
+
+    assert [event["type"] for event in events] == [
+        "item.created",
+        "item.updated",
+        "item.deleted",
+    ]
+    assert events[1]["data"]["purchased"] is True
+    assert events[2]["data"] == {"id": item["id"]}
+
+
+@pytest.mark.asyncio
+async def test_list_events_404_for_unknown_list(client):
+    response = await client.get(f"/lists/{ObjectId()}/events")
+    assert response.status_code == 404
+
+
+def test_event_from_change_maps_item_update():
+    item_id = ObjectId()
+    change = {
+        "ns": {"db": "shoplist", "coll": "items"},
+        "operationType": "update",
+        "documentKey": {"_id": item_id},
+        "fullDocument": {"_id": item_id, "list_id": "list-1", "name": "Milk"},
+    }
+
+    list_id, event = _event_from_change(change)
+
+    assert list_id == "list-1"
+    assert event == {
+        "type": "item.updated",
+        "list_id": "list-1",
+        "data": {"id": str(item_id), "list_id": "list-1", "name": "Milk"},
+    }
@@ -0,0 +1,117 @@
+import pytest
+from fastapi import HTTPException
+
+from app.fields import field_projection, select_fields
+from app.schemas import ListOut
+
+
+def test_select_fields_keeps_schema_order():
+    assert select_fields(None, ListOut) is None
+    assert select_fields(" name , id,items_count", ListOut) == ["id", "name", "items_count"]
+    assert field_projection(["id", "name"]) == {"_id": 1, "name": 1}
+
+
+def test_select_fields_rejects_unknown_and_empty():
+    with pytest.raises(HTTPException) as exc:
+        select_fields("id,colour,secret", ListOut)
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "Unknown fields: colour, secret."
+
+    with pytest.raises(HTTPException) as exc:
+        select_fields(" , ", ListOut)
+    assert exc.value.detail == "No fields requested."
+
+
+@pytest.mark.asyncio
+async def test_list_reads_return_only_requested_fields(client):
+    created = (await client.post("/lists", json={"name": "Weekly"})).json()
+    await client.post(f"/lists/{created['id']}/items", json={"name": "Milk"})
+
+    response = await client.get("/lists", params={"fields": "id,name"})
+    assert response.status_code == 200
+    assert response.json() == [{"id": created["id"], "name": "Weekly"}]
+
+    response = await client.get(
+        f"/lists/{created['id']}", params={"fields": "items_count,completed"}
+    )
+    assert response.json() == {"completed": False, "items_count": 1}
+
+    response = await client.get(
+        f"/lists/{created['id']}/items", params={"fields": "name,purchased"}
+    )
+    assert response.json() == [{"name": "Milk", "purchased": False}]
+
+    response = await client.get("/lists", params={"fields": "id,owner"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_template_reads_return_only_requested_fields(client):
+    created = (
+        await client.post(
+            "/templates", json={"name": "Weekly", "items": [{"name": "Eggs", "qty": 6}]}
+        )
+    ).json()
+
+    response = await client.get("/templates", params={"fields": "name,items_count"})
+    assert response.json() == [{"name": "Weekly", "items_count": 1}]
+
+    response = await client.get(f"/templates/{created['id']}", params={"fields": "name"})
+    assert response.json() == {"name": "Weekly"}
+
+    response = await client.get(
+        f"/templates/{created['id']}", params={"fields": "id,items"}
+    )
+    body = response.json()
+    assert body["id"] == created["id"]
+    assert [item["name"] for item in body["items"]] == ["Eggs"]
+
+    response = await client.get(
+        f"/templates/{created['id']}/items", params={"fields": "name,qty"}
+    )
+    assert response.json() == [{"name": "Eggs", "qty": 6}]
+
+
+@pytest.mark.asyncio
+async def test_include_items_embeds_sorted_items(client):
+    weekly = (await client.post("/lists", json={"name": "Weekly"})).json()
+    other = (await client.post("/lists", json={"name": "Party"})).json()
+    await client.post(f"/lists/{weekly['id']}/items", json={"name": "Milk", "sort_order": 2})
+    await client.post(f"/lists/{weekly['id']}/items", json={"name": "Eggs", "sort_order": 1})
+
+    response = await client.get(f"/lists/{weekly['id']}", params={"include": "items"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["name"] == "Weekly"
+    assert body["items_count"] == 2
+    assert [item["name"] for item in body["items"]] == ["Eggs", "Milk"]
+    expected_items = (await client.get(f"/lists/{weekly['id']}/items")).json()
+    assert body["items"] == expected_items
+
+    response = await client.get("/lists", params={"include": "items"})
+    by_id = {doc["id"]: doc for doc in response.json()}
+    assert by_id[other["id"]]["items"] == []
+    assert len(by_id[weekly["id"]]["items"]) == 2
+
+    missing = await client.get(
+        "/lists/0123456789abcdef01234567", params={"include": "items"}
+    )
+    assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_include_items_on_templates_and_validation(client):
+    await client.post(
+        "/templates",
+        json={"name": "Weekly", "items": [{"name": "Eggs", "sort_order": 1}]},
+    )
+    response = await client.get("/templates", params={"include": "items"})
+    [template] = response.json()
+    assert template["items_count"] == 1
+    assert [item["name"] for item in template["items"]] == ["Eggs"]
+
+    response = await client.get("/lists", params={"include": "owner"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown include: owner."
+    response = await client.get("/lists", params={"include": "items", "fields": "id"})
+    assert response.status_code == 400
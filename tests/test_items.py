@@ -91,3 +91,55 @@ async def test_delete_item(client, db):
 
     stored = await db.items.find_one({"_id": ObjectId(created_item["id"])})
     assert stored is None
+
+
+@pytest.mark.asyncio
+async def test_item_mutations_follow_list_completed_flag(client, db):
+    created_list = await create_list(client)
+    created_item = await create_item(client, created_list["id"], name="Eggs")
+
+    stored = await db.items.find_one({"_id": ObjectId(created_item["id"])})
+    assert stored["list_completed"] is False
+
+    await client.post(f"/lists/{created_list['id']}/complete")
+    stored = await db.items.find_one({"_id": ObjectId(created_item["id"])})
+    assert stored["list_completed"] is True
+
+    response = await client.post(f"/items/{created_item['id']}/toggle")
+    assert response.status_code == 409
+    response = await client.patch(f"/items/{created_item['id']}", json={})
+    assert response.status_code == 409
+
+    await client.post(f"/lists/{created_list['id']}/activate")
+    stored = await db.items.find_one({"_id": ObjectId(created_item["id"])})
+    assert stored["list_completed"] is False
+
+
+@pytest.mark.asyncio
+async def test_toggle_and_delete_item_404(client):
+    missing_id = str(ObjectId())
+    response = await client.post(f"/items/{missing_id}/toggle")
+    assert response.status_code == 404
+    response = await client.delete(f"/items/{missing_id}")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_items_of_a_deleted_list_cannot_be_mutated_before_cleanup(client, db):
+    created_list = await create_list(client)
+    item = await create_item(client, created_list["id"])
+    response = await client.delete(f"/lists/{created_list['id']}")
+    assert response.status_code == 204
+
+    # The deletion worker has not run, so the item is still stored.
+    assert await db.items.find_one({"_id": ObjectId(item["id"])}) is not None
+    revision = await db.revisions.find_one({})
+    response = await client.patch(f"/items/{item['id']}", json={"name": "Oat Milk"})
+    assert response.status_code == 404
+    response = await client.post(f"/items/{item['id']}/toggle")
+    assert response.status_code == 404
+    response = await client.delete(f"/items/{item['id']}")
+    assert response.status_code == 404
+
+    assert await db.revisions.find_one({}) == revision
+    assert await db.tombstones.count_documents({"collection": "items"}) == 0
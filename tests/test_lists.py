@@ -2,6 +2,8 @@ from bson import ObjectId
 import pytest
 import time_machine
 
+from app.deletions import run_pending_deletions
+
 
 def _strip_utc_suffix(value: str) -> str:
     if value.endswith("Z"):
@@ -218,6 +220,13 @@ async def test_delete_list_deletes_items(client, db):
     response = await client.delete(f"/lists/{created['id']}")
     assert response.status_code == 204
 
+    response = await client.get(f"/lists/{created['id']}")
+    assert response.status_code == 404
+    response = await client.get("/lists")
+    assert response.json() == []
+
+    assert await run_pending_deletions(db, pause_seconds=0) == 1
+
     stored_list = await db.lists.find_one({"_id": ObjectId(created["id"])})
     stored_item = await db.items.find_one({"list_id": created["id"]})
     assert stored_list is None
@@ -267,6 +276,31 @@ async def test_reorder_items_updates_sort_order_by_position(client, db):
     assert [item["sort_order"] for item in stored] == [0, 1, 2]
 
 
+@pytest.mark.asyncio
+async def test_reorder_response_reflects_writes_racing_the_reorder(
+    client, db, monkeypatch
+):
+    created = await create_list(client, name="Reorder")
+    first = await create_item(client, created["id"], name="First")
+    second = await create_item(client, created["id"], name="Second")
+    collection_type = type(db.items)
+    bulk_write = collection_type.bulk_write
+
+    async def toggle_then_bulk_write(self, *args, **kwargs):
+        await db.items.update_one(
+            {"_id": ObjectId(first["id"])}, {"$set": {"purchased": True}}
+        )
+        return await bulk_write(self, *args, **kwargs)
+
+    monkeypatch.setattr(collection_type, "bulk_write", toggle_then_bulk_write)
+    response = await client.post(
+        f"/lists/{created['id']}/items/reorder",
+        json={"item_ids": [second["id"], first["id"]]},
+    )
+
+    assert [item["purchased"] for item in response.json()] == [False, True]
+
+
 @pytest.mark.asyncio
 async def test_reorder_items_requires_complete_item_id_list(client):
     created = await create_list(client, name="Reorder")
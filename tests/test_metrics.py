@@ -0,0 +1,143 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app import metrics
+from app.config import settings
+from app.metrics import Counter, Gauge, Histogram, Registry, merge, render
+
+
+def _registry(monkeypatch) -> Registry:
+    registry = Registry()
+    monkeypatch.setattr(metrics, "registry", registry)
+    return registry
+
+
+def test_render_counters_gauges_and_cumulative_histograms(monkeypatch):
+    registry = _registry(monkeypatch)
+    counter = Counter("jobs", "Jobs run.", ("kind",))
+    counter.inc('say "hi"')
+    Gauge("depth", "Queue depth.", function=lambda: 3)
+    histogram = Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/lists")
+    histogram.observe(0.5, "/lists")
+    histogram.observe(5, "/lists")
+
+    text = render(registry.snapshot())
+
+    assert '# TYPE jobs counter\njobs_total{kind="say \\"hi\\""} 1.0' in text
+    assert "depth 3.0" in text
+    assert 'latency_seconds_bucket{route="/lists",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/lists",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{route="/lists",le="+Inf"} 3' in text
+    assert 'latency_seconds_sum{route="/lists"} 5.55' in text
+    assert 'latency_seconds_count{route="/lists"} 3' in text
+
+
+def test_merge_sums_workers_and_drops_gauges_of_dead_ones(monkeypatch):
+    registry = _registry(monkeypatch)
+    counter = Counter("jobs", "Jobs run.")
+    gauge = Gauge("in_flight", "In flight.")
+    histogram = Histogram("latency_seconds", "Latency.", buckets=(1.0,))
+    counter.inc(amount=2)
+    gauge.inc()
+    histogram.observe(0.5)
+    snapshot = registry.snapshot()
+
+    merged = merge([(snapshot, True), (snapshot, False)])
+
+    assert merged["jobs"]["values"] == [[[], 4.0]]
+    assert merged["in_flight"]["values"] == [[[], 1.0]]
+    assert merged["latency_seconds"]["values"] == [[[], [2, 0, 1.0, 2]]]
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_requests_by_route_template(client):
+    created = (await client.post("/lists", json={"name": "Weekly"})).json()
+    await client.get(f"/lists/{created['id']}")
+    await client.get("/missing")
+
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/lists/{list_id}",status="200"}'
+        in response.text
+    )
+    assert 'route="unmatched",status="404"' in response.text
+    assert "http_requests_in_flight 1.0" in response.text
+    assert "mongodb_pool_connections_open" in response.text
+
+
+@pytest.mark.asyncio
+async def test_metrics_are_merged_across_workers(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "metrics_dir", str(tmp_path))
+    monkeypatch.setattr(metrics, "_is_alive", lambda pid: False)
+    other = {
+        "jobs": {
+            "type": "counter",
+            "help": "Jobs run.",
+            "labelnames": [],
+            "buckets": [],
+            "values": [[[], 5.0]],
+        }
+    }
+    (tmp_path / "metrics-1.json").write_text(metrics.json.dumps(other))
+
+    response = await client.get("/metrics")
+
+    assert "jobs_total 5.0" in response.text
+    assert (tmp_path / f"metrics-{metrics.os.getpid()}.json").exists()
+
+
+@pytest.mark.asyncio
+async def test_flusher_writes_snapshots_until_cancelled(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "metrics_flush_seconds", 60)
+    path = tmp_path / f"metrics-{metrics.os.getpid()}.json"
+    flusher = asyncio.create_task(metrics.run_metrics_flusher(str(tmp_path)))
+    for _ in range(100):
+        if path.exists():
+            break
+        await asyncio.sleep(0.01)
+    path.unlink()
+
+    flusher.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flusher
+
+    assert "http_request_duration_seconds" in metrics.json.loads(path.read_text())
+
+
+@pytest.mark.asyncio
+async def test_request_counters_are_exported(client):
+    response = await client.get("/metrics")
+
+    for name in (
+        "http_deadline_exceeded",
+        "http_client_disconnects",
+        "http_requests_shed",
+        "http_requests_coalesced",
+        "list_cache_lookups",
+        "list_cache_bytes",
+    ):
+        assert f"# TYPE {name} " in response.text
+
+
+def test_command_latency_is_recorded_per_collection_and_command():
+    listener = metrics.CommandMetrics()
+    key = ("lists", "find")
+    before = metrics.MONGO_COMMAND_DURATION._values.get(key, [0])[-1]
+
+    listener.started(
+        SimpleNamespace(command={"find": "lists"}, command_name="find", request_id=7)
+    )
+    listener.succeeded(SimpleNamespace(command_name="find", request_id=7, duration_micros=1500))
+    listener.started(
+        SimpleNamespace(command={"find": "lists"}, command_name="find", request_id=8)
+    )
+    listener.failed(SimpleNamespace(command_name="find", request_id=8, duration_micros=900))
+
+    assert metrics.MONGO_COMMAND_DURATION._values[key][-1] == before + 2
+    assert metrics.MONGO_COMMAND_FAILURES._values[key] >= 1
@@ -0,0 +1,81 @@
+from bson import ObjectId
+import msgpack
+import pytest
+
+from app.negotiation import accepts_msgpack
+
+MSGPACK_HEADERS = {"Accept": "application/msgpack"}
+
+
+def test_accepts_msgpack_requires_explicit_preference():
+    assert accepts_msgpack("application/msgpack")
+    assert accepts_msgpack("application/msgpack, application/json;q=0.5")
+    assert not accepts_msgpack(None)
+    assert not accepts_msgpack("*/*")
+    assert not accepts_msgpack("application/json, application/msgpack;q=0.5")
+    assert not accepts_msgpack("application/msgpack;q=0")
+
+
+@pytest.mark.asyncio
+async def test_msgpack_request_body_and_model_response(client):
+    response = await client.post(
+        "/lists",
+        content=msgpack.packb({"name": "Weekly"}),
+        headers={"Content-Type": "application/msgpack", **MSGPACK_HEADERS},
+    )
+    assert response.status_code == 201
+    assert response.headers["content-type"] == "application/msgpack"
+    created = msgpack.unpackb(response.content)
+    assert created["name"] == "Weekly"
+
+    json_body = (await client.get("/lists")).json()
+    response = await client.get("/lists", headers=MSGPACK_HEADERS)
+    assert response.headers["content-type"] == "application/msgpack"
+    assert "Accept" in response.headers["vary"]
+    assert msgpack.unpackb(response.content) == json_body
+
+    response = await client.get(
+        f"/lists/{created['id']}", params={"fields": "id,name"}, headers=MSGPACK_HEADERS
+    )
+    assert msgpack.unpackb(response.content) == {"id": created["id"], "name": "Weekly"}
+
+
+@pytest.mark.asyncio
+async def test_msgpack_packs_plain_and_error_responses(client, monkeypatch):
+    # Nothing is rendered as JSON on the way to MessagePack.
+    monkeypatch.setattr("pydantic_core.from_json", None)
+    monkeypatch.setattr("pydantic_core.to_json", None)
+
+    response = await client.get("/me", headers=MSGPACK_HEADERS)
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content)["id"] == "user-123"
+
+    response = await client.get("/", headers=MSGPACK_HEADERS)
+    assert msgpack.unpackb(response.content) == {"status": "ok"}
+
+    response = await client.get(f"/lists/{ObjectId()}", headers=MSGPACK_HEADERS)
+    assert response.status_code == 404
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == {"detail": "List not found."}
+
+    response = await client.post(
+        "/lists",
+        content=msgpack.packb({"name": ""}),
+        headers={"Content-Type": "application/msgpack", **MSGPACK_HEADERS},
+    )
+    assert response.status_code == 422
+    assert msgpack.unpackb(response.content)["detail"][0]["loc"] == ["body", "name"]
+
+
+@pytest.mark.asyncio
+async def test_invalid_msgpack_body_is_rejected(client):
+    response = await client.post(
+        "/lists",
+        content=b"\xc1",
+        headers={"Content-Type": "application/msgpack"},
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid MessagePack body."}
+
+    response = await client.get("/lists")
+    assert response.headers["content-type"] == "application/json"
@@ -0,0 +1,78 @@
+import pytest
+from pymongo import monitoring
+
+from app.auth import get_current_user
+from app.main import app
+from app.metrics import command_metrics
+from app.pool import PoolMetrics, client_options, pool_metrics, warm_pool
+
+ADDRESS = ("localhost", 27017)
+
+
+def test_pool_metrics_track_occupancy_and_checkout_waits():
+    metrics = PoolMetrics()
+    for connection_id in (1, 2):
+        metrics.connection_created(monitoring.ConnectionCreatedEvent(ADDRESS, connection_id))
+    metrics.connection_check_out_started(monitoring.ConnectionCheckOutStartedEvent(ADDRESS))
+    metrics.connection_check_out_started(monitoring.ConnectionCheckOutStartedEvent(ADDRESS))
+    metrics.connection_check_out_started(monitoring.ConnectionCheckOutStartedEvent(ADDRESS))
+    metrics.connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDRESS, 1, 0.002))
+    metrics.connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDRESS, 2, 0.010))
+
+    stats = metrics.stats()
+    assert stats["open"] == 2
+    assert stats["in_use"] == 2
+    assert stats["waiting"] == 1
+    assert stats["wait_ms_max"] == pytest.approx(10)
+
+    metrics.connection_check_out_failed(
+        monitoring.ConnectionCheckOutFailedEvent(ADDRESS, "timeout", 0.030)
+    )
+    metrics.connection_checked_in(monitoring.ConnectionCheckedInEvent(ADDRESS, 1))
+    metrics.connection_closed(monitoring.ConnectionClosedEvent(ADDRESS, 1, "idle"))
+
+    stats = metrics.stats()
+    assert stats["open"] == 1
+    assert stats["in_use"] == 1
+    assert stats["waiting"] == 0
+    assert stats["checkouts"] == 2
+    assert stats["checkout_failures"] == 1
+    assert stats["wait_ms_avg"] == pytest.approx(14)
+    assert stats["wait_ms_p99"] == pytest.approx(30)
+
+
+def test_client_options_follow_settings(monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "mongo_wait_queue_timeout_ms", 500)
+    monkeypatch.setattr(settings, "mongo_compressors", "")
+    options = client_options()
+    assert options["waitQueueTimeoutMS"] == 500
+    assert "compressors" not in options
+    assert options["event_listeners"] == [pool_metrics, command_metrics]
+
+
+@pytest.mark.asyncio
+async def test_warm_pool_pings_once_per_connection():
+    pings = []
+
+    class Admin:
+        async def command(self, name):
+            pings.append(name)
+
+    class Client:
+        admin = Admin()
+
+    await warm_pool(Client(), 3)
+    assert pings == ["ping"] * 3
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_require_admin(client, current_user):
+    response = await client.get("/me/admin/pool")
+    assert response.status_code == 403
+
+    app.dependency_overrides[get_current_user] = lambda: {**current_user, "admin": True}
+    response = await client.get("/me/admin/pool")
+    assert response.status_code == 200
+    assert response.json()["max_pool_size"] == 100
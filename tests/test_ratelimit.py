@@ -0,0 +1,65 @@
+import pytest
+
+from app.config import settings
+from app.ratelimit import (
+    LocalRateLimitBackend,
+    MongoRateLimitBackend,
+    route_cost,
+    set_backend,
+)
+
+
+def test_route_costs():
+    assert route_cost("GET", "/lists/{list_id}") == 1
+    assert route_cost("POST", "/lists") == 2
+    assert route_cost("POST", "/lists/{list_id}/items/reorder") == 10
+    assert route_cost("POST", "/templates/{template_id}/create-list") == 10
+
+
+@pytest.mark.asyncio
+async def test_local_buckets_refill_and_idle_ones_are_evicted(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.ratelimit.time.monotonic", lambda: now[0])
+    backend = LocalRateLimitBackend()
+
+    assert await backend.take("a", 8, 10, 1.0, None) == (True, 2)
+    assert await backend.take("a", 3, 10, 1.0, None) == (False, 2)
+    now[0] += 1
+    assert await backend.take("a", 3, 10, 1.0, None) == (True, 0)
+    assert await backend.take("b", 1, 10, 1.0, None) == (True, 9)
+
+    now[0] += 10
+    await backend.take("c", 1, 10, 1.0, None)
+    assert len(backend) == 1
+
+
+@pytest.mark.asyncio
+async def test_mongo_backend_shares_a_window_counter(db):
+    backend = MongoRateLimitBackend()
+    assert await backend.take("user", 6, 10, 1.0, db) == (True, 4)
+    assert await backend.take("user", 6, 10, 1.0, db) == (False, 4)
+    # The rejected request did not use up the window.
+    assert await backend.take("user", 4, 10, 1.0, db) == (True, 0)
+    assert await backend.take("user", 11, 10, 1.0, db) == (False, 0)
+
+
+@pytest.mark.asyncio
+async def test_requests_carry_rate_limit_headers_and_get_429(client, monkeypatch):
+    monkeypatch.setattr(settings, "rate_limit_burst", 3)
+    monkeypatch.setattr(settings, "rate_limit_per_second", 0.5)
+    set_backend(LocalRateLimitBackend())
+
+    first = await client.get("/lists")
+    assert first.headers["ratelimit-limit"] == "3"
+    assert first.headers["ratelimit-remaining"] == "2"
+
+    created = await client.post("/lists", json={"name": "Weekly"})
+    assert created.status_code == 201
+    assert created.headers["ratelimit-remaining"] == "0"
+
+    limited = await client.get("/lists")
+    assert limited.status_code == 429
+    assert limited.headers["retry-after"] == "2"
+    assert "ratelimit-reset" in limited.headers
+
+    assert (await client.get("/")).status_code == 200
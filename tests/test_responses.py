@@ -0,0 +1,53 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app.responses import model_response, render_model
+from app.schemas import ItemOut
+
+
+def test_render_model_matches_jsonable_encoder_and_drops_extra_fields():
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    content = [
+        {
+            "id": "item-1",
+            "user_id": "user-1",
+            "list_id": "list-1",
+            "name": "Milk",
+            "created_at": now,
+            "updated_at": now,
+            "list_completed": False,
+        }
+    ]
+
+    rendered = json.loads(render_model(list[ItemOut], content))
+
+    expected = jsonable_encoder([ItemOut.model_validate(doc) for doc in content])
+    assert rendered == expected
+    assert "list_completed" not in rendered[0]
+
+
+def test_model_response_sets_status_and_media_type():
+    response = model_response(list[ItemOut], [], status_code=201)
+    assert response.status_code == 201
+    assert response.media_type == "application/json"
+    assert response.body == b"[]"
+
+
+@pytest.mark.asyncio
+async def test_openapi_keeps_response_model_for_fast_routes(client):
+    response = await client.get("/openapi.json")
+    schema = response.json()["paths"]["/lists/{list_id}/items"]["get"]
+    content = schema["responses"]["200"]["content"]["application/json"]
+    assert content["schema"]["items"]["$ref"] == "#/components/schemas/ItemOut"
+
+
+@pytest.mark.asyncio
+async def test_openapi_documents_lists_with_items(client):
+    response = await client.get("/openapi.json")
+    schema = response.json()["paths"]["/lists/{list_id}"]["get"]
+    content = schema["responses"]["200"]["content"]["application/json"]
+    refs = {option["$ref"] for option in content["schema"]["anyOf"]}
+    assert refs == {"#/components/schemas/ListOut", "#/components/schemas/ListDetailOut"}
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from app.revisions import bump_revision, get_revision, notifier
+
+
+@pytest.mark.asyncio
+async def test_bump_revision_increments_per_user(db):
+    assert await get_revision(db, "user-1") == 0
+    assert await bump_revision(db, "user-1") == 1
+    assert await bump_revision(db, "user-1") == 2
+    assert await get_revision(db, "user-2") == 0
+
+
+@pytest.mark.asyncio
+async def test_revision_returns_immediately_when_already_ahead(client):
+    await client.post("/lists", json={"name": "Groceries"})
+
+    response = await client.get("/me/revision", params={"after": 0, "wait": 30})
+
+    assert response.status_code == 200
+    assert response.json() == {"revision": 1, "changed": True}
+
+
+@pytest.mark.asyncio
+async def test_revision_times_out_without_changes(client):
+    response = await client.get("/me/revision", params={"after": 0, "wait": 0.01})
+
+    assert response.json() == {"revision": 0, "changed": False}
+
+
+@pytest.mark.asyncio
+async def test_revision_long_poll_wakes_on_mutation(client, current_user):
+    waiter = asyncio.create_task(
+        client.get("/me/revision", params={"after": 0, "wait": 5})
+    )
+    while not notifier.waiter_count(current_user["id"]):
+        await asyncio.sleep(0)
+
+    await client.post("/templates", json={"name": "Weekly"})
+    response = await asyncio.wait_for(waiter, timeout=1)
+
+    assert response.json() == {"revision": 1, "changed": True}
+    assert notifier.waiter_count(current_user["id"]) == 0
+
+
+@pytest.mark.asyncio
+async def test_revision_rejects_excessive_wait(client):
+    response = await client.get("/me/revision", params={"wait": 600})
+    assert response.status_code == 422
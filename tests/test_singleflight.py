@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import pytest
+
+from app.auth import verified_principals
+from app.metrics import REQUEST_DURATION
+from app.singleflight import COALESCED_REQUESTS
+from app.revisions import bump_revision, notifier
+
+
+async def _wait_for_waiters(user_id: str, count: int) -> None:
+    for _ in range(100):
+        if notifier.waiter_count(user_id) >= count:
+            return
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_gets_share_one_handler_run(client, db, current_user):
+    headers = {"Authorization": "Bearer phone"}
+    params = {"after": 0, "wait": 5}
+    requests = [
+        asyncio.create_task(client.get("/me/revision", params=params, headers=headers))
+        for _ in range(3)
+    ]
+    await _wait_for_waiters(current_user["id"], 1)
+    await asyncio.sleep(0.05)
+    assert notifier.waiter_count(current_user["id"]) == 1
+
+    await bump_revision(db, current_user["id"])
+    responses = await asyncio.gather(*requests)
+    assert [response.json() for response in responses] == [
+        {"revision": 1, "changed": True}
+    ] * 3
+
+
+@pytest.mark.asyncio
+async def test_coalesced_requests_are_counted_under_the_route_template(
+    client, db, current_user
+):
+    key = ("GET", "/me/revision", "200")
+    observed = REQUEST_DURATION._values.get(key, [0])[-1]
+    coalesced = COALESCED_REQUESTS._values.get((), 0)
+    headers = {"Authorization": "Bearer phone"}
+    params = {"after": 0, "wait": 5}
+    requests = [
+        asyncio.create_task(client.get("/me/revision", params=params, headers=headers))
+        for _ in range(3)
+    ]
+    await _wait_for_waiters(current_user["id"], 1)
+    await asyncio.sleep(0.05)
+
+    await bump_revision(db, current_user["id"])
+    await asyncio.gather(*requests)
+
+    assert REQUEST_DURATION._values[key][-1] == observed + 3
+    assert COALESCED_REQUESTS._values[()] == coalesced + 2
+
+
+@pytest.mark.asyncio
+async def test_requests_with_different_credentials_are_not_coalesced(
+    client, db, current_user
+):
+    params = {"after": 0, "wait": 5}
+    requests = [
+        asyncio.create_task(
+            client.get("/me/revision", params=params, headers={"Authorization": token})
+        )
+        for token in ("Bearer phone", "Bearer tablet")
+    ]
+    requests.append(asyncio.create_task(client.get("/me/revision", params=params)))
+    await _wait_for_waiters(current_user["id"], 3)
+    assert notifier.waiter_count(current_user["id"]) == 3
+
+    await bump_revision(db, current_user["id"])
+    await asyncio.gather(*requests)
+
+
+@pytest.mark.asyncio
+async def test_different_tokens_of_one_verified_user_are_coalesced(
+    client, db, current_user
+):
+    expires_at = time.time() + 3600
+    verified_principals.add("phone-token", "sub-123", expires_at)
+    verified_principals.add("laptop-token", "sub-123", expires_at)
+    params = {"after": 0, "wait": 5}
+    requests = [
+        asyncio.create_task(
+            client.get("/me/revision", params=params, headers={"Authorization": token})
+        )
+        for token in ("Bearer phone-token", "Bearer laptop-token")
+    ]
+    await _wait_for_waiters(current_user["id"], 1)
+    await asyncio.sleep(0.05)
+    assert notifier.waiter_count(current_user["id"]) == 1
+
+    await bump_revision(db, current_user["id"])
+    responses = await asyncio.gather(*requests)
+    assert [response.json() for response in responses] == [
+        {"revision": 1, "changed": True}
+    ] * 2
@@ -0,0 +1,296 @@
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+import pytest
+import time_machine
+
+from app.routers import sync
+
+
+START = datetime(2026, 3, 1, 9, 0, tzinfo=timezone.utc)
+
+
+async def create_list(client, name="List"):
+    response = await client.post("/lists", json={"name": name})
+    assert response.status_code == 201
+    return response.json()
+
+
+async def create_item(client, list_id, name="Milk"):
+    response = await client.post(f"/lists/{list_id}/items", json={"name": name})
+    assert response.status_code == 201
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_sync_without_token_returns_full_snapshot(client):
+    with time_machine.travel(START, tick=False):
+        created_list = await create_list(client, name="Groceries")
+        await create_item(client, created_list["id"], name="Milk")
+        template = await client.post(
+            "/templates", json={"name": "Weekly", "items": [{"name": "Eggs"}]}
+        )
+        assert template.status_code == 201
+
+        response = await client.get("/sync")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["reset"] is True
+    assert [doc["name"] for doc in data["lists"]] == ["Groceries"]
+    assert data["lists"][0]["items_count"] == 1
+    assert [doc["name"] for doc in data["items"]] == ["Milk"]
+    assert [doc["name"] for doc in data["templates"]] == ["Weekly"]
+    assert [doc["name"] for doc in data["template_items"]] == ["Eggs"]
+    assert data["deleted"] == []
+    assert data["token"]
+
+
+@pytest.mark.asyncio
+async def test_sync_with_token_returns_only_changes_and_deletes(client):
+    with time_machine.travel(START, tick=False):
+        created_list = await create_list(client)
+        milk = await create_item(client, created_list["id"], name="Milk")
+        bread = await create_item(client, created_list["id"], name="Bread")
+
+    with time_machine.travel(START + timedelta(minutes=1), tick=False):
+        token = (await client.get("/sync")).json()["token"]
+
+    with time_machine.travel(START + timedelta(minutes=5), tick=False):
+        response = await client.get("/sync", params={"since": token})
+        data = response.json()
+        assert data["reset"] is False
+        assert data["lists"] == []
+        assert data["items"] == []
+        token = data["token"]
+
+    with time_machine.travel(START + timedelta(minutes=10), tick=False):
+        await client.post(f"/items/{milk['id']}/toggle")
+        await client.delete(f"/items/{bread['id']}")
+
+    with time_machine.travel(START + timedelta(minutes=15), tick=False):
+        response = await client.get("/sync", params={"since": token})
+
+    data = response.json()
+    assert [doc["id"] for doc in data["items"]] == [milk["id"]]
+    assert data["items"][0]["purchased"] is True
+    assert [(doc["collection"], doc["id"]) for doc in data["deleted"]] == [
+        ("items", bread["id"])
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sync_hides_children_of_deleted_list(client):
+    with time_machine.travel(START, tick=False):
+        created_list = await create_list(client)
+        await create_item(client, created_list["id"])
+
+    with time_machine.travel(START + timedelta(minutes=1), tick=False):
+        token = (await client.get("/sync")).json()["token"]
+
+    with time_machine.travel(START + timedelta(minutes=10), tick=False):
+        await client.delete(f"/lists/{created_list['id']}")
+        response = await client.get("/sync", params={"since": token})
+
+    data = response.json()
+    assert data["lists"] == []
+    assert data["items"] == []
+    assert [(doc["collection"], doc["id"]) for doc in data["deleted"]] == [
+        ("lists", created_list["id"])
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sync_with_expired_token_resets(client):
+    with time_machine.travel(START, tick=False):
+        await create_list(client)
+        token = (await client.get("/sync")).json()["token"]
+
+    with time_machine.travel(START + timedelta(days=60), tick=False):
+        response = await client.get("/sync", params={"since": token})
+
+    data = response.json()
+    assert data["reset"] is True
+    assert len(data["lists"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_rejects_invalid_token(client):
+    response = await client.get("/sync", params={"since": "not-a-token"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid sync token."
+
+
+@pytest.mark.asyncio
+async def test_sync_ops_applies_batch_in_order(client, db):
+    created_list = await create_list(client)
+    existing = await create_item(client, created_list["id"], name="Milk")
+    new_item_id = str(ObjectId())
+
+    response = await client.post(
+        "/sync/ops",
+        json={
+            "operations": [
+                {
+                    "idempotency_key": "op-1",
+                    "op": "create",
+                    "list_id": created_list["id"],
+                    "item_id": new_item_id,
+                    "item": {"name": "Bread"},
+                },
+                {"idempotency_key": "op-2", "op": "toggle", "item_id": new_item_id},
+                {
+                    "idempotency_key": "op-3",
+                    "op": "update",
+                    "item_id": existing["id"],
+                    "changes": {"name": "Oat Milk"},
+                },
+                {
+                    "idempotency_key": "op-4",
+                    "op": "reorder",
+                    "list_id": created_list["id"],
+                    "item_ids": [new_item_id, existing["id"]],
+                },
+                {"idempotency_key": "op-5", "op": "delete", "item_id": existing["id"]},
+                {"idempotency_key": "op-6", "op": "toggle", "item_id": str(ObjectId())},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == [200, 200, 200, 200, 200, 404]
+    assert results[0]["id"] == new_item_id
+    assert not any(result["replayed"] for result in results)
+
+    stored = await db.items.find_one({"_id": ObjectId(new_item_id)})
+    assert stored["name"] == "Bread"
+    assert stored["purchased"] is True
+    assert stored["sort_order"] == 0
+    assert stored["list_completed"] is False
+    assert await db.items.find_one({"_id": ObjectId(existing["id"])}) is None
+    assert await db.tombstones.count_documents({"doc_id": existing["id"]}) == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_ops_replays_idempotency_keys(client, db):
+    await db.idempotency_keys.create_index([("user_id", 1), ("key", 1)], unique=True)
+    created_list = await create_list(client)
+    operations = [
+        {
+            "idempotency_key": "create-1",
+            "op": "create",
+            "list_id": created_list["id"],
+            "item": {"name": "Bread"},
+        }
+    ]
+
+    first = await client.post("/sync/ops", json={"operations": operations})
+    second = await client.post("/sync/ops", json={"operations": operations})
+
+    assert first.json()["results"][0]["replayed"] is False
+    replay = second.json()["results"][0]
+    assert replay["replayed"] is True
+    assert replay["status"] == 200
+    assert replay["id"] == first.json()["results"][0]["id"]
+    assert await db.items.count_documents({"list_id": created_list["id"]}) == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_ops_retry_after_partial_failure_does_not_apply_twice(
+    client, db, monkeypatch
+):
+    await db.idempotency_keys.create_index([("user_id", 1), ("key", 1)], unique=True)
+    created_list = await create_list(client)
+    toggled = await create_item(client, created_list["id"], name="Milk")
+    deleted = await create_item(client, created_list["id"], name="Eggs")
+    operations = [
+        {"idempotency_key": "toggle-1", "op": "toggle", "item_id": toggled["id"]},
+        {
+            "idempotency_key": "create-1",
+            "op": "create",
+            "list_id": created_list["id"],
+            "item": {"name": "Bread"},
+        },
+        {"idempotency_key": "delete-1", "op": "delete", "item_id": deleted["id"]},
+    ]
+    record_tombstones = sync.record_tombstones
+
+    async def fail_after_item_writes(*args):
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(sync, "record_tombstones", fail_after_item_writes)
+    with pytest.raises(RuntimeError):
+        await client.post("/sync/ops", json={"operations": operations})
+    monkeypatch.setattr(sync, "record_tombstones", record_tombstones)
+
+    response = await client.post("/sync/ops", json={"operations": operations})
+
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == [200, 200, 200]
+    assert not any(result["replayed"] for result in results)
+    stored = await db.items.find_one({"_id": ObjectId(toggled["id"])})
+    assert stored["purchased"] is True
+    assert await db.items.count_documents({"name": "Bread"}) == 1
+    assert await db.items.find_one({"_id": ObjectId(deleted["id"])}) is None
+    assert await db.tombstones.count_documents({"doc_id": deleted["id"]}) == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_ops_take_over_keys_whose_lease_expired(client, db, current_user):
+    await db.idempotency_keys.create_index([("user_id", 1), ("key", 1)], unique=True)
+    created_list = await create_list(client)
+    item = await create_item(client, created_list["id"])
+    now = datetime.now(timezone.utc)
+    await db.idempotency_keys.insert_many(
+        [
+            {
+                "user_id": current_user["id"],
+                "key": key,
+                "created_at": now,
+                "lease_expires_at": lease_expires_at,
+            }
+            for key, lease_expires_at in (
+                ("expired", now - timedelta(seconds=1)),
+                ("leased", now + timedelta(minutes=1)),
+            )
+        ]
+    )
+
+    response = await client.post(
+        "/sync/ops",
+        json={
+            "operations": [
+                {"idempotency_key": key, "op": "toggle", "item_id": item["id"]}
+                for key in ("expired", "leased")
+            ]
+        },
+    )
+
+    expired, leased = response.json()["results"]
+    assert expired["status"] == 200
+    assert expired["replayed"] is False
+    assert leased["status"] == 409
+    assert leased["detail"] == "Operation is still being applied."
+    stored = await db.items.find_one({"_id": ObjectId(item["id"])})
+    assert stored["purchased"] is True
+
+
+@pytest.mark.asyncio
+async def test_sync_ops_rejects_mutations_on_completed_list(client):
+    created_list = await create_list(client)
+    item = await create_item(client, created_list["id"])
+    await client.post(f"/lists/{created_list['id']}/complete")
+
+    response = await client.post(
+        "/sync/ops",
+        json={
+            "operations": [
+                {"idempotency_key": "toggle-1", "op": "toggle", "item_id": item["id"]}
+            ]
+        },
+    )
+    result = response.json()["results"][0]
+    assert result["status"] == 409
+    assert result["detail"] == (
+        "Completed lists are read-only. Activate the list to edit items."
+    )
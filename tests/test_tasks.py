@@ -1,6 +1,10 @@
 import pytest
 
-from app.tasks import set_user_admin_by_email, toggle_user_approved_by_email
+from app.tasks import (
+    set_user_admin_by_email,
+    sync_items_list_completed,
+    toggle_user_approved_by_email,
+)
 
 
 @pytest.mark.asyncio
@@ -69,3 +73,19 @@ async def test_set_user_admin_by_email_returns_none_when_user_not_found(db):
         is_admin=True,
     )
     assert admin is None
+
+
+@pytest.mark.asyncio
+async def test_sync_items_list_completed_copies_list_state(db):
+    completed = await db.lists.insert_one({"user_id": "user-1", "completed": True})
+    active = await db.lists.insert_one({"user_id": "user-1", "completed": False})
+    await db.items.insert_one({"user_id": "user-1", "list_id": str(completed.inserted_id)})
+    await db.items.insert_one({"user_id": "user-1", "list_id": str(active.inserted_id)})
+
+    modified = await sync_items_list_completed(db=db)
+    assert modified == 2
+
+    stored = await db.items.find_one({"list_id": str(completed.inserted_id)})
+    assert stored["list_completed"] is True
+    stored = await db.items.find_one({"list_id": str(active.inserted_id)})
+    assert stored["list_completed"] is False
@@ -2,6 +2,8 @@ from bson import ObjectId
 import pytest
 import time_machine
 
+from app.deletions import run_pending_deletions
+
 
 def _strip_utc_suffix(value: str) -> str:
     if value.endswith("Z"):
@@ -110,6 +112,11 @@ async def test_delete_template_deletes_template_items(client, db):
     response = await client.delete(f"/templates/{created['id']}")
     assert response.status_code == 204
 
+    response = await client.get(f"/templates/{created['id']}")
+    assert response.status_code == 404
+
+    assert await run_pending_deletions(db, pause_seconds=0) == 1
+
     stored_template = await db.templates.find_one({"_id": ObjectId(created["id"])})
     stored_items = await db.template_items.find_one({"template_id": created["id"]})
     assert stored_template is None
@@ -0,0 +1,87 @@
+import asyncio
+import re
+from datetime import datetime, timezone
+
+import pytest
+
+from app import auth
+from app.config import settings
+from app.timing import RequestTimings, _current, measure, record, record_db_command
+
+SEGMENTS = re.compile(
+    r'auth;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ commands", handler;dur=[\d.]+, '
+    r"serialize;dur=[\d.]+, total;dur=[\d.]+"
+)
+
+
+def test_header_attributes_the_remainder_to_the_handler():
+    timings = RequestTimings()
+    timings.add("auth", 0.002)
+    timings.add("serialize", 0.001)
+    record_token = _current.set(timings)
+    try:
+        record_db_command(0.003)
+        record_db_command(0.001)
+    finally:
+        _current.reset(record_token)
+
+    assert timings.header(0.010) == (
+        'auth;dur=2.00, db;dur=4.00;desc="2 commands", handler;dur=3.00, '
+        "serialize;dur=1.00, total;dur=10.00"
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_keep_separate_timings():
+    async def request(seconds: float) -> RequestTimings:
+        timings = RequestTimings()
+        _current.set(timings)
+        await asyncio.sleep(0)
+        record("auth", seconds)
+        with measure("serialize"):
+            await asyncio.sleep(0)
+        return timings
+
+    first, second = await asyncio.gather(request(0.001), request(0.002))
+    assert first.durations["auth"] == 0.001
+    assert second.durations["auth"] == 0.002
+    assert set(first.durations) == {"auth", "serialize"}
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header_when_enabled_globally(client, monkeypatch):
+    assert "server-timing" not in (await client.get("/lists")).headers
+
+    monkeypatch.setattr(settings, "server_timing", True)
+    response = await client.get("/lists")
+    assert SEGMENTS.fullmatch(response.headers["server-timing"])
+    assert response.headers["timing-allow-origin"] == settings.chopin_list_fe_url
+
+
+@pytest.mark.asyncio
+async def test_admins_can_ask_for_server_timing(app, client, db, monkeypatch):
+    def fake_verify(*args, **kwargs):
+        return {"sub": "sub-admin", "email": "admin@example.com", "iss": "accounts.google.com"}
+
+    monkeypatch.setattr(auth.id_token, "verify_oauth2_token", fake_verify)
+    app.dependency_overrides.pop(auth.get_current_user)
+    await db.users.insert_one(
+        {
+            "google_sub": "sub-admin",
+            "approved": True,
+            "admin": False,
+            "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        }
+    )
+    headers = {"Authorization": "Bearer token", "X-Server-Timing": "1"}
+
+    response = await client.get("/me", headers=headers)
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
+
+    await db.users.update_one({"google_sub": "sub-admin"}, {"$set": {"admin": True}})
+    response = await client.get("/me", headers=headers)
+    assert SEGMENTS.fullmatch(response.headers["server-timing"])
+    assert "server-timing" not in (
+        await client.get("/me", headers={"Authorization": "Bearer token"})
+    ).headers
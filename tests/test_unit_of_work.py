@@ -0,0 +1,49 @@
+import pytest
+
+from app.unit_of_work import UnitOfWork
+
+
+@pytest.mark.asyncio
+async def test_find_one_caches_by_collection_and_id(db):
+    result = await db.lists.insert_one({"user_id": "user-123", "name": "Weekly"})
+    uow = UnitOfWork(db)
+    query = {"_id": result.inserted_id, "user_id": "user-123", "deleted_at": None}
+
+    first = await uow.find_one("lists", query)
+    # Change the stored document behind the unit of work's back: a repeated
+    # lookup is answered from the identity map without reading it again.
+    await db.lists.update_one({"_id": result.inserted_id}, {"$set": {"name": "Other"}})
+    second = await uow.find_one("lists", query)
+
+    assert second is first
+    assert second["name"] == "Weekly"
+    assert await uow.find_one("lists", {**query, "user_id": "someone-else"}) is None
+
+
+@pytest.mark.asyncio
+async def test_writes_refresh_or_evict_cached_documents(db):
+    result = await db.template_items.insert_one({"user_id": "user-123", "name": "Eggs"})
+    uow = UnitOfWork(db)
+    query = {"_id": result.inserted_id, "user_id": "user-123"}
+    await uow.find_one("template_items", query)
+
+    updated = await uow.update_one("template_items", query, {"$set": {"name": "Milk"}})
+    assert updated["name"] == "Milk"
+    assert uow.cached("template_items", result.inserted_id) is updated
+
+    assert await uow.delete_one("template_items", query) is True
+    assert uow.cached("template_items", result.inserted_id) is None
+    assert await uow.find_one("template_items", query) is None
+
+
+@pytest.mark.asyncio
+async def test_projected_and_operator_lookups_are_not_cached(db):
+    result = await db.lists.insert_one({"user_id": "user-123", "name": "Weekly"})
+    uow = UnitOfWork(db)
+
+    partial = await uow.find_one("lists", {"_id": result.inserted_id}, {"_id": 1})
+    assert partial == {"_id": result.inserted_id}
+    assert uow.cached("lists", result.inserted_id) is None
+
+    await uow.find_one("lists", {"_id": result.inserted_id, "completed": {"$ne": True}})
+    assert uow.cached("lists", result.inserted_id) is None
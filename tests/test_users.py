@@ -4,6 +4,8 @@ from bson import ObjectId
 import pytest
 
 from app.auth import get_current_user
+from app.deletions import run_pending_deletions
+from app.routers.users import _dashboard_summary
 
 
 @pytest.mark.asyncio
@@ -33,6 +35,38 @@ async def test_dashboard_summary_returns_counts_and_latest_five_templates(client
     assert data["last_created_templates"] == []
 
 
+@pytest.mark.asyncio
+async def test_dashboard_reads_only_its_counts_through_the_stale_handle(
+    client, db, mongo_client, current_user
+):
+    await client.post("/lists", json={"name": "Weekly"})
+    stale_db = mongo_client[f"{db.name}_stale"]
+
+    summary = await _dashboard_summary(db, current_user, counts_db=stale_db)
+
+    assert summary["active_list_count"] == 0
+    assert [doc["name"] for doc in summary["last_created_lists"]] == ["Weekly"]
+
+
+@pytest.mark.asyncio
+async def test_bootstrap_matches_individual_home_screen_endpoints(client):
+    created = (await client.post("/lists", json={"name": "Weekly"})).json()
+    await client.post(f"/lists/{created['id']}/items", json={"name": "Milk"})
+    await client.post("/templates", json={"name": "Party", "items": [{"name": "Cake"}]})
+
+    response = await client.get("/me/bootstrap")
+    assert response.status_code == 200
+    data = response.json()
+    assert data == {
+        "user": (await client.get("/me")).json(),
+        "dashboard": (await client.get("/me/dashboard")).json(),
+        "lists": (await client.get("/lists")).json(),
+        "templates": (await client.get("/templates")).json(),
+    }
+    assert data["lists"][0]["items_count"] == 1
+    assert data["templates"][0]["items_count"] == 1
+
+
 @pytest.mark.asyncio
 async def test_dashboard_summary_filters_by_user_and_orders_by_created_at(client, db, current_user):
     now = datetime(2026, 1, 1, 10, 0, tzinfo=timezone.utc)
@@ -626,6 +660,24 @@ async def test_delete_pending_user_cascade_deletes_user_data(client, app, db):
     response = await client.delete(f"/me/admin/users/{pending_user_str}")
     assert response.status_code == 204
 
+    response = await client.get("/me/admin/pending-users")
+    assert pending_user_str not in [user["id"] for user in response.json()]
+
+    assert await run_pending_deletions(db, batch_size=1, pause_seconds=0) == 1
+
+    response = await client.get("/me/admin/deletions")
+    assert response.status_code == 200
+    jobs = response.json()
+    assert jobs[0]["parent_id"] == pending_user_str
+    assert jobs[0]["status"] == "done"
+    assert jobs[0]["deleted"] == {
+        "items": 1,
+        "lists": 1,
+        "template_items": 1,
+        "templates": 1,
+        "users": 1,
+    }
+
     assert await db.users.count_documents({"_id": pending_user_id}) == 0
     assert await db.lists.count_documents({"user_id": pending_user_str}) == 0
     assert await db.items.count_documents({"user_id": pending_user_str}) == 0
@@ -1,10 +1,16 @@
-from datetime import timezone
+from datetime import datetime, timezone
 
 import pytest
 from bson import ObjectId
 from fastapi import HTTPException
 
-from app.utils import serialize_doc, to_object_id, utcnow
+from app.utils import (
+    decode_sync_token,
+    encode_sync_token,
+    serialize_doc,
+    to_object_id,
+    utcnow,
+)
 
 
 def test_utcnow_is_timezone_aware():
@@ -36,3 +42,14 @@ def test_serialize_doc_moves_id():
     assert result["id"] == str(value)
     assert result["name"] == "Groceries"
     assert "_id" not in result
+
+
+def test_sync_token_round_trip():
+    value = datetime(2026, 3, 1, 9, 30, 15, 123000, tzinfo=timezone.utc)
+    assert decode_sync_token(encode_sync_token(value)) == value
+
+
+def test_decode_sync_token_invalid_raises_400():
+    with pytest.raises(HTTPException) as exc:
+        decode_sync_token("not-a-token")
+    assert exc.value.status_code == 400